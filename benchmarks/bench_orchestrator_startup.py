@@ -0,0 +1,50 @@
+"""Startup-cost benchmark: fresh ContentMarketingOrchestrator per request vs the shared registry.
+
+Run with: python benchmarks/bench_orchestrator_startup.py [--requests 20]
+
+No API calls are made; constructing chat clients and compiling the graph is all local work.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+from src.orchestrator import registry
+
+
+def _time_ms(fn, repeats: int) -> list:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20, help="Simulated Generate Content clicks")
+    args = parser.parse_args()
+
+    settings = {"provider": "OpenAI", "api_key": os.environ["OPENAI_API_KEY"]}
+    registry.invalidate()
+
+    fresh = _time_ms(lambda: ContentMarketingOrchestrator(api_key=settings["api_key"]), args.requests)
+    first = _time_ms(lambda: registry.get_orchestrator(**settings), 1)[0]
+    cached = _time_ms(lambda: registry.get_orchestrator(**settings), args.requests)
+
+    print(f"requests:                {args.requests}")
+    print(f"fresh per request:       median {statistics.median(fresh):8.2f} ms   max {max(fresh):8.2f} ms")
+    print(f"registry first build:    {first:8.2f} ms")
+    print(f"registry cached lookup:  median {statistics.median(cached):8.4f} ms   max {max(cached):8.4f} ms")
+    print(f"saved per request:       {statistics.median(fresh) - statistics.median(cached):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
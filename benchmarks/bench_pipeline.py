@@ -0,0 +1,374 @@
+"""End-to-end benchmark of ContentMarketingOrchestrator against local stand-in backends.
+
+Run with: python benchmarks/bench_pipeline.py [--concurrency 1,8,32] [--runs 32] [--parallel]
+                                              [--output results.json] [--threshold 0.25] [--update-baseline]
+
+Every run goes through the real graph, agents, scheduler and HTTP clients; only the remote
+services are replaced by src/tools/fake_openai_server.py (chat completions, DALL-E images and
+the SERP search endpoint with the result pages it links to), with seeded latency distributions
+set by --latency, --image-latency, --search-latency and --page-latency. The server runs in a child process so it does not share the GIL or the
+measured RSS with the pipeline. The LLM cache and the research index are disabled and rate
+limits are lifted, so every run does the full amount of work; one untimed warm-up run loads
+lazily imported modules first.
+
+For each concurrency level, --runs requests (at least one per slot) are started through
+app.ainvoke with at most that many in flight, and the report shows:
+
+- end-to-end latency p50/p95/p99 and throughput (runs per second of wall time)
+- per-node latency p50/p95/p99 from the timing records in the final state
+- peak RSS of this process while the level ran (sampled)
+- median bytes stored per run in the SQLite checkpointer (checkpoints + pending writes)
+
+Results are written as JSON (--output) and compared with the stored baseline
+(benchmarks/data/pipeline_baseline.json by default). A metric that is worse than the baseline
+by more than --threshold (relative; latencies also by more than --min-ms) is a regression and
+the script exits with status 1. --update-baseline replaces the baseline with this run instead.
+
+The stored baseline predates research page fetching (PAGE_FETCH_COUNT, on by default), which
+the benchmark exercises through the fake server's linked pages. Against it, expect the research
+node to be slower by about the slowest of five --page-latency draws: p50 +185/+265/+490 ms and
+p95 +340/+440/+610 ms at concurrency 1/8/32, which puts end-to-end p95 about 30% over the
+baseline at concurrency 1 and flags a regression. Run with PAGE_FETCH_COUNT=0 to compare the
+rest of the pipeline like for like.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+import httpx
+
+from src.tools.fake_openai_server import FakeServerConfig
+from src.utils import llm_cache, search_cache, topic_index
+from src.utils.config import Config
+from src.utils.scheduler import Scheduler, set_scheduler
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "data", "pipeline_baseline.json")
+
+# Alternating requests: a blog post (blog, then images) and blog + LinkedIn (blog, then LinkedIn)
+REQUESTS = ["Write a blog post about {topic} (brief {index})",
+            "Write a blog post and a LinkedIn post about {topic} (brief {index})"]
+TOPICS = [
+    "AI in marketing", "remote work productivity", "sustainable packaging", "zero trust security",
+    "electric vehicle adoption", "cloud cost optimization", "B2B customer retention", "data privacy",
+]
+
+# Metrics where a larger value is better; everything else is compared as lower-is-better
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (nearest rank) of `samples`, rounded to 0.1"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 1)
+
+    return {"p50": rank(50), "p95": rank(95), "p99": rank(99)}
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Without /proc only the process-wide peak is available (bytes on macOS, KiB elsewhere)
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """Peak resident set size while the `with` block runs, sampled every `interval` seconds"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, _rss_bytes())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+@contextmanager
+def fake_backends(config: FakeServerConfig) -> Iterator[Tuple[str, str]]:
+    """Run the fake OpenAI and search server in a child process; yields (base_url, search_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    command = [sys.executable, "-m", "src.tools.fake_openai_server", "--port", str(port)]
+    for field in fields(FakeServerConfig):
+        command += [f"--{field.name.replace('_', '-')}", str(getattr(config, field.name))]
+    process = subprocess.Popen(command, cwd=project_root, stdout=subprocess.DEVNULL)
+    root = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{root}/stats", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Fake server did not start: {' '.join(command)}")
+                time.sleep(0.1)
+        yield f"{root}/v1", f"{root}/search.json"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _stored_bytes(db_path: str, thread_id: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        checkpoints = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(checkpoint)) + SUM(LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?",
+            (thread_id,)
+        ).fetchone()[0]
+        writes = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?", (thread_id,)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+    return checkpoints + writes
+
+
+async def _run_level(orchestrator: ContentMarketingOrchestrator, concurrency: int, runs: int,
+                     db_path: Optional[str]) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    node_samples: Dict[str, List[float]] = {}
+    finished: List[str] = []
+    errors = 0
+
+    async def _one(index: int) -> None:
+        nonlocal errors
+        topic = TOPICS[index // len(REQUESTS) % len(TOPICS)]
+        thread_id = f"bench-c{concurrency}-{index}"
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                query = REQUESTS[index % len(REQUESTS)].format(topic=topic, index=index)
+                result = await orchestrator.app.ainvoke(
+                    {"user_query": query, "conversation_history": []},
+                    config={"configurable": {"thread_id": thread_id}}
+                )
+            except Exception as e:
+                errors += 1
+                print(f"run {thread_id} failed: {e}")
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+        if not result.get("success") or result.get("errors"):
+            errors += 1
+            print(f"run {thread_id} reported errors: {result.get('errors')}")
+        for record in result.get("timings") or []:
+            node_samples.setdefault(record["node"], []).append(record["wall_ms"])
+        finished.append(thread_id)
+
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(_one(i) for i in range(runs)))
+        wall = time.perf_counter() - started
+
+    # Read after the level so the SQLite queries do not hold up runs still in flight
+    stored = [_stored_bytes(db_path, thread_id) for thread_id in finished] if db_path else []
+    return {
+        "runs": runs,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "e2e_ms": percentiles(latencies),
+        "nodes_ms": {node: percentiles(samples) for node, samples in sorted(node_samples.items())},
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+        "checkpoint_kb_per_run": round(statistics.median(stored) / 1024, 1) if stored else None,
+    }
+
+
+def run(concurrency_levels: List[int], runs: int, server_config: FakeServerConfig,
+        parallel: bool = False) -> Dict[str, Any]:
+    """Benchmark every concurrency level against a fresh fake server; returns the results document"""
+    saved = (Config.OPENAI_BASE_URL, Config.SERP_API_KEY, Config.SERP_API_URL, Config.IMAGE_OUTPUT_DIR,
+             llm_cache.get_cache(), topic_index.get_topic_index(), search_cache.get_search_cache())
+    levels = {}
+    with fake_backends(server_config) as (base_url, search_url), tempfile.TemporaryDirectory() as tmp:
+        Config.OPENAI_BASE_URL = base_url
+        Config.SERP_API_KEY, Config.SERP_API_URL = "bench-key", search_url
+        Config.IMAGE_OUTPUT_DIR = os.path.join(tmp, "images")
+        llm_cache.set_cache(None)
+        topic_index.set_topic_index(None)
+        search_cache.set_search_cache(None)
+        # The fake server has no rate limits; the local buckets would otherwise dominate
+        set_scheduler(Scheduler({"openai": {"rpm": 1e9, "tpm": 1e12}, "image": {"rpm": 1e9}}))
+
+        async def _all_levels() -> None:
+            # One event loop for every level: cached chat models keep their async connections,
+            # which belong to the loop that opened them
+            warm_up = ContentMarketingOrchestrator(parallel=parallel, api_key="bench-key")
+            for query in REQUESTS:
+                await warm_up.app.ainvoke({"user_query": query.format(topic=TOPICS[0], index="warm-up"),
+                                           "conversation_history": []},
+                                          config={"configurable": {"thread_id": f"warm-up-{query}"}})
+            for concurrency in concurrency_levels:
+                db_path = os.path.join(tmp, f"checkpoints-c{concurrency}.sqlite")
+                orchestrator = ContentMarketingOrchestrator(parallel=parallel, api_key="bench-key",
+                                                            checkpoint_path=db_path)
+                level_runs = max(runs, concurrency)
+                print(f"concurrency {concurrency}: {level_runs} runs...")
+                levels[str(concurrency)] = await _run_level(orchestrator, concurrency, level_runs, db_path)
+
+        try:
+            asyncio.run(_all_levels())
+        finally:
+            (Config.OPENAI_BASE_URL, Config.SERP_API_KEY, Config.SERP_API_URL, Config.IMAGE_OUTPUT_DIR,
+             cache, index, searches) = saved
+            llm_cache.set_cache(cache)
+            topic_index.set_topic_index(index)
+            search_cache.set_search_cache(searches)
+            set_scheduler(None)
+    return {
+        "settings": {
+            "runs": runs,
+            "parallel": parallel,
+            "latency": server_config.latency,
+            "image_latency": server_config.image_latency,
+            "search_latency": server_config.search_latency,
+            "seed": server_config.seed,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "levels": levels,
+    }
+
+
+def flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    """Comparable metrics keyed like "c8.e2e_ms.p95" or "c8.nodes_ms.research.p50" """
+    metrics = {}
+    for concurrency, level in results["levels"].items():
+        prefix = f"c{concurrency}"
+        metrics[f"{prefix}.throughput_rps"] = level["throughput_rps"]
+        metrics[f"{prefix}.peak_rss_mb"] = level["peak_rss_mb"]
+        if level.get("checkpoint_kb_per_run") is not None:
+            metrics[f"{prefix}.checkpoint_kb_per_run"] = level["checkpoint_kb_per_run"]
+        for name in ("p50", "p95"):
+            metrics[f"{prefix}.e2e_ms.{name}"] = level["e2e_ms"][name]
+        # Node tails come from a few dozen samples, too few for a stable p95
+        for node, values in level["nodes_ms"].items():
+            metrics[f"{prefix}.nodes_ms.{node}.p50"] = values["p50"]
+    return metrics
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_ms: float = 5.0) -> List[Dict[str, Any]]:
+    """Metrics worse than the baseline by more than `threshold` (relative) and, for latencies, `min_ms`"""
+    now, before = flatten(current), flatten(baseline)
+    regressions = []
+    for key, old in before.items():
+        new = now.get(key)
+        if new is None or not old:
+            continue
+        higher_is_better = key.endswith(HIGHER_IS_BETTER)
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change <= threshold:
+            continue
+        if "_ms" in key and abs(new - old) < min_ms:
+            continue
+        regressions.append({"metric": key, "baseline": old, "current": new, "change": round(change, 3)})
+    return regressions
+
+
+def _print_report(results: Dict[str, Any]) -> None:
+    print(f"\n{'conc':>5}{'runs':>6}{'err':>5}{'runs/s':>9}{'e2e p50':>10}{'p95':>9}{'p99':>9}"
+          f"{'RSS MB':>9}{'ckpt KB':>9}")
+    for concurrency, level in results["levels"].items():
+        e2e = level["e2e_ms"]
+        checkpoint = level["checkpoint_kb_per_run"]
+        print(f"{concurrency:>5}{level['runs']:>6}{level['errors']:>5}{level['throughput_rps']:>9.2f}"
+              f"{e2e['p50']:>10.0f}{e2e['p95']:>9.0f}{e2e['p99']:>9.0f}{level['peak_rss_mb']:>9.1f}"
+              f"{checkpoint if checkpoint is not None else '-':>9}")
+    for concurrency, level in results["levels"].items():
+        print(f"\nper-node ms at concurrency {concurrency}:")
+        for node, values in level["nodes_ms"].items():
+            print(f"  {node:<18}{values['p50']:>9.1f}{values['p95']:>9.1f}{values['p99']:>9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--runs", type=int, default=32, help="Runs per level (at least the concurrency)")
+    parser.add_argument("--parallel", action="store_true", help="Use the fan-out/fan-in workflow")
+    parser.add_argument("--latency", default="lognormal:0.05,0.3", help="Chat completion latency spec")
+    parser.add_argument("--image-latency", default="lognormal:0.2,0.3", help="Image generation latency spec")
+    parser.add_argument("--search-latency", default="lognormal:0.1,0.3", help="Search latency spec")
+    parser.add_argument("--page-latency", default="lognormal:0.1,0.5", help="Search result page latency spec")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative change that counts as a regression")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Ignore latency changes smaller than this")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    server_config = FakeServerConfig(latency=args.latency, image_latency=args.image_latency,
+                                     search_latency=args.search_latency, page_latency=args.page_latency,
+                                     page_links=True, seed=args.seed)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    results = run(levels, args.runs, server_config, args.parallel)
+    _print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nbaseline updated: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != results["settings"]:
+        print(f"\nwarning: baseline settings differ: {baseline.get('settings')}")
+    regressions = compare(results, baseline, args.threshold, args.min_ms)
+    if not regressions:
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for item in regressions:
+        print(f"  {item['metric']:<40}{item['baseline']:>10}{item['current']:>10}  {item['change']:+.0%}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Accuracy vs latency of query routing: local rules, the Naive Bayes model, the hybrid fast path and the LLM.
+
+Run with: python benchmarks/bench_query_routing.py [--threshold 0.8] [--repeat 200] [--llm]
+
+Uses the labelled queries in benchmarks/data/routing_queries.jsonl (query + expected
+content_type). For each strategy the report shows:
+
+- coverage: share of queries answered locally at the confidence threshold
+- accuracy: share of answered queries routed to the expected content type
+- latency: mean and p99 per query in microseconds (local strategies are repeated --repeat times)
+
+--llm also routes every query through QueryHandlerAgent with the fast path disabled, which
+needs a real OPENAI_API_KEY and makes one API call per query. The "hybrid + LLM" row then
+combines the local answers with the LLM answers for the rest, i.e. what analyze_query returns.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from src.agents.query_classifier import QueryClassifier
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "routing_queries.jsonl")
+
+
+def load_queries(path: str = DATA_PATH) -> List[Dict[str, str]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _measure(fn: Callable[[str], Tuple[Optional[str], float]], queries: List[Dict[str, str]],
+             repeat: int) -> Tuple[List[Tuple[Optional[str], float]], List[float]]:
+    """Predictions plus per-query latency in microseconds (mean over `repeat` runs)"""
+    predictions, latencies = [], []
+    for item in queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            prediction = fn(item["query"])
+        latencies.append((time.perf_counter() - start) * 1e6 / repeat)
+        predictions.append(prediction)
+    return predictions, latencies
+
+
+def _row(name: str, queries: List[Dict[str, str]], predictions: List[Tuple[Optional[str], float]],
+         latencies: List[float], threshold: float) -> Dict[str, float]:
+    answered = [(item, label) for item, (label, confidence) in zip(queries, predictions)
+                if label is not None and confidence >= threshold]
+    correct = sum(1 for item, label in answered if label == item["content_type"])
+    ordered = sorted(latencies)
+    return {
+        "strategy": name,
+        "coverage": len(answered) / len(queries),
+        "accuracy": correct / len(answered) if answered else 0.0,
+        "mean_us": statistics.mean(latencies),
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+def run(threshold: float, repeat: int, with_llm: bool) -> List[Dict[str, float]]:
+    queries = load_queries()
+    classifier = QueryClassifier()
+
+    def hybrid(query: str) -> Tuple[Optional[str], float]:
+        result = classifier.classify(query)
+        return result["content_type"], result["routing"]["confidence"]
+
+    rows = []
+    for name, fn in [("rules", classifier.rule_match), ("naive bayes", classifier.model.predict), ("hybrid", hybrid)]:
+        predictions, latencies = _measure(fn, queries, repeat)
+        rows.append(_row(name, queries, predictions, latencies, threshold))
+
+    if with_llm:
+        from src.agents.query_handler_agent import QueryHandlerAgent
+        agent = QueryHandlerAgent(fast_path=False)
+        llm_predictions, llm_latencies = _measure(
+            lambda query: (agent.analyze_query(query)["content_type"], 1.0), queries, 1
+        )
+        rows.append(_row("llm", queries, llm_predictions, llm_latencies, threshold))
+
+        hybrid_predictions, hybrid_latencies = _measure(hybrid, queries, repeat)
+        combined, combined_latencies = [], []
+        for local, local_us, remote, remote_us in zip(hybrid_predictions, hybrid_latencies,
+                                                      llm_predictions, llm_latencies):
+            if local[1] >= threshold:
+                combined.append(local)
+                combined_latencies.append(local_us)
+            else:
+                combined.append(remote)
+                combined_latencies.append(local_us + remote_us)
+        rows.append(_row("hybrid + llm", queries, combined, combined_latencies, threshold))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=0.8, help="Confidence needed to answer locally")
+    parser.add_argument("--repeat", type=int, default=200, help="Repetitions per query for local strategies")
+    parser.add_argument("--llm", action="store_true", help="Also route through the LLM (real API calls)")
+    args = parser.parse_args()
+
+    rows = run(args.threshold, args.repeat, args.llm)
+    print(f"{len(load_queries())} labelled queries, confidence threshold {args.threshold}\n")
+    print(f"{'strategy':<14}{'coverage':>10}{'accuracy':>10}{'mean µs':>12}{'p99 µs':>12}")
+    for row in rows:
+        print(f"{row['strategy']:<14}{row['coverage']:>10.0%}{row['accuracy']:>10.0%}"
+              f"{row['mean_us']:>12.1f}{row['p99_us']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Checkpoint-size and memory benchmark: full-state copies vs reducer-based deltas.
+
+Run with: python benchmarks/bench_state_updates.py [--blog-kb 40] [--runs 5]
+
+Both variants run the same sequential pipeline (query analysis, research, blog, images,
+LinkedIn, finalize) with stubbed agents that return a long blog post, so no API calls are made.
+
+- "full copy" is the old node style: every node returns {**state, ...} over a state schema with
+  no reducers, and rebuilds processing_steps / completed_agents by list concatenation.
+- "delta" is the current style: nodes return only the keys they change and the annotated
+  reducers in ContentMarketingState merge them.
+
+Checkpoints go to a throwaway SQLite file; the report shows the bytes stored per run in the
+checkpoints and writes tables, plus peak Python allocations during the run.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from typing import Any, Dict, TypedDict, get_type_hints
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from langgraph.graph import StateGraph, START, END
+
+from src.orchestrator.state import ContentMarketingState
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+from src.orchestrator.checkpoint import create_checkpointer
+
+NODES = ["query_analysis", "research", "blog_writing", "image_generation", "linkedin_writing", "finalize"]
+
+
+def _stub_orchestrator(blog_kb: int) -> ContentMarketingOrchestrator:
+    orchestrator = ContentMarketingOrchestrator(parallel=False, speculative_research=False)
+    paragraph = "Artificial intelligence is reshaping how marketing teams plan and ship content. "
+    blog = paragraph * (blog_kb * 1024 // len(paragraph))
+    results = {
+        (orchestrator.query_handler, "analyze_query"): {
+            "content_type": "blog", "research_needed": True,
+            "required_agents": ["blog_writer", "image_generator", "LinkedInWriterAgent"],
+        },
+        (orchestrator.research_agent, "conduct_research"): {
+            "search_results": [{"title": f"Result {i}", "snippet": paragraph * 4} for i in range(10)],
+            "sources": [f"https://example.com/{i}" for i in range(10)],
+            "key_insights": [paragraph] * 8,
+            "summary": paragraph * 20,
+        },
+        (orchestrator.blog_writer, "create_blog_post"): {"content": blog, "quality_score": 85},
+        (orchestrator.image_generator, "generate_images"): {"images": ["a.png", "b.png"], "prompts": ["p1", "p2"]},
+        (orchestrator.linkedin_writer, "create_linkedin_post"): {"content": paragraph * 10, "quality_score": 88},
+    }
+    for (agent, method), result in results.items():
+        setattr(agent, method, lambda *args, _result=result, **kwargs: _result)
+    return orchestrator
+
+
+def _reducer_keys() -> Dict[str, Any]:
+    hints = get_type_hints(ContentMarketingState, include_extras=True)
+    return {key: hint.__metadata__[0] for key, hint in hints.items() if hasattr(hint, "__metadata__")}
+
+
+def _full_copy_schema() -> type:
+    """ContentMarketingState without reducers: every key is last-write-wins, as before"""
+    hints = get_type_hints(ContentMarketingState)
+    return TypedDict("FullCopyState", hints)
+
+
+def _full_copy_node(fn, reducers: Dict[str, Any]):
+    def node(state):
+        update = fn(state)
+        new_state = {**state}
+        for key, value in update.items():
+            if key in reducers:
+                value = reducers[key](state.get(key) or type(value)(), value)
+            new_state[key] = value
+        return new_state
+    return node
+
+
+def _build(orchestrator: ContentMarketingOrchestrator, full_copy: bool, checkpointer):
+    reducers = _reducer_keys()
+    workflow = StateGraph(_full_copy_schema() if full_copy else ContentMarketingState)
+    for name in NODES:
+        fn = getattr(orchestrator, f"_{name}_node")
+        workflow.add_node(name, _full_copy_node(fn, reducers) if full_copy else fn)
+    workflow.add_edge(START, NODES[0])
+    for previous, following in zip(NODES, NODES[1:]):
+        workflow.add_edge(previous, following)
+    workflow.add_edge(NODES[-1], END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def _stored_bytes(db_path: str, thread_id: str) -> Dict[str, int]:
+    conn = sqlite3.connect(db_path)
+    try:
+        checkpoints = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint)), 0) FROM checkpoints WHERE thread_id = ?",
+            (thread_id,)
+        ).fetchone()
+        writes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?",
+            (thread_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"checkpoints": checkpoints[0], "checkpoint_bytes": checkpoints[1],
+            "writes": writes[0], "write_bytes": writes[1]}
+
+
+def _measure(app, db_path: str, runs: int, label: str) -> Dict[str, Any]:
+    stored, peaks = [], []
+    for i in range(runs):
+        thread_id = f"{label}-{i}"
+        tracemalloc.start()
+        result = app.invoke({"user_query": "AI in marketing"}, config={"configurable": {"thread_id": thread_id}})
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert result["success"] and result["processing_steps"].count("Workflow Complete") == 1
+        stored.append(_stored_bytes(db_path, thread_id))
+    return {
+        "checkpoints": stored[0]["checkpoints"],
+        "writes": stored[0]["writes"],
+        "checkpoint_bytes": stored[0]["checkpoint_bytes"],
+        "write_bytes": stored[0]["write_bytes"],
+        "peak_kb": statistics.median(peaks) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blog-kb", type=int, default=40, help="Size of the stubbed blog post")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per variant (peak memory is the median)")
+    args = parser.parse_args()
+
+    orchestrator = _stub_orchestrator(args.blog_kb)
+    with tempfile.TemporaryDirectory() as tmp:
+        report = {}
+        for label, full_copy in (("full copy", True), ("delta", False)):
+            db_path = os.path.join(tmp, f"{label.replace(' ', '_')}.sqlite")
+            app = _build(orchestrator, full_copy, create_checkpointer(db_path))
+            report[label] = _measure(app, db_path, args.runs, label.replace(" ", "_"))
+
+    print(f"blog size: {args.blog_kb} KB, runs per variant: {args.runs}")
+    print(f"{'':12}{'checkpoints':>12}{'ckpt KB':>10}{'writes':>8}{'writes KB':>11}{'total KB':>10}{'peak KB':>10}")
+    for label, row in report.items():
+        total = (row["checkpoint_bytes"] + row["write_bytes"]) / 1024
+        print(f"{label:12}{row['checkpoints']:>12}{row['checkpoint_bytes'] / 1024:>10.1f}{row['writes']:>8}"
+              f"{row['write_bytes'] / 1024:>11.1f}{total:>10.1f}{row['peak_kb']:>10.1f}")
+    full, delta = report["full copy"], report["delta"]
+    saved = (full["checkpoint_bytes"] + full["write_bytes"]) - (delta["checkpoint_bytes"] + delta["write_bytes"])
+    print(f"stored per run saved by deltas: {saved / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,280 @@
-from typing import Dict, Any
+import asyncio
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Dict, Any, Callable, List, Optional
 from ..utils.config import Config
+from ..utils.llm_clients import get_hedged_model
+from ..utils.instrumentation import invoke_llm, ainvoke_llm, stream_llm, astream_llm
+from ..utils.prompt_builder import fit_context
+
+# "single": the whole post in one completion.
+# "long_form": an outline call, then every section written concurrently from the shared outline
+# and research, stitched in order; latency follows the longest section, not the whole article.
+BLOG_MODES = ("single", "long_form")
+
+BLOG_OUTLINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "heading": {"type": "string"},
+                    "key_points": {"type": "array", "items": {"type": "string"}},
+                    "words": {"type": "integer"},
+                },
+                "required": ["heading", "key_points", "words"],
+                "additionalProperties": False,
+            },
+        },
+        "keywords": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["title", "sections", "keywords"],
+    "additionalProperties": False,
+}
+
+_HEADING = re.compile(r"^\s*#{1,6}\s+(.*)$")
+
 
 class SEOBlogWriterAgent:
     """Creates search-optimized long-form blog content"""
-    def __init__(self):
-        from langchain_openai import ChatOpenAI
+    def __init__(self, model: str = None, api_key: str = None, mode: str = None):
         try:
             from langchain_core.messages import HumanMessage, SystemMessage
         except ImportError:
             from langchain.schema import HumanMessage, SystemMessage
         self.HumanMessage = HumanMessage
         self.SystemMessage = SystemMessage
-        self.llm = ChatOpenAI(
-            model=Config.OPENAI_MODEL,
-            temperature=Config.OPENAI_TEMPERATURE,
-            api_key=Config.OPENAI_API_KEY
-        )
+        self.llm = get_hedged_model("openai", model, Config.OPENAI_TEMPERATURE, api_key)
+        self.mode = mode or Config.BLOG_MODE
+        if self.mode not in BLOG_MODES:
+            raise ValueError(f"Unknown blog mode '{self.mode}', expected one of {BLOG_MODES}")
+
+    def create_blog_post(self, context: Dict[str, Any], on_token: Callable[[str], None] = None) -> Dict[str, Any]:
+        """Write the post; when on_token is given the text is streamed to it as it is generated"""
+        if self.mode == "long_form":
+            outline = self._parse_outline(
+                invoke_llm(self.llm, self._outline_messages(context), "blog_outline",
+                           response_format=self._response_format()).content, context
+            )
+            if outline:
+                return self._write_long_form(context, outline, on_token)
+        messages = self._build_messages(context)
+        if on_token:
+            response = stream_llm(self.llm, messages, "blog_writer", on_token)
+        else:
+            response = invoke_llm(self.llm, messages, "blog_writer")
+        return self._parse_response(response.content)
 
-    def create_blog_post(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def acreate_blog_post(self, context: Dict[str, Any], on_token: Callable[[str], None] = None) -> Dict[str, Any]:
+        if self.mode == "long_form":
+            response = await ainvoke_llm(self.llm, self._outline_messages(context), "blog_outline",
+                                         response_format=self._response_format())
+            outline = self._parse_outline(response.content, context)
+            if outline:
+                return await self._awrite_long_form(context, outline, on_token)
+        messages = self._build_messages(context)
+        if on_token:
+            response = await astream_llm(self.llm, messages, "blog_writer", on_token)
+        else:
+            response = await ainvoke_llm(self.llm, messages, "blog_writer")
+        return self._parse_response(response.content)
+
+    def _build_messages(self, context: Dict[str, Any]) -> list:
+        fitted = self._fitted_research(context)
         prompt = f"""
         You are an expert SEO blog writer. Write a detailed, search-optimized blog post about \"{context.get('topic', '')}\".
         Use the following research summary and key insights:
-        Research Summary: {context.get('research_summary', '')}
-        Key Insights: {', '.join(context.get('key_insights', []))}
+        Research Summary: {fitted['research_summary']}
+        Key Insights: {', '.join(fitted['key_insights'])}
         Target Audience: {context.get('target_audience', '')}
         Brand Voice: {context.get('brand_voice', '')}
         Provide a list of 5 SEO keywords at the end.
         """
-        messages = [
+        return [
+            self.SystemMessage(content="You are an expert SEO blog writer."),
+            self.HumanMessage(content=prompt)
+        ]
+
+    def _fitted_research(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        return fit_context("blog_writer", {
+            "research_summary": context.get('research_summary', ''),
+            "key_insights": context.get('key_insights', []),
+        }, topic=context.get('topic', ''))
+
+    def _response_format(self) -> Dict[str, Any]:
+        """OpenAI structured-output parameter for the long-form outline"""
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "blog_outline", "strict": True, "schema": BLOG_OUTLINE_SCHEMA},
+        }
+
+    def _target_words(self, context: Dict[str, Any]) -> int:
+        return int(context.get('target_words') or Config.BLOG_LONG_FORM_WORDS)
+
+    def _outline_messages(self, context: Dict[str, Any]) -> list:
+        fitted = self._fitted_research(context)
+        words = self._target_words(context)
+        prompt = f"""
+        You are an expert SEO blog writer planning a long-form post of about {words} words on \"{context.get('topic', '')}\".
+        Create an outline with a title, 4-{Config.BLOG_MAX_SECTIONS} sections in reading order (the first introduces the post, the last concludes it) and 5 SEO keywords.
+        For each section give its heading, 2-4 key points it must cover and its share of the word count.
+        Research Summary: {fitted['research_summary']}
+        Key Insights: {', '.join(fitted['key_insights'])}
+        Target Audience: {context.get('target_audience', '')}
+        Brand Voice: {context.get('brand_voice', '')}
+        Respond with JSON matching the provided schema.
+        """
+        return [
             self.SystemMessage(content="You are an expert SEO blog writer."),
             self.HumanMessage(content=prompt)
         ]
-        response = self.llm.invoke(messages)
-        content = response.content
+
+    def _parse_outline(self, content: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate an outline response; None (single-completion fallback) when it is unusable"""
+        try:
+            data = json.loads(content)
+        except (TypeError, ValueError):
+            print("Blog outline is not valid JSON; writing the post in one completion")
+            return None
+        sections = data.get("sections") if isinstance(data, dict) else None
+        if not isinstance(sections, list):
+            print("Blog outline does not match the schema; writing the post in one completion")
+            return None
+        valid = [s for s in sections if isinstance(s, dict) and isinstance(s.get("heading"), str) and s["heading"].strip()]
+        valid = valid[:Config.BLOG_MAX_SECTIONS]
+        if len(valid) < 2:
+            print("Blog outline has fewer than two sections; writing the post in one completion")
+            return None
+        default_words = max(100, self._target_words(context) // len(valid))
+        keywords = data.get("keywords") if isinstance(data.get("keywords"), list) else []
+        return {
+            "title": str(data.get("title") or context.get('topic', '')).strip(),
+            "sections": [{
+                "heading": s["heading"].strip(),
+                "key_points": [p for p in s.get("key_points") or [] if isinstance(p, str)],
+                "words": s["words"] if isinstance(s.get("words"), int) and s["words"] > 0 else default_words,
+            } for s in valid],
+            "keywords": [k.strip() for k in keywords if isinstance(k, str) and k.strip()][:5],
+        }
+
+    def _section_messages(self, context: Dict[str, Any], outline: Dict[str, Any], index: int,
+                          fitted: Dict[str, Any]) -> list:
+        sections = outline["sections"]
+        section = sections[index]
+        plan = "\n".join(
+            f"        {i + 1}. {s['heading']}: {'; '.join(s['key_points'])}" for i, s in enumerate(sections)
+        )
+        if index == 0:
+            role = "It opens the post: start with a hook and introduce what the reader will learn."
+        elif index == len(sections) - 1:
+            role = "It closes the post: conclude and end with a clear call to action."
+        else:
+            role = "It sits in the middle of the post: no introduction or conclusion for the post as a whole."
+        prompt = f"""
+        You are an expert SEO blog writer. Several writers are each writing one section of the post \"{outline['title']}\" about \"{context.get('topic', '')}\", from this outline:
+{plan}
+        Write only section {index + 1}, \"{section['heading']}\", in about {section['words']} words, covering: {'; '.join(section['key_points']) or section['heading']}.
+        {role} Do not repeat the section heading, use ### for any subheadings and do not list keywords.
+        Research Summary: {fitted['research_summary']}
+        Key Insights: {', '.join(fitted['key_insights'])}
+        Target Audience: {context.get('target_audience', '')}
+        Brand Voice: {context.get('brand_voice', '')}
+        """
+        return [
+            self.SystemMessage(content="You are an expert SEO blog writer."),
+            self.HumanMessage(content=prompt)
+        ]
+
+    def _write_long_form(self, context: Dict[str, Any], outline: Dict[str, Any],
+                         on_token: Callable[[str], None] = None) -> Dict[str, Any]:
+        fitted = self._fitted_research(context)
+        emit = self._ordered_emitter(outline, on_token)
+        sections = outline["sections"]
+
+        def write(index: int) -> str:
+            response = invoke_llm(self.llm, self._section_messages(context, outline, index, fitted), "blog_section")
+            text = self._clean_section(response.content, sections[index]["heading"])
+            emit(index, text)
+            return text
+
+        # copy_context keeps the node timer (and stream writer) in the worker threads
+        with ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix="blog-section") as pool:
+            futures = [pool.submit(copy_context().run, write, i) for i in range(len(sections))]
+            texts = [future.result() for future in futures]
+        return self._stitch(outline, texts)
+
+    async def _awrite_long_form(self, context: Dict[str, Any], outline: Dict[str, Any],
+                                on_token: Callable[[str], None] = None) -> Dict[str, Any]:
+        fitted = self._fitted_research(context)
+        emit = self._ordered_emitter(outline, on_token)
+        sections = outline["sections"]
+
+        async def write(index: int) -> str:
+            response = await ainvoke_llm(self.llm, self._section_messages(context, outline, index, fitted),
+                                         "blog_section")
+            text = self._clean_section(response.content, sections[index]["heading"])
+            emit(index, text)
+            return text
+
+        texts = await asyncio.gather(*[write(i) for i in range(len(sections))])
+        return self._stitch(outline, list(texts))
+
+    def _ordered_emitter(self, outline: Dict[str, Any],
+                         on_token: Callable[[str], None] = None) -> Callable[[int, str], None]:
+        """Callback for finished sections that streams them to on_token in article order.
+
+        Sections finish in any order; each is held until every section before it has been sent.
+        The streamed text is exactly what _stitch returns.
+        """
+        if not on_token:
+            return lambda index, text: None
+        on_token(f"# {outline['title']}\n\n")
+        lock = threading.Lock()
+        finished: Dict[int, str] = {}
+        next_index = 0
+        last = len(outline["sections"]) - 1
+
+        def emit(index: int, text: str) -> None:
+            nonlocal next_index
+            with lock:
+                finished[index] = text
+                while next_index in finished:
+                    on_token(finished.pop(next_index) + ("\n\n" if next_index < last else ""))
+                    next_index += 1
+                if next_index > last and outline["keywords"]:
+                    on_token(f"\n\nKeywords: {', '.join(outline['keywords'])}")
+
+        return emit
+
+    def _clean_section(self, content: str, heading: str) -> str:
+        """Harmonise one section: its heading as ##, inner headings demoted to ###, no keyword list"""
+        lines = content.strip().split("\n")
+        # Drop a repeated section heading (or post title) the model put first
+        while lines and (_HEADING.match(lines[0]) or lines[0].strip().strip("*").strip() == heading):
+            lines.pop(0)
+        body = []
+        for line in lines:
+            if line.strip().lower().startswith("keywords:"):
+                break
+            match = _HEADING.match(line)
+            body.append(f"### {match.group(1)}" if match else line)
+        return f"## {heading}\n\n" + "\n".join(body).strip()
+
+    def _stitch(self, outline: Dict[str, Any], texts: List[str]) -> Dict[str, Any]:
+        content = f"# {outline['title']}\n\n" + "\n\n".join(texts)
+        if outline["keywords"]:
+            content += f"\n\nKeywords: {', '.join(outline['keywords'])}"
+        result = self._parse_response(content)
+        result["sections"] = len(texts)
+        return result
+
+    def _parse_response(self, content: str) -> Dict[str, Any]:
         keywords = []
         if "Keywords:" in content:
             keywords = [kw.strip() for kw in content.split("Keywords:")[-1].split(",") if kw.strip()]
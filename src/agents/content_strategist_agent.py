@@ -1,27 +1,41 @@
 from typing import Dict, Any
 from ..utils.config import Config
+from ..utils.llm_clients import get_hedged_model
+from ..utils.instrumentation import invoke_llm, ainvoke_llm
+from ..utils.prompt_builder import fit_context
 
 class ContentStrategistAgent:
     """Formats and organizes research into readable content"""
-    def __init__(self):
-        from langchain_openai import ChatOpenAI
+    def __init__(self, model: str = None, api_key: str = None):
         try:
             from langchain_core.messages import HumanMessage, SystemMessage
         except ImportError:
             from langchain.schema import HumanMessage, SystemMessage
         self.HumanMessage = HumanMessage
         self.SystemMessage = SystemMessage
-        self.llm = ChatOpenAI(
-            model=Config.OPENAI_MODEL,
-            temperature=Config.OPENAI_TEMPERATURE,
-            api_key=Config.OPENAI_API_KEY
-        )
+        self.llm = get_hedged_model("openai", model, Config.OPENAI_TEMPERATURE, api_key)
 
     def create_strategy(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        response = invoke_llm(self.llm, self._build_messages(context), "content_strategist")
+        return {
+            "strategy": response.content
+        }
+
+    async def acreate_strategy(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        response = await ainvoke_llm(self.llm, self._build_messages(context), "content_strategist")
+        return {
+            "strategy": response.content
+        }
+
+    def _build_messages(self, context: Dict[str, Any]) -> list:
+        fitted = fit_context("content_strategist", {
+            "research_summary": context.get('research_summary', ''),
+            "key_insights": context.get('key_insights', []),
+        }, topic=context.get('topic', ''))
         prompt = f"""
         You are a senior content strategist. Based on the following research and context, create a detailed content strategy for the topic \"{context.get('topic', '')}\".
-        Research Summary: {context.get('research_summary', '')}
-        Key Insights: {', '.join(context.get('key_insights', []))}
+        Research Summary: {fitted['research_summary']}
+        Key Insights: {', '.join(fitted['key_insights'])}
         Target Audience: {context.get('target_audience', '')}
         Brand Voice: {context.get('brand_voice', '')}
         Please include:
@@ -32,12 +46,7 @@ class ContentStrategistAgent:
         - SEO and engagement tips
         - KPIs to track
         """
-        messages = [
+        return [
             self.SystemMessage(content="You are a senior content strategist."),
             self.HumanMessage(content=prompt)
         ]
-        response = self.llm.invoke(messages)
-        strategy = response.content
-        return {
-            "strategy": strategy
-        }
@@ -1,36 +1,198 @@
+import json
 import requests
 from bs4 import BeautifulSoup
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from ..utils.config import Config
+from ..utils.llm_clients import get_hedged_model
+from ..utils.instrumentation import invoke_llm, ainvoke_llm, track_call
+from ..utils.topic_index import get_topic_index
+from ..utils.search_cache import get_search_cache, search_key
+from ..utils.resilience import retry_call, aretry_call
+from ..utils.page_fetcher import fetch_pages, afetch_pages
+from ..utils.prompt_builder import fit_context
+
+# "two_call": insight extraction, local credibility filter, then a summary call.
+# "structured": one JSON-schema call returns insights, evidence and the summary together.
+RESEARCH_MODES = ("two_call", "structured")
+
+STRUCTURED_RESEARCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "insights": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "insight": {"type": "string"},
+                    "evidence": {"type": "string"},
+                    "source_index": {"type": ["integer", "null"]},
+                },
+                "required": ["insight", "evidence", "source_index"],
+                "additionalProperties": False,
+            },
+        },
+        "summary": {"type": "string"},
+    },
+    "required": ["insights", "summary"],
+    "additionalProperties": False,
+}
 
 class DeepResearchAgent:
     """Conducts comprehensive web research and analysis"""
     
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model=Config.OPENAI_MODEL,
-            temperature=0.5,
-            api_key=Config.OPENAI_API_KEY
-        )
+    def __init__(self, model: str = None, api_key: str = None, mode: str = None):
+        self.llm = get_hedged_model("openai", model, 0.5, api_key)
         self.serp_api_key = Config.SERP_API_KEY
+        self.mode = mode or Config.RESEARCH_MODE
+        if self.mode not in RESEARCH_MODES:
+            raise ValueError(f"Unknown research mode '{self.mode}', expected one of {RESEARCH_MODES}")
     
-    def conduct_research(self, topic: str, depth: str = "comprehensive") -> Dict[str, Any]:
-        """Conduct deep research on a given topic"""
+    def conduct_research(self, topic: str, depth: str = "comprehensive", verify_facts: bool = True) -> Dict[str, Any]:
+        """Conduct deep research on a given topic; verify_facts=False skips the credibility pass"""
         
-        # Step 1: Web search for current information
+        reused = self._reuse_research(topic, verify_facts)
+        if reused is not None:
+            return reused
+
+        # Step 1: Web search for current information, and the full text of the top pages
         search_results = self._web_search(topic)
+        pages = self._pages(topic, search_results, fetch_pages(self._page_urls(search_results)))
         
+        if self.mode == "structured":
+            analysis = self._parse_structured(
+                invoke_llm(self.llm, self._structured_messages(search_results, topic, pages), "research_structured",
+                           response_format=self._response_format()).content,
+                search_results, verify_facts
+            )
+            if analysis is not None:
+                return self._store_research(self._build_result(topic, search_results, *analysis), verify_facts)
+
         # Step 2: Analyze and extract key insights
-        insights = self._extract_insights(search_results, topic)
+        insights = self._extract_insights(search_results, topic, pages)
         
         # Step 3: Fact verification and source credibility
-        verified_facts = self._verify_facts(insights)
+        verified_facts = self._verify_facts(insights) if verify_facts else self._unverified_facts(insights)
         
         # Step 4: Generate research summary
         summary = self._generate_summary(topic, insights, verified_facts)
         
+        return self._store_research(
+            self._build_result(topic, search_results, insights, verified_facts, summary), verify_facts
+        )
+
+    async def aconduct_research(self, topic: str, depth: str = "comprehensive",
+                                verify_facts: bool = True) -> Dict[str, Any]:
+        """Async variant of conduct_research"""
+        reused = self._reuse_research(topic, verify_facts)
+        if reused is not None:
+            return reused
+        search_results = await self._aweb_search(topic)
+        pages = self._pages(topic, search_results, await afetch_pages(self._page_urls(search_results)))
+        if self.mode == "structured":
+            response = await ainvoke_llm(self.llm, self._structured_messages(search_results, topic, pages),
+                                         "research_structured", response_format=self._response_format())
+            analysis = self._parse_structured(response.content, search_results, verify_facts)
+            if analysis is not None:
+                return self._store_research(self._build_result(topic, search_results, *analysis), verify_facts)
+        insights = await self._aextract_insights(search_results, topic, pages)
+        verified_facts = self._verify_facts(insights) if verify_facts else self._unverified_facts(insights)
+        summary = await self._agenerate_summary(topic, insights, verified_facts)
+        return self._store_research(
+            self._build_result(topic, search_results, insights, verified_facts, summary), verify_facts
+        )
+
+    def _response_format(self) -> Dict[str, Any]:
+        """OpenAI structured-output parameter for the single-call research mode"""
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "research", "strict": True, "schema": STRUCTURED_RESEARCH_SCHEMA},
+        }
+
+    def _structured_messages(self, search_results: List[Dict], topic: str, pages: Dict[int, str] = None) -> list:
+        """Prompt for insights, per-insight evidence and the summary in one response"""
+        
+        combined_content = "\n\n".join([
+            f"[{i}] {self._result_content(result, (pages or {}).get(i))}"
+            for i, result in enumerate(search_results)
+        ])
+        
+        system_prompt = f"""You are a Research Analysis Agent researching \"{topic}\". Using only the numbered search results below:
+
+        1. Extract 5-8 key insights (current trends, statistical data, expert opinions, practical applications, challenges and opportunities).
+        2. For each insight, quote or paraphrase the supporting evidence and give the number of the search result it comes from (null if it is not from a single result).
+        3. Write a comprehensive research summary built only from insights with concrete supporting evidence, structured as: Executive Summary (2-3 sentences), Key Findings (bullet points), Current Trends, Implications and Opportunities.
+
+        Respond with JSON matching the provided schema.
+        """
+        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Search Results:\n{combined_content}")
+        ]
+
+    def _parse_structured(self, content: str, search_results: List[Dict],
+                          verify_facts: bool) -> Optional[Tuple[List[str], List[Dict[str, Any]], str]]:
+        """Validate a structured research response into (insights, verified_facts, summary).
+
+        Returns None when the response does not match the schema, so the caller can fall
+        back to the two-call path.
+        """
+        try:
+            data = json.loads(content)
+        except (TypeError, ValueError):
+            print("Structured research response is not valid JSON; falling back to two calls")
+            return None
+        items = data.get("insights") if isinstance(data, dict) else None
+        summary = data.get("summary") if isinstance(data, dict) else None
+        if not isinstance(items, list) or not isinstance(summary, str) or not summary.strip():
+            print("Structured research response does not match the schema; falling back to two calls")
+            return None
+
+        insights, evidence = [], []
+        for item in items[:8]:
+            if not isinstance(item, dict) or not isinstance(item.get("insight"), str) or not item["insight"].strip():
+                continue
+            source_index = item.get("source_index")
+            valid_source = isinstance(source_index, int) and 0 <= source_index < len(search_results)
+            insights.append(item["insight"].strip())
+            evidence.append({
+                'evidence': item.get("evidence") if isinstance(item.get("evidence"), str) else "",
+                'source': search_results[source_index].get('link', '') if valid_source else None
+            })
+        if not insights:
+            print("Structured research response has no insights; falling back to two calls")
+            return None
+
+        verified_facts = self._verify_facts(insights) if verify_facts else self._unverified_facts(insights)
+        for fact, support in zip(verified_facts, evidence):
+            fact.update(support)
+        return insights, verified_facts, summary.strip()
+
+    def _reuse_research(self, topic: str, verify_facts: bool) -> Dict[str, Any]:
+        """Research from a near-duplicate earlier topic that is still fresh, or None"""
+        index = get_topic_index()
+        if index is None:
+            return None
+        with track_call("cache", "research_index") as call:
+            match = index.find(topic, verified=verify_facts)
+            call["cache"] = "hit" if match else "miss"
+        if match is None:
+            return None
+        print(f"♻️ Reusing research for '{match['topic']}' (similarity {match['similarity']})")
+        return {**match["research"], 'topic': topic,
+                'reused_from': {'topic': match['topic'], 'similarity': match['similarity']}}
+
+    def _store_research(self, result: Dict[str, Any], verify_facts: bool) -> Dict[str, Any]:
+        """Index finished research for later near-duplicate topics; returns it unchanged"""
+        index = get_topic_index()
+        if index is not None and result['key_insights'] and result['summary']:
+            index.add(result['topic'], result, verified=verify_facts)
+        return result
+
+    def _build_result(self, topic: str, search_results: List[Dict[str, Any]], insights: List[str],
+                      verified_facts: List[Dict[str, Any]], summary: str) -> Dict[str, Any]:
+        """Assemble the research payload returned to the orchestrator"""
         return {
             'topic': topic,
             'search_results': search_results,
@@ -46,32 +208,127 @@ class DeepResearchAgent:
         if not self.serp_api_key:
             # Fallback to simulated research results
             return self._simulate_search_results(query)
+
+        cached = self._cached_search(query)
+        if cached is not None:
+            return cached
         
         try:
-            import serpapi
-            
-            search = serpapi.GoogleSearch({
+            results = self._search_api(query)
+        except Exception as e:
+            print(f"Search API error: {e}")
+            return self._simulate_search_results(query)
+        self._store_search(query, results)
+        return results
+
+    async def _aweb_search(self, query: str) -> List[Dict[str, Any]]:
+        """Perform web search against the SERP API JSON endpoint without blocking the event loop"""
+
+        if not self.serp_api_key:
+            return self._simulate_search_results(query)
+
+        cached = self._cached_search(query)
+        if cached is not None:
+            return cached
+
+        try:
+            results = await self._asearch_api(query)
+        except Exception as e:
+            print(f"Search API error: {e}")
+            return self._simulate_search_results(query)
+        self._store_search(query, results)
+        return results
+
+    def _search_api(self, query: str) -> List[Dict[str, Any]]:
+        """One SERP API request (with retries); raises when it fails"""
+        def attempt():
+            response = requests.get(Config.SERP_API_URL, params={
+                "engine": "google",
                 "q": query,
                 "api_key": self.serp_api_key,
                 "num": Config.SEARCH_RESULTS_LIMIT
-            })
-            
-            results = search.get_dict()
-            
-            formatted_results = []
-            for result in results.get('organic_results', [])[:10]:
-                formatted_results.append({
-                    'title': result.get('title', ''),
-                    'link': result.get('link', ''),
-                    'snippet': result.get('snippet', ''),
-                    'source': result.get('displayed_link', '')
+            }, timeout=Config.HTTP_TIMEOUT)
+            response.raise_for_status()
+            return response
+
+        with track_call("http", "serpapi") as call:
+            response = retry_call("serpapi", attempt, call)
+            call["bytes"] = len(response.content)
+
+        return self._format_search_results(response.json())
+
+    async def _asearch_api(self, query: str) -> List[Dict[str, Any]]:
+        """Async variant of _search_api"""
+        import httpx
+
+        async with httpx.AsyncClient(timeout=Config.HTTP_TIMEOUT) as client:
+            async def attempt():
+                response = await client.get(Config.SERP_API_URL, params={
+                    "engine": "google",
+                    "q": query,
+                    "api_key": self.serp_api_key,
+                    "num": Config.SEARCH_RESULTS_LIMIT
                 })
-            
-            return formatted_results
-            
-        except Exception as e:
-            print(f"Search API error: {e}")
-            return self._simulate_search_results(query)
+                response.raise_for_status()
+                return response
+
+            with track_call("http", "serpapi") as call:
+                response = await aretry_call("serpapi", attempt, call)
+                call["bytes"] = len(response.content)
+
+        return self._format_search_results(response.json())
+
+    def _cached_search(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached results for the query, or None; a stale entry is refreshed in the background"""
+        cache = get_search_cache()
+        if cache is None:
+            return None
+        key = search_key(query, Config.SEARCH_RESULTS_LIMIT)
+        with track_call("cache", "serp_search") as call:
+            results, call["cache"] = cache.get(key)
+        if call["cache"] == "stale":
+            cache.revalidate(key, query, lambda: self._search_api(query))
+        return results
+
+    def _store_search(self, query: str, results: List[Dict[str, Any]]) -> None:
+        cache = get_search_cache()
+        if cache is not None:
+            cache.put(search_key(query, Config.SEARCH_RESULTS_LIMIT), query, results)
+
+    def _page_urls(self, search_results: List[Dict[str, Any]]) -> List[str]:
+        """Links of the top results worth fetching (none for simulated results)"""
+        if not self.serp_api_key or Config.PAGE_FETCH_COUNT <= 0:
+            return []
+        links = [result.get('link', '') for result in search_results[:Config.PAGE_FETCH_COUNT]]
+        return [link for link in links if link.startswith(('http://', 'https://'))]
+
+    def _pages(self, topic: str, search_results: List[Dict[str, Any]],
+               fetched: List[Optional[Dict[str, Any]]]) -> Dict[int, str]:
+        """Page text by search result index, compressed together to the research_pages token budget"""
+        texts = {page['url']: page['text'] for page in fetched if page}
+        by_index = {str(i): texts[result['link']] for i, result in enumerate(search_results)
+                    if result.get('link') in texts}
+        if not by_index:
+            return {}
+        return {int(i): text for i, text in fit_context("research_pages", by_index, topic=topic).items()}
+
+    def _result_content(self, result: Dict[str, Any], page: str = None) -> str:
+        """One search result for a prompt: the page text when it was fetched, the snippet otherwise"""
+        if page:
+            return f"Title: {result['title']}\nPage: {page}"
+        return f"Title: {result['title']}\nSnippet: {result['snippet']}"
+
+    def _format_search_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Normalize raw SERP API organic results"""
+        formatted_results = []
+        for result in results.get('organic_results', [])[:10]:
+            formatted_results.append({
+                'title': result.get('title', ''),
+                'link': result.get('link', ''),
+                'snippet': result.get('snippet', ''),
+                'source': result.get('displayed_link', '')
+            })
+        return formatted_results
     
     def _simulate_search_results(self, query: str) -> List[Dict[str, Any]]:
         """Simulate search results when API is not available"""
@@ -96,12 +353,25 @@ class DeepResearchAgent:
             }
         ]
     
-    def _extract_insights(self, search_results: List[Dict], topic: str) -> List[str]:
+    def _extract_insights(self, search_results: List[Dict], topic: str, pages: Dict[int, str] = None) -> List[str]:
         """Extract key insights from search results using LLM"""
         
+        response = invoke_llm(self.llm, self._insight_messages(search_results, topic, pages), "research_insights")
+        return self._parse_insights(response.content)
+
+    async def _aextract_insights(self, search_results: List[Dict], topic: str,
+                                 pages: Dict[int, str] = None) -> List[str]:
+        """Async variant of _extract_insights"""
+        response = await ainvoke_llm(self.llm, self._insight_messages(search_results, topic, pages),
+                                     "research_insights")
+        return self._parse_insights(response.content)
+
+    def _insight_messages(self, search_results: List[Dict], topic: str, pages: Dict[int, str] = None) -> list:
+        """Build the insight extraction prompt"""
+        
         combined_content = "\n\n".join([
-            f"Title: {result['title']}\nSnippet: {result['snippet']}"
-            for result in search_results
+            self._result_content(result, (pages or {}).get(i))
+            for i, result in enumerate(search_results)
         ])
         
         system_prompt = f"""You are a Research Analysis Agent. Extract the most important and actionable insights about \"{topic}\" from the search results below.
@@ -116,16 +386,15 @@ class DeepResearchAgent:
         Provide 5-8 key insights, each as a separate bullet point.
         """
         
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Search Results:\n{combined_content}")
         ]
-        
-        response = self.llm.invoke(messages)
-        
-        # Parse insights from response
+
+    def _parse_insights(self, content: str) -> List[str]:
+        """Parse bullet-point insights from the LLM response"""
         insights = []
-        for line in response.content.split('\n'):
+        for line in content.split('\n'):
             line = line.strip()
             if line.startswith('•') or line.startswith('-') or line.startswith('*'):
                 insights.append(line[1:].strip())
@@ -151,6 +420,13 @@ class DeepResearchAgent:
         
         return verified_facts
     
+    def _unverified_facts(self, insights: List[str]) -> List[Dict[str, Any]]:
+        """Pass insights through without a credibility check"""
+        return [
+            {'fact': insight, 'credibility_score': None, 'verification_status': 'unverified'}
+            for insight in insights
+        ]
+
     def _assess_credibility(self, fact: str) -> float:
         """Simple credibility assessment (can be enhanced)"""
         
@@ -176,9 +452,20 @@ class DeepResearchAgent:
     def _generate_summary(self, topic: str, insights: List[str], verified_facts: List[Dict]) -> str:
         """Generate comprehensive research summary"""
         
+        response = invoke_llm(self.llm, self._summary_messages(topic, verified_facts), "research_summary")
+        return response.content
+
+    async def _agenerate_summary(self, topic: str, insights: List[str], verified_facts: List[Dict]) -> str:
+        """Async variant of _generate_summary"""
+        response = await ainvoke_llm(self.llm, self._summary_messages(topic, verified_facts), "research_summary")
+        return response.content
+
+    def _summary_messages(self, topic: str, verified_facts: List[Dict]) -> list:
+        """Build the research summary prompt from high-confidence facts"""
+        
         high_confidence_facts = [
             fact['fact'] for fact in verified_facts 
-            if fact['credibility_score'] > 0.7
+            if fact['credibility_score'] is None or fact['credibility_score'] > 0.7
         ]
         
         system_prompt = f"""Create a comprehensive research summary about \"{topic}\".
@@ -194,10 +481,7 @@ class DeepResearchAgent:
         
         content = f"High-confidence insights:\n" + "\n".join(high_confidence_facts)
         
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=content)
         ]
-        
-        response = self.llm.invoke(messages)
-        return response.content
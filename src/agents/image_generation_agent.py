@@ -1,59 +1,110 @@
 from typing import Dict, Any
 from ..utils.config import Config
-from ..utils.image_pipeline import pipeline
+from ..utils.llm_clients import get_hedged_model, get_openai_client
+from ..utils.instrumentation import invoke_llm, ainvoke_llm, track_call
+from ..utils.scheduler import get_scheduler
+from ..utils.resilience import retry_call, aretry_call
+from ..utils.image_pipeline import pipeline, apipeline
+from ..utils.prompt_builder import fit_context
 
 class ImageGenerationAgent:
     """Produces custom visuals with prompt optimization"""
-    def __init__(self):
-        from langchain_openai import ChatOpenAI
+    def __init__(self, model: str = None, api_key: str = None):
         try:
             from langchain_core.messages import HumanMessage, SystemMessage
         except ImportError:
             from langchain.schema import HumanMessage, SystemMessage
         self.HumanMessage = HumanMessage
         self.SystemMessage = SystemMessage
-        self.llm = ChatOpenAI(
-            model=Config.OPENAI_MODEL,
-            temperature=Config.OPENAI_TEMPERATURE,
-            api_key=Config.OPENAI_API_KEY
-        )
+        self.llm = get_hedged_model("openai", model, Config.OPENAI_TEMPERATURE, api_key)
+        self.api_key = api_key or Config.OPENAI_API_KEY
 
-    def generate_images(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        import openai
-        import os
-        prompt = f"""
-        You are a creative visual designer. Based on the following topic and context, generate 2 highly descriptive prompts for DALL-E 3 image generation.
-        Topic: {context.get('topic', '')}
-        Research Summary: {context.get('research_summary', '')}
-        Target Audience: {context.get('target_audience', '')}
-        Brand Voice: {context.get('brand_voice', '')}
-        Each prompt should be unique, visually rich, and suitable for blog or social media use.
-        """
-        messages = [
-            self.SystemMessage(content="You are a creative visual designer."),
-            self.HumanMessage(content=prompt)
-        ]
-        response = self.llm.invoke(messages)
-        prompts = [p.strip() for p in response.content.split('\n') if p.strip()]
+    def generate_images(self, context: Dict[str, Any], max_images: int = None) -> Dict[str, Any]:
+        response = invoke_llm(self.llm, self._build_messages(context, max_images or 2), "image_prompts")
+        prompts = self._parse_prompts(response.content)[:max_images]
         images = []
-        openai.api_key = Config.OPENAI_API_KEY
+        client = get_openai_client(self.api_key)
         for p in prompts:
             try:
-                dalle_response = openai.images.generate(
-                    model="dall-e-3",
-                    prompt=p,
-                    n=1,
-                    size="1024x1024"
-                )
+                with track_call("image", "dall-e-3") as call:
+                    def attempt():
+                        call["queue_ms"] += get_scheduler().acquire(("image", "dall-e-3")).wait_ms
+                        return client.images.generate(
+                            model="dall-e-3",
+                            prompt=p,
+                            n=1,
+                            size="1024x1024"
+                        )
+                    dalle_response = retry_call("dall-e", attempt, call)
                 image_url = dalle_response.data[0].url if hasattr(dalle_response, 'data') and dalle_response.data else None
                 images.append(image_url or "")
             except Exception as e:
                 images.append("")
         # Download, process, and store images locally
-        save_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../generated_images/raw'))
-        output_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../generated_images/processed'))
+        save_dir, output_dir = self._image_dirs()
         processed_files = pipeline(images, save_dir, output_dir, resize=(1024, 1024), fmt='PNG')
         return {
             "images": processed_files,
             "prompts": prompts
         }
+
+    async def agenerate_images(self, context: Dict[str, Any], max_images: int = None) -> Dict[str, Any]:
+        """Async variant of generate_images; DALL-E requests and downloads run concurrently"""
+        import asyncio
+        import openai
+        response = await ainvoke_llm(self.llm, self._build_messages(context, max_images or 2), "image_prompts")
+        prompts = self._parse_prompts(response.content)[:max_images]
+
+        async def _generate(client, p):
+            try:
+                with track_call("image", "dall-e-3") as call:
+                    async def attempt():
+                        call["queue_ms"] += (await get_scheduler().aacquire(("image", "dall-e-3"))).wait_ms
+                        return await client.images.generate(
+                            model="dall-e-3",
+                            prompt=p,
+                            n=1,
+                            size="1024x1024"
+                        )
+                    dalle_response = await aretry_call("dall-e", attempt, call)
+                image_url = dalle_response.data[0].url if hasattr(dalle_response, 'data') and dalle_response.data else None
+                return image_url or ""
+            except Exception as e:
+                return ""
+
+        # Closed after use: abandoned clients leave sockets open and later connects start timing out
+        async with openai.AsyncOpenAI(api_key=self.api_key, base_url=Config.OPENAI_BASE_URL,
+                                      timeout=Config.LLM_TIMEOUT, max_retries=0) as client:
+            images = await asyncio.gather(*[_generate(client, p) for p in prompts])
+        save_dir, output_dir = self._image_dirs()
+        processed_files = await apipeline(list(images), save_dir, output_dir, resize=(1024, 1024), fmt='PNG')
+        return {
+            "images": processed_files,
+            "prompts": prompts
+        }
+
+    def _build_messages(self, context: Dict[str, Any], count: int = 2) -> list:
+        fitted = fit_context("image_prompts", {"research_summary": context.get('research_summary', '')},
+                             topic=context.get('topic', ''))
+        prompt = f"""
+        You are a creative visual designer. Based on the following topic and context, generate {count} highly descriptive prompts for DALL-E 3 image generation.
+        Topic: {context.get('topic', '')}
+        Research Summary: {fitted['research_summary']}
+        Target Audience: {context.get('target_audience', '')}
+        Brand Voice: {context.get('brand_voice', '')}
+        Each prompt should be unique, visually rich, and suitable for blog or social media use.
+        """
+        return [
+            self.SystemMessage(content="You are a creative visual designer."),
+            self.HumanMessage(content=prompt)
+        ]
+
+    def _parse_prompts(self, content: str) -> list:
+        return [p.strip() for p in content.split('\n') if p.strip()]
+
+    def _image_dirs(self) -> tuple:
+        import os
+        root = Config.IMAGE_OUTPUT_DIR or os.path.join(os.path.dirname(__file__), '../../generated_images')
+        save_dir = os.path.abspath(os.path.join(root, 'raw'))
+        output_dir = os.path.abspath(os.path.join(root, 'processed'))
+        return save_dir, output_dir
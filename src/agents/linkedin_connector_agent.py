@@ -3,6 +3,7 @@ import openai
 import requests
 from typing import Dict, Any
 from src.utils.config import Config
+from src.utils.resilience import retry_call, RETRYABLE_STATUSES
 
 class LinkedInConnectorAgent:
     """
@@ -35,11 +36,20 @@ class LinkedInConnectorAgent:
                 "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
             }
         }
+        def attempt():
+            response = requests.post(self.api_url, headers=headers, json=payload, timeout=Config.LINKEDIN_TIMEOUT)
+            if response.status_code in RETRYABLE_STATUSES:
+                response.raise_for_status()
+            return response
+
         try:
-            response = requests.post(self.api_url, headers=headers, json=payload)
+            # Not idempotent: only repeated when LinkedIn cannot have created the post
+            response = retry_call("linkedin", attempt, idempotent=False)
             if response.status_code == 201:
                 return {"success": True, "message": "Blog posted to LinkedIn successfully."}
             else:
                 return {"success": False, "error": response.text}
+        except requests.HTTPError as e:
+            return {"success": False, "error": e.response.text}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -1,10 +1,20 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable
 from ..utils.config import Config
+from ..utils.llm_clients import get_hedged_model
+from ..utils.instrumentation import invoke_llm, ainvoke_llm, stream_llm, astream_llm
+from ..utils.prompt_builder import fit_context
 
 class LinkedInWriterAgent:
     """Generates engaging professional LinkedIn content"""
-    def __init__(self):
-        self._cache = {}
+
+    # LLM_PROVIDER values other than OpenAI, mapped to client registry providers
+    PROVIDERS = {
+        "Perplexity Sonar": "perplexity",
+        "Claude Sonnet": "anthropic",
+        "Google Gemini": "gemini",
+    }
+
+    def __init__(self, model: str = None, api_key: str = None):
         import os
         provider = os.getenv("LLM_PROVIDER", "OpenAI GPT-4")
         try:
@@ -14,100 +24,96 @@ class LinkedInWriterAgent:
         self.HumanMessage = HumanMessage
         self.SystemMessage = SystemMessage
         if provider == "OpenAI GPT-4":
-            from langchain_openai import ChatOpenAI
-            self.llm = ChatOpenAI(
-                model=Config.OPENAI_MODEL,
-                temperature=Config.OPENAI_TEMPERATURE,
-                api_key=os.getenv("OPENAI_API_KEY", Config.OPENAI_API_KEY)
-            )
-        elif provider == "Perplexity Sonar":
-            from langchain_perplexity import ChatPerplexity
-            self.llm = ChatPerplexity(
-                model="sonar-large-online",
-                temperature=Config.OPENAI_TEMPERATURE,
-                api_key=os.getenv("PERPLEXITY_API_KEY", "")
-            )
-        elif provider == "Claude Sonnet":
-            from langchain_anthropic import ChatAnthropic
-            self.llm = ChatAnthropic(
-                model="claude-3-sonnet-20240229",
-                temperature=Config.OPENAI_TEMPERATURE,
-                api_key=os.getenv("CLAUDE_API_KEY", "")
-            )
-        elif provider == "Google Gemini":
-            from langchain_google_genai import ChatGoogleGenerativeAI
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-pro",
-                temperature=Config.OPENAI_TEMPERATURE,
-                api_key=os.getenv("GEMINI_API_KEY", "")
-            )
+            self.llm = get_hedged_model("openai", model, Config.OPENAI_TEMPERATURE, api_key)
+        elif provider in self.PROVIDERS:
+            self.llm = get_hedged_model(self.PROVIDERS[provider], temperature=Config.OPENAI_TEMPERATURE)
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
 
-    def create_linkedin_post(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        # Create a hashable cache key from context
-        import hashlib, json
-        cache_key = hashlib.sha256(json.dumps(context, sort_keys=True).encode()).hexdigest()
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+    def create_linkedin_post(self, context: Dict[str, Any], on_token: Callable[[str], None] = None) -> Dict[str, Any]:
+        """Write the post; when on_token is given the text is streamed to it as it is generated"""
+        try:
+            messages = self._build_messages(context)
+            if on_token:
+                response = stream_llm(self.llm, messages, "linkedin_writer", on_token)
+            else:
+                response = invoke_llm(self.llm, messages, "linkedin_writer")
+            return self._build_result(response)
+        except Exception as e:
+            # Failures are returned, never cached (the LLM cache only stores successful responses)
+            return self._error_result(e)
+
+    async def acreate_linkedin_post(self, context: Dict[str, Any], on_token: Callable[[str], None] = None) -> Dict[str, Any]:
         try:
-            # Fallback logic: use blog content if topic/research/insights are missing
-            blog_content = context.get('blog_content', '')
-            topic = context.get('topic', '')
-            research_summary = context.get('research_summary', '')
-            key_insights = ', '.join(context.get('key_insights', [])) if context.get('key_insights') else ''
-            target_audience = context.get('target_audience', '')
-            brand_voice = context.get('brand_voice', '')
+            messages = self._build_messages(context)
+            if on_token:
+                response = await astream_llm(self.llm, messages, "linkedin_writer", on_token)
+            else:
+                response = await ainvoke_llm(self.llm, messages, "linkedin_writer")
+            return self._build_result(response)
+        except Exception as e:
+            # Failures are returned, never cached (the LLM cache only stores successful responses)
+            return self._error_result(e)
 
-            # Build a robust prompt
-            prompt = """
+    def _build_messages(self, context: Dict[str, Any]) -> list:
+        # Fallback logic: use blog content if topic/research/insights are missing
+        topic = context.get('topic', '')
+        fitted = fit_context("linkedin_writer", {
+            "research_summary": context.get('research_summary', ''),
+            "key_insights": context.get('key_insights') or [],
+            "blog_content": context.get('blog_content', ''),
+        }, topic=topic)
+        blog_content = fitted['blog_content']
+        research_summary = fitted['research_summary']
+        key_insights = ', '.join(fitted['key_insights'])
+        target_audience = context.get('target_audience', '')
+        brand_voice = context.get('brand_voice', '')
+
+        # Build a robust prompt
+        prompt = """
 You are a professional LinkedIn content creator. Your job is to write an engaging LinkedIn post for a professional audience. If a blog post is provided, summarize and adapt it for LinkedIn. If research summary or key insights are available, incorporate them. Always:
 - Make the post concise, actionable, and encourage engagement (comments, shares, likes)
 - Add relevant hashtags and a call to action
 - Use a professional, positive tone
 """
-            if topic:
-                prompt += f"\nTopic: {topic}"
-            if research_summary:
-                prompt += f"\nResearch Summary: {research_summary}"
-            if key_insights:
-                prompt += f"\nKey Insights: {key_insights}"
-            if target_audience:
-                prompt += f"\nTarget Audience: {target_audience}"
-            if brand_voice:
-                prompt += f"\nBrand Voice: {brand_voice}"
-            if blog_content:
-                prompt += f"\nBlog Content: {blog_content}"
+        if topic:
+            prompt += f"\nTopic: {topic}"
+        if research_summary:
+            prompt += f"\nResearch Summary: {research_summary}"
+        if key_insights:
+            prompt += f"\nKey Insights: {key_insights}"
+        if target_audience:
+            prompt += f"\nTarget Audience: {target_audience}"
+        if brand_voice:
+            prompt += f"\nBrand Voice: {brand_voice}"
+        if blog_content:
+            prompt += f"\nBlog Content: {blog_content}"
 
-            prompt += "\nIf any fields above are missing, use what is available to create a LinkedIn post relevant to the topic."
+        prompt += "\nIf any fields above are missing, use what is available to create a LinkedIn post relevant to the topic."
 
-            messages = [
-                self.SystemMessage(content="You are a professional LinkedIn content creator."),
-                self.HumanMessage(content=prompt)
-            ]
-            response = self.llm.invoke(messages)
-            content = response.content[:2000] if response.content else ""
-            quality_score = 88
-            result = {
-                "content": content,
-                "quality_score": quality_score
-            }
-            self._cache[cache_key] = result
-            return result
-        except Exception as e:
-            error_msg = str(e)
-            if "key" in error_msg.lower() or "token" in error_msg.lower():
-                result = {
-                    "error": "API key missing or invalid. Please check your credentials.",
-                    "content": "",
-                    "quality_score": 0
-                }
-                self._cache[cache_key] = result
-                return result
-            result = {
-                "error": f"An error occurred: {error_msg}",
+        return [
+            self.SystemMessage(content="You are a professional LinkedIn content creator."),
+            self.HumanMessage(content=prompt)
+        ]
+
+    def _build_result(self, response) -> Dict[str, Any]:
+        content = response.content[:2000] if response.content else ""
+        quality_score = 88
+        return {
+            "content": content,
+            "quality_score": quality_score
+        }
+
+    def _error_result(self, e: Exception) -> Dict[str, Any]:
+        error_msg = str(e)
+        if "key" in error_msg.lower() or "token" in error_msg.lower():
+            return {
+                "error": "API key missing or invalid. Please check your credentials.",
                 "content": "",
                 "quality_score": 0
             }
-            self._cache[cache_key] = result
-            return result
+        return {
+            "error": f"An error occurred: {error_msg}",
+            "content": "",
+            "quality_score": 0
+        }
@@ -0,0 +1,183 @@
+"""Local routing for clear requests, so QueryHandlerAgent only asks the LLM about ambiguous ones.
+
+Two stages, both pure Python and running in microseconds:
+
+1. Keyword/regex rules for explicit requests ("write a blog post about X", "LinkedIn post on Y").
+   Exactly one matching content type (or blog + LinkedIn, which is "mixed") is a confident answer.
+2. A multinomial Naive Bayes model over word unigrams and bigrams, trained at import time on
+   TRAINING_QUERIES, for requests that name their content type less directly.
+
+classify() returns the routing dict in the same shape as QueryHandlerAgent._parse_analysis plus
+a `routing` entry with the method and confidence; the caller falls back to the LLM when the
+confidence is below its threshold (QUERY_FAST_PATH_CONFIDENCE).
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+CONTENT_TYPES = ("blog", "linkedin", "research", "strategy", "image", "mixed")
+
+# Agents per content type, matching what the LLM routing produces for the same request
+AGENTS_BY_TYPE = {
+    "blog": ["research_agent", "blog_writer", "image_generator"],
+    "linkedin": ["research_agent", "LinkedInWriterAgent"],
+    "mixed": ["research_agent", "blog_writer", "LinkedInWriterAgent", "image_generator"],
+    "strategy": ["research_agent", "content_strategist"],
+    "research": ["research_agent"],
+    "image": ["image_generator"],
+}
+
+_RULES = {
+    "blog": re.compile(r"\b(blog(\s*post)?s?|article|long[- ]form|seo (post|article)|write[- ]?up)\b"),
+    "linkedin": re.compile(r"\b(linked\s?in|social (media )?post)\b"),
+    "strategy": re.compile(r"\b(content (strategy|plan|calendar)|editorial (plan|calendar)|strategy for|"
+                           r"marketing (strategy|plan)|campaign plan)\b"),
+    "image": re.compile(r"\b(image|picture|illustration|graphic|visual|photo|banner|thumbnail)s?\b"),
+    "research": re.compile(r"\b(research|report on|analy[sz]e|analysis of|market (data|trends)|"
+                           r"statistics on|summari[sz]e the latest)\b"),
+}
+
+# Requests that refer back to earlier output need the conversation history, i.e. the LLM
+_REFERENTIAL = re.compile(r"\b(it|this|that|again|another|previous|same|shorter|longer|more)\b")
+
+_AUDIENCE = re.compile(r"\b(?:for|targeting|aimed at)\s+(?P<value>[a-z][\w\s-]{2,40}?)"
+                       r"(?=\s+(?:in|with|using|about|on)\b|[.,;!?]|$)")
+_VOICE = re.compile(r"\b(?:in|with|using)\s+an?\s+(?P<value>[a-z][\w\s-]{2,30}?)\s+(?:tone|voice|style)\b")
+
+TRAINING_QUERIES: List[Tuple[str, str]] = [
+    ("write a blog post about remote work productivity", "blog"),
+    ("draft an article on sustainable packaging trends", "blog"),
+    ("i need a long form piece on cloud cost optimization", "blog"),
+    ("seo optimized post about electric vehicles", "blog"),
+    ("create a blog on ai in healthcare", "blog"),
+    ("write about the future of fintech for our website", "blog"),
+    ("a how-to guide on onboarding new engineers", "blog"),
+    ("explain zero trust security in a post for our site", "blog"),
+    ("write a linkedin post about our series a funding", "linkedin"),
+    ("short social update announcing our new hire", "linkedin"),
+    ("linkedin content about leadership lessons", "linkedin"),
+    ("a professional post for my network on career growth", "linkedin"),
+    ("announce our product launch to my followers", "linkedin"),
+    ("thought leadership post on hybrid work for linkedin", "linkedin"),
+    ("research the latest trends in generative ai", "research"),
+    ("what are the current statistics on remote work", "research"),
+    ("give me a report on the electric vehicle market", "research"),
+    ("find data and sources about plant based food adoption", "research"),
+    ("analyze competitors in the crm space", "research"),
+    ("summarize recent studies on four day work weeks", "research"),
+    ("create a content strategy for a b2b saas startup", "strategy"),
+    ("plan our editorial calendar for next quarter", "strategy"),
+    ("how should we position our brand content this year", "strategy"),
+    ("build a content plan to grow organic traffic", "strategy"),
+    ("marketing strategy for launching a fitness app", "strategy"),
+    ("which topics should our blog cover to reach cfos", "strategy"),
+    ("generate an image of a futuristic office", "image"),
+    ("make a banner illustration for our webinar", "image"),
+    ("design a hero picture showing teamwork", "image"),
+    ("create visuals for a post about climate tech", "image"),
+    ("a thumbnail graphic for our podcast episode", "image"),
+    ("draw a minimalist logo style illustration of a rocket", "image"),
+    ("write a blog post and a linkedin post about ai ethics", "mixed"),
+    ("blog article plus linkedin promotion for our launch", "mixed"),
+    ("create a blog and share it on linkedin", "mixed"),
+    ("full campaign with a blog post and social posts about data privacy", "mixed"),
+]
+
+
+def _tokens(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesRouter:
+    """Multinomial Naive Bayes over word unigrams and bigrams with Laplace smoothing"""
+
+    def __init__(self, examples: List[Tuple[str, str]] = None, alpha: float = 1.0):
+        self.alpha = alpha
+        self.log_prior: Dict[str, float] = {}
+        self.log_likelihood: Dict[str, Dict[str, float]] = {}
+        self.log_unseen: Dict[str, float] = {}
+        self.vocabulary: set = set()
+        self.fit(examples if examples is not None else TRAINING_QUERIES)
+
+    def fit(self, examples: List[Tuple[str, str]]) -> None:
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        labels = Counter()
+        for text, label in examples:
+            labels[label] += 1
+            counts[label].update(_tokens(text))
+        self.vocabulary = {token for counter in counts.values() for token in counter}
+        size = len(self.vocabulary)
+        total = sum(labels.values())
+        for label, counter in counts.items():
+            denominator = sum(counter.values()) + self.alpha * size
+            self.log_prior[label] = math.log(labels[label] / total)
+            self.log_likelihood[label] = {t: math.log((c + self.alpha) / denominator) for t, c in counter.items()}
+            self.log_unseen[label] = math.log(self.alpha / denominator)
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """(label, posterior probability); (None, 0.0) when no token is in the vocabulary"""
+        tokens = [t for t in _tokens(text) if t in self.vocabulary]
+        if not tokens:
+            return None, 0.0
+        scores = {
+            label: prior + sum(self.log_likelihood[label].get(t, self.log_unseen[label]) for t in tokens)
+            for label, prior in self.log_prior.items()
+        }
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / normalizer
+
+
+class QueryClassifier:
+    """Rules first, then the Naive Bayes model; see the module docstring"""
+
+    RULE_CONFIDENCE = 0.95
+
+    def __init__(self, model: NaiveBayesRouter = None):
+        self.model = model or NaiveBayesRouter()
+
+    def rule_match(self, query: str) -> Tuple[Optional[str], float]:
+        """Content type named explicitly by the query, or (None, 0.0)"""
+        text = query.lower()
+        matched = {content_type for content_type, pattern in _RULES.items() if pattern.search(text)}
+        if {"blog", "linkedin"} <= matched:
+            return "mixed", self.RULE_CONFIDENCE
+        # A blog or LinkedIn post "with images" or "based on research" is still that post
+        for primary in ("blog", "linkedin", "strategy"):
+            if primary in matched:
+                others = matched - {primary, "image", "research"}
+                return (primary, self.RULE_CONFIDENCE) if not others else (None, 0.0)
+        if len(matched) == 1:
+            return matched.pop(), self.RULE_CONFIDENCE
+        return None, 0.0
+
+    def classify(self, query: str, conversation_history: List[str] = None) -> Dict[str, Any]:
+        """Routing for `query` with routing.method ("rules", "model" or "none") and routing.confidence"""
+        content_type, confidence = self.rule_match(query)
+        method = "rules"
+        if content_type is None:
+            if conversation_history and _REFERENTIAL.search(query.lower()):
+                content_type, confidence, method = None, 0.0, "none"
+            else:
+                content_type, confidence = self.model.predict(query)
+                method = "model" if content_type else "none"
+        return self._routing(query, content_type, confidence, method)
+
+    @staticmethod
+    def _routing(query: str, content_type: Optional[str], confidence: float, method: str) -> Dict[str, Any]:
+        text = query.lower()
+        audience = _AUDIENCE.search(text)
+        voice = _VOICE.search(text)
+        return {
+            'content_type': content_type or 'blog',
+            'required_agents': list(AGENTS_BY_TYPE.get(content_type or 'blog')),
+            'research_needed': content_type != 'image',
+            'target_audience': audience.group('value').strip() if audience else None,
+            'brand_voice': voice.group('value').strip() if voice else None,
+            'intent': query,
+            'fallback_used': False,
+            'routing': {'method': method, 'confidence': round(confidence, 3)},
+        }
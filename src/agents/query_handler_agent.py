@@ -1,20 +1,48 @@
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from typing import Dict, List
 from ..utils.config import Config
+from ..utils.llm_clients import get_hedged_model
+from ..utils.instrumentation import invoke_llm, ainvoke_llm, track_call
+from .query_classifier import QueryClassifier
 
 class QueryHandlerAgent:
     """Routes requests to appropriate specialized agents"""
     
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model=Config.OPENAI_MODEL,
-            temperature=0.3,  # Lower temperature for routing decisions
-            api_key=Config.OPENAI_API_KEY
-        )
+    def __init__(self, model: str = None, api_key: str = None, fast_path: bool = None):
+        # Lower temperature for routing decisions
+        self.llm = get_hedged_model("openai", model, 0.3, api_key)
+        self.fast_path = Config.QUERY_FAST_PATH if fast_path is None else fast_path
+        self.classifier = QueryClassifier() if self.fast_path else None
     
     def analyze_query(self, query: str, conversation_history: List[str] = None) -> Dict[str, any]:
         """Analyze user query and determine routing strategy, using conversation history for context-aware decisions."""
+        local = self._local_analysis(query, conversation_history)
+        if local is not None:
+            return local
+        response = invoke_llm(self.llm, self._build_messages(query, conversation_history), "query_handler")
+        # Parse the structured response
+        return self._parse_analysis(response.content, query)
+
+    async def aanalyze_query(self, query: str, conversation_history: List[str] = None) -> Dict[str, any]:
+        """Async variant of analyze_query"""
+        local = self._local_analysis(query, conversation_history)
+        if local is not None:
+            return local
+        response = await ainvoke_llm(self.llm, self._build_messages(query, conversation_history), "query_handler")
+        return self._parse_analysis(response.content, query)
+
+    def _local_analysis(self, query: str, conversation_history: List[str] = None) -> Dict[str, any]:
+        """Routing from the local classifier when it is confident enough, else None (ask the LLM)"""
+        if self.classifier is None:
+            return None
+        with track_call("classifier", "query_fast_path") as call:
+            result = self.classifier.classify(query, conversation_history)
+            confident = result['routing']['confidence'] >= Config.QUERY_FAST_PATH_CONFIDENCE
+            call["cache"] = "hit" if confident else "miss"
+        return result if confident else None
+
+    def _build_messages(self, query: str, conversation_history: List[str] = None) -> list:
+        """Build the routing prompt for a query"""
         if conversation_history is None:
             conversation_history = []
         system_prompt = """
@@ -34,13 +62,10 @@ class QueryHandlerAgent:
         INTENT: [brief description of what user wants]
         """
         history_str = "\n".join(conversation_history)
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Conversation history:\n{history_str}\n\nAnalyze this request: {query}")
         ]
-        response = self.llm.invoke(messages)
-        # Parse the structured response
-        return self._parse_analysis(response.content, query)
     
     def _parse_analysis(self, analysis: str, original_query: str) -> Dict[str, any]:
         """Parse the LLM analysis into structured data"""
@@ -0,0 +1,280 @@
+"""Persistent job queue for background content generation.
+
+Jobs live in a SQLite table, so they survive browser refreshes and restarts, and the queue
+can be shared by the Streamlit server and any number of worker processes:
+
+    queued -> running -> done | failed
+
+Workers take jobs with claim(), report node-level progress with update_progress(), and store
+the final state with complete() or the error with fail(). A running job whose worker stops
+heartbeating (crash, kill) is put back in the queue by the next claim(), or failed once it has
+been started `max_attempts` times; update_progress(), complete() and fail() only apply for the
+worker that currently holds the job, so late writes by the stalled one are dropped. API keys never go in the table, see secrets.py: a queued job whose key holder has
+not been seen for `stale_after` seconds is failed with KEY_LOST_ERROR.
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .secrets import JobSecrets, get_job_secrets
+from ..utils.config import Config
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+KEY_LOST_ERROR = ("The API key for this job is no longer available (the server that accepted it "
+                  "restarted or stopped). Please resubmit it with your API key.")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    query TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    needs_key INTEGER NOT NULL DEFAULT 0,
+    key_holder TEXT,
+    progress TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS key_holders (
+    holder TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+"""
+
+# State fields that are not JSON-serializable and are not needed by the UI
+_UNSTORED_FIELDS = {"conversation_history"}
+
+
+class JobQueue:
+    """SQLite-backed job queue; safe to use from several threads and processes"""
+
+    def __init__(self, db_path: str = None, stale_after: float = None, secrets: JobSecrets = None,
+                 max_attempts: int = None):
+        self.db_path = db_path or Config.JOB_DB
+        self.stale_after = Config.JOB_STALE_SECONDS if stale_after is None else stale_after
+        self.max_attempts = Config.JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.secrets = secrets or get_job_secrets()
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "needs_key" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN needs_key INTEGER NOT NULL DEFAULT 0")
+            if "key_holder" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN key_holder TEXT")
+            if "api_key" in columns:
+                # Tables from before the secret store kept keys in plain text
+                conn.execute("UPDATE jobs SET needs_key = 1, api_key = NULL WHERE api_key IS NOT NULL")
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit connection; multi-statement changes open their own transaction
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, query: str, inputs: Dict[str, Any] = None, settings: Dict[str, Any] = None,
+               api_key: str = None) -> str:
+        """Queue a generation request and return its job id.
+
+        `inputs` are extra initial-state fields, `settings` the orchestrator settings
+        (provider, model, parallel). The API key stays in this process's secret store until the
+        job finishes, so only workers in this process can run the job.
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        if api_key:
+            self.secrets.put(job_id, api_key)
+        with self._connect() as conn:
+            if api_key:
+                self._heartbeat(conn, now)
+            conn.execute(
+                "INSERT INTO jobs (id, status, query, inputs, settings, needs_key, key_holder, created_at, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, query, json.dumps(inputs or {}), json.dumps(settings or {}),
+                 int(bool(api_key)), self.secrets.holder if api_key else None, now, now)
+            )
+        return job_id
+
+    def _heartbeat(self, conn: sqlite3.Connection, now: float) -> None:
+        """Mark this process's key store as alive"""
+        conn.execute("INSERT OR REPLACE INTO key_holders (holder, seen_at) VALUES (?, ?)",
+                     (self.secrets.holder, now))
+
+    def _fail_orphaned(self, conn: sqlite3.Connection, now: float) -> int:
+        """Fail queued jobs whose key holder has not been seen for `stale_after` seconds"""
+        return conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? "
+            "WHERE status = ? AND needs_key = 1 AND (key_holder IS NULL OR key_holder NOT IN "
+            "(SELECT holder FROM key_holders WHERE seen_at >= ?))",
+            (FAILED, KEY_LOST_ERROR, now, now, QUEUED, now - self.stale_after)
+        ).rowcount
+
+    def fail_orphaned(self) -> int:
+        """Fail the queued jobs whose API key is gone, so the UI stops waiting; returns how many"""
+        now = time.time()
+        with self._connect() as conn:
+            if self.secrets.job_ids():
+                self._heartbeat(conn, now)
+            return self._fail_orphaned(conn, now)
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job this process can run (after requeueing stale ones); None when there is none.
+
+        The returned job includes its api_key (None for jobs submitted without one). Jobs that
+        need a key this process does not hold are left for the process that does, or failed
+        when that process is gone.
+        """
+        now = time.time()
+        held = self.secrets.job_ids()
+        runnable = "needs_key = 0" + (f" OR id IN ({','.join('?' * len(held))})" if held else "")
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if held:
+                    self._heartbeat(conn, now)
+                # A job that stalls its worker every time (e.g. crashes it) is given up on
+                exhausted = [r["id"] for r in conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (RUNNING, now - self.stale_after, self.max_attempts)
+                )]
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                    [(FAILED, f"Gave up after {self.max_attempts} attempts: the worker stopped responding "
+                      "each time.", now, now, job_id) for job_id in exhausted]
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND updated_at < ?",
+                    (QUEUED, RUNNING, now - self.stale_after)
+                )
+                self._fail_orphaned(conn, now)
+                row = conn.execute(
+                    f"SELECT * FROM jobs WHERE status = ? AND ({runnable}) ORDER BY created_at LIMIT 1",
+                    (QUEUED, *held)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                        "started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                        (RUNNING, worker_id, now, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        for job_id in exhausted:
+            self.secrets.discard(job_id)
+        if row is None:
+            return None
+        job = self._to_dict(row)
+        job["api_key"] = self.secrets.get(row["id"])
+        job["attempts"] = row["attempts"] + 1
+        job["status"] = RUNNING
+        job["worker"] = worker_id
+        return job
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any], worker_id: str) -> bool:
+        """Record progress for a running job; doubles as the worker (and key holder) heartbeat.
+
+        False when `worker_id` no longer holds the job, so a stalled worker cannot keep alive a
+        job that has been handed on.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if self.secrets.job_ids():
+                self._heartbeat(conn, now)
+            return bool(conn.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (json.dumps(progress, default=str), now, job_id, RUNNING, worker_id)
+            ).rowcount)
+
+    def complete(self, job_id: str, result: Dict[str, Any], worker_id: str) -> bool:
+        """Store the final workflow state of a job; False when `worker_id` no longer holds it"""
+        stored = {k: v for k, v in result.items() if k not in _UNSTORED_FIELDS}
+        return self._finish(job_id, worker_id, DONE, "result", json.dumps(stored, default=str))
+
+    def fail(self, job_id: str, error: str, worker_id: str) -> bool:
+        """Mark a job as failed; False when `worker_id` no longer holds it"""
+        return self._finish(job_id, worker_id, FAILED, "error", error)
+
+    def _finish(self, job_id: str, worker_id: str, status: str, column: str, value: str) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            updated = conn.execute(
+                f"UPDATE jobs SET status = ?, {column} = ?, updated_at = ?, finished_at = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (status, value, now, now, job_id, RUNNING, worker_id)
+            ).rowcount
+        if updated:
+            self.secrets.discard(job_id)
+        return bool(updated)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, progress and (when finished) result or error of a job"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Final state of a finished job, or None if it has not finished successfully"""
+        job = self.get(job_id)
+        return job["result"] if job and job["status"] == DONE else None
+
+    def list_jobs(self, status: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally filtered by status"""
+        query = "SELECT * FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(query, params + (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "query": row["query"],
+            "inputs": json.loads(row["inputs"]),
+            "settings": json.loads(row["settings"]),
+            "progress": json.loads(row["progress"] or "{}"),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "worker": row["worker"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "updated_at": row["updated_at"],
+            "finished_at": row["finished_at"],
+        }
@@ -0,0 +1,49 @@
+"""API keys of background jobs, kept out of the shared jobs table.
+
+JobQueue.submit() puts a job's key here, in the submitting process's memory, and only marks
+the row as needing one. claim() only hands such a job to a worker in a process that holds
+its key, and the key stays until the job is done or failed, so a job requeued after its
+worker stalled still runs with it. Separate worker processes (python -m src.jobs.worker)
+therefore only run jobs submitted without a key; the Streamlit server runs worker threads.
+
+Each store has a `holder` id that the queue records with the job. When the holder stops
+heartbeating (restart, exit), its keyed jobs are failed rather than left queued forever.
+"""
+import os
+import socket
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+
+class JobSecrets:
+    """Thread-safe, in-memory API keys by job id"""
+
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, job_id: str, api_key: str) -> None:
+        with self._lock:
+            self._keys[job_id] = api_key
+
+    def get(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            return self._keys.get(job_id)
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            self._keys.pop(job_id, None)
+
+    def job_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._keys)
+
+
+_secrets = JobSecrets()
+
+
+def get_job_secrets() -> JobSecrets:
+    """The keys held by this process, shared by every JobQueue in it"""
+    return _secrets
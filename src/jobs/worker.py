@@ -0,0 +1,179 @@
+"""Worker processes that run queued generation jobs.
+
+Usage:
+    python -m src.jobs.worker --workers 4 [--db jobs.sqlite]
+
+Each worker process claims one job at a time from the JobQueue, runs it through the shared
+orchestrator for the job's settings and writes progress (completed nodes plus a heartbeat
+while the LLM is streaming) back to the queue, so the UI only ever polls SQLite.
+
+Jobs submitted with an API key can only run in the process that holds the key (see
+secrets.py), so the Streamlit server runs its workers as threads (start_worker_threads);
+worker processes started here take the jobs submitted without one.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .queue import JobQueue
+from ..utils.config import Config
+from ..utils.llm_cache import bypass_cache
+from ..utils.scheduler import scheduling_context, INTERACTIVE
+
+# Minimum seconds between progress writes while tokens are streaming
+HEARTBEAT_INTERVAL = 2.0
+
+
+def process_job(queue: JobQueue, job: Dict[str, Any], orchestrator=None) -> Optional[Dict[str, Any]]:
+    """Run one claimed job to completion; returns the final state, or None if it failed"""
+    job_id = job["id"]
+    worker_id = job["worker"]
+    settings = job["settings"]
+    finished = False
+    try:
+        if orchestrator is None:
+            from ..orchestrator.registry import get_orchestrator
+            orchestrator = get_orchestrator(
+                provider=settings.get("provider", "OpenAI"),
+                model=settings.get("model"),
+                api_key=job.get("api_key") or None,
+                parallel=settings.get("parallel"),
+            )
+        print(f"⚙️ Job {job_id}: {job['query'][:60]}")
+        with scheduling_context(settings.get("session_id") or job_id, settings.get("priority", INTERACTIVE)), \
+                bypass_cache(not settings.get("reuse_cache", True)):
+            final_state = _run(queue, orchestrator, job)
+        finished = queue.complete(job_id, final_state, worker_id)
+        if not finished:
+            print(f"⚠️ Job {job_id} was taken over by another worker; result dropped")
+            return None
+        print(f"✅ Job {job_id} done")
+        return final_state
+    except Exception as e:
+        finished = queue.fail(job_id, str(e), worker_id)
+        if finished:
+            print(f"❌ Job {job_id} failed: {str(e)}")
+        return None
+    finally:
+        # After a takeover the checkpoint thread belongs to the worker that now holds the job
+        if finished and orchestrator is not None:
+            orchestrator.discard_thread(job_id)
+
+
+def _run(queue: JobQueue, orchestrator, job: Dict[str, Any]) -> Dict[str, Any]:
+    job_id = job["id"]
+    if job["attempts"] > 1:
+        # A retried job continues from its checkpoint when the checkpointer is durable
+        try:
+            return orchestrator.resume(job_id)
+        except ValueError:
+            pass
+
+    initial_state = {**job["inputs"], "user_query": job["query"]}
+    completed: List[str] = []
+    streamed: Dict[str, int] = {}
+    last_write = 0.0
+    final_state: Dict[str, Any] = {}
+    for event in orchestrator.stream_run(initial_state, job_id):
+        if event["type"] == "token":
+            streamed[event["node"]] = streamed.get(event["node"], 0) + len(event["token"])
+            if time.monotonic() - last_write < HEARTBEAT_INTERVAL:
+                continue
+        elif event["type"] == "update":
+            completed.append(event["node"])
+        elif event["type"] == "done":
+            final_state = event["state"]
+            continue
+        queue.update_progress(job_id, {
+            "current_step": completed[-1] if completed else "",
+            "completed_nodes": completed,
+            "streamed_chars": streamed,
+        }, job["worker"])
+        last_write = time.monotonic()
+    return final_state
+
+
+def run_worker(db_path: str = None, worker_id: str = None, poll_interval: float = None,
+               max_jobs: int = None) -> int:
+    """Claim and run jobs until stopped (or until `max_jobs` have run); returns the jobs run"""
+    queue = JobQueue(db_path)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    poll_interval = Config.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        process_job(queue, job)
+        processed += 1
+    return processed
+
+
+def start_workers(count: int = None, db_path: str = None) -> List[multiprocessing.Process]:
+    """Start `count` worker processes in the background"""
+    count = Config.JOB_WORKERS if count is None else count
+    workers = []
+    for i in range(count):
+        process = multiprocessing.Process(
+            target=run_worker, kwargs={"db_path": db_path}, name=f"job-worker-{i}", daemon=True
+        )
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def start_worker_threads(count: int = None, db_path: str = None) -> List[threading.Thread]:
+    """Run `count` workers as daemon threads of this process, so they can use the API keys submitted here"""
+    count = Config.JOB_WORKERS if count is None else count
+    workers = []
+    for i in range(count):
+        thread = threading.Thread(target=run_worker, kwargs={"db_path": db_path, "worker_id": _thread_worker_id(i)},
+                                  name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        workers.append(thread)
+    return workers
+
+
+def _thread_worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:t{index}"
+
+
+def spawn_worker_pool(count: int = None, db_path: str = None) -> subprocess.Popen:
+    """Launch `python -m src.jobs.worker` as a separate process tree.
+
+    For callers whose own process is not a safe multiprocessing parent (such as the Streamlit
+    app); the pool only runs jobs submitted without an API key.
+    """
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    command = [sys.executable, "-m", "src.jobs.worker",
+               "--workers", str(Config.JOB_WORKERS if count is None else count)]
+    if db_path:
+        command += ["--db", db_path]
+    return subprocess.Popen(command, cwd=project_root)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background content generation workers")
+    parser.add_argument("--workers", type=int, default=Config.JOB_WORKERS, help="Worker processes")
+    parser.add_argument("--db", default=None, help=f"Job database (default: {Config.JOB_DB})")
+    args = parser.parse_args()
+
+    workers = start_workers(args.workers, args.db)
+    print(f"🚀 {len(workers)} job workers on {args.db or Config.JOB_DB}")
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
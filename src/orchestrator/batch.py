@@ -0,0 +1,147 @@
+"""Batch generation: run many topics from a JSONL file through one shared orchestrator.
+
+Usage:
+    python -m src.orchestrator.batch topics.jsonl results.jsonl --concurrency 8
+
+Each input line is a JSON object with a "topic" (or "user_query") and an optional "id".
+Results are appended to the output file as soon as each run finishes, so a crashed or
+interrupted batch can be restarted with the same arguments and only the missing topics run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Set
+
+# State fields copied into each output record
+OUTPUT_FIELDS = [
+    "content_type",
+    "research_summary",
+    "key_insights",
+    "blog_content",
+    "linkedin_content",
+    "strategy_content",
+    "generated_images",
+    "keywords",
+    "processing_steps",
+    "errors",
+    "warnings",
+]
+
+
+def load_topics(input_path: str) -> List[Dict[str, Any]]:
+    """Read topic records from a JSONL file; records without an id get their line number"""
+    topics = []
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"topic": record}
+            topic = record.get("topic") or record.get("user_query")
+            if not topic:
+                raise ValueError(f"{input_path}:{line_no}: record has no 'topic'")
+            topics.append({**record, "id": str(record.get("id", line_no)), "topic": topic})
+    return topics
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already written successfully; a truncated trailing line from a crash is dropped"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            # Partial write from an interrupted run: cut back to the last full record
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if record.get("status") == "ok":
+            done.add(str(record.get("id")))
+    return done
+
+
+async def run_batch(orchestrator, topics: List[Dict[str, Any]], output_path: str,
+                    concurrency: int = 4, resume: bool = True) -> Dict[str, Any]:
+    """Run topics through orchestrator.app.ainvoke with at most `concurrency` runs in flight.
+
+    Failed topics are recorded with status "error" and are retried on the next resume.
+    """
+    from ..utils.scheduler import scheduling_context, BATCH
+    skip = completed_ids(output_path) if resume else set()
+    pending = [t for t in topics if t["id"] not in skip]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # The whole batch is one low-priority session, so interactive users are served first
+    session_id = f"batch:{os.path.basename(output_path)}"
+    summary = {"total": len(topics), "skipped": len(topics) - len(pending), "succeeded": 0, "failed": 0}
+
+    async def _run(topic: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            thread_id = f"batch-{topic['id']}-{uuid.uuid4()}"
+            started = time.perf_counter()
+            record = {"id": topic["id"], "topic": topic["topic"], "thread_id": thread_id}
+            try:
+                with scheduling_context(session_id, BATCH):
+                    result = await orchestrator.app.ainvoke(
+                        {"user_query": topic["topic"], "conversation_history": []},
+                        config={"thread_id": thread_id}
+                    )
+                record["status"] = "ok"
+                record.update({field: result.get(field) for field in OUTPUT_FIELDS})
+            except Exception as e:
+                record["status"] = "error"
+                record["error"] = str(e)
+            record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+            return record
+
+    mode = "a" if resume else "w"
+    with open(output_path, mode, encoding="utf-8") as out:
+        for finished in asyncio.as_completed([_run(t) for t in pending]):
+            record = await finished
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            summary["succeeded" if record["status"] == "ok" else "failed"] += 1
+            print(f"[{record['status']}] {record['id']}: {record['topic']} ({record['elapsed_seconds']}s)")
+    return summary
+
+
+def run_batch_file(input_path: str, output_path: str, concurrency: int = 4, resume: bool = True,
+                   orchestrator=None, parallel: Optional[bool] = None) -> Dict[str, Any]:
+    """Synchronous entry point: load topics and run them through one shared orchestrator"""
+    if orchestrator is None:
+        from .workflow_orchestrator import ContentMarketingOrchestrator
+        orchestrator = ContentMarketingOrchestrator(parallel=parallel)
+    topics = load_topics(input_path)
+    return asyncio.run(run_batch(orchestrator, topics, output_path, concurrency=concurrency, resume=resume))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate content for many topics from a JSONL file")
+    parser.add_argument("input", help="JSONL file of topics ({\"id\": ..., \"topic\": ...} per line)")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum runs in flight")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of skipping finished topics")
+    parser.add_argument("--parallel", action="store_true", help="Use the fan-out/fan-in workflow")
+    args = parser.parse_args(argv)
+
+    summary = run_batch_file(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        resume=not args.no_resume,
+        parallel=True if args.parallel else None
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
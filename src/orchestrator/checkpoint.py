@@ -0,0 +1,63 @@
+"""Checkpointer selection for the LangGraph workflow.
+
+By default checkpoints live in memory. Setting CHECKPOINT_DB (or passing checkpoint_path to the
+orchestrator) stores them in a SQLite file instead, so a run interrupted by a crash or a failing
+node can be resumed from its last completed node with ContentMarketingOrchestrator.resume().
+"""
+import asyncio
+import os
+import sqlite3
+from typing import Any, AsyncIterator, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # optional dependency: pip install langgraph-checkpoint-sqlite
+    SqliteSaver = None
+
+
+if SqliteSaver is not None:
+    class ThreadedSqliteSaver(SqliteSaver):
+        """SqliteSaver whose async methods run the sync ones in a worker thread.
+
+        SqliteSaver only implements the sync interface, and AsyncSqliteSaver is bound to the
+        event loop it was created on. The orchestrator serves both app.invoke and app.ainvoke
+        (from many loops in batch and job workers), so it needs one saver that handles both.
+        """
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[Any]:
+            items = await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+            )
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer(path: Optional[str] = None):
+    """Return a SQLite-backed checkpointer for `path`, or an in-memory one when no path is given"""
+    if not path:
+        return MemorySaver()
+    if SqliteSaver is None:
+        raise ImportError(
+            "Durable checkpoints require the langgraph-checkpoint-sqlite package "
+            "(pip install langgraph-checkpoint-sqlite)"
+        )
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    # One connection shared across threads; SqliteSaver serializes access with its own lock
+    conn = sqlite3.connect(path, check_same_thread=False)
+    return ThreadedSqliteSaver(conn)
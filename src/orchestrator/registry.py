@@ -0,0 +1,56 @@
+"""Process-wide cache of compiled orchestrators.
+
+Building a ContentMarketingOrchestrator creates every agent's chat client and compiles the
+LangGraph workflow. The registry does that once per (provider, model, API key, workflow mode)
+and hands the same instance to every caller - Streamlit reruns, sessions and batch jobs alike.
+"""
+import hashlib
+import threading
+from typing import Dict, Tuple, Optional
+
+from .workflow_orchestrator import ContentMarketingOrchestrator
+
+_lock = threading.Lock()
+_orchestrators: Dict[Tuple, ContentMarketingOrchestrator] = {}
+
+
+def _key(provider: str, model: Optional[str], api_key: Optional[str], parallel: Optional[bool]) -> Tuple:
+    # Keys are hashed so raw credentials are never kept as dict keys
+    key_hash = hashlib.sha256((api_key or "").encode()).hexdigest()
+    return (provider, model, key_hash, parallel)
+
+
+def get_orchestrator(provider: str = "OpenAI", model: str = None, api_key: str = None,
+                     parallel: bool = None) -> ContentMarketingOrchestrator:
+    """Return the shared orchestrator for these settings, building it on first use"""
+    key = _key(provider, model, api_key, parallel)
+    with _lock:
+        orchestrator = _orchestrators.get(key)
+        if orchestrator is None:
+            orchestrator = ContentMarketingOrchestrator(parallel=parallel, model=model, api_key=api_key)
+            _orchestrators[key] = orchestrator
+    return orchestrator
+
+
+def invalidate(provider: str = None, model: str = None, api_key: str = None) -> int:
+    """Drop cached orchestrators matching the given settings (all of them when called without arguments).
+
+    Returns the number of entries removed.
+    """
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest() if api_key is not None else None
+    with _lock:
+        stale = [
+            key for key in _orchestrators
+            if (provider is None or key[0] == provider)
+            and (model is None or key[1] == model)
+            and (key_hash is None or key[2] == key_hash)
+        ]
+        for key in stale:
+            del _orchestrators[key]
+    return len(stale)
+
+
+def cached_count() -> int:
+    """Number of orchestrators currently cached"""
+    with _lock:
+        return len(_orchestrators)
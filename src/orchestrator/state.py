@@ -1,6 +1,18 @@
-from typing import TypedDict, List, Dict, Any, Optional
+import operator
+from typing import TypedDict, List, Dict, Any, Optional, Annotated
 from langchain_core.messages import BaseMessage
 
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer that merges per-agent entries written by parallel branches"""
+    return {**(left or {}), **(right or {})}
+
+
+def latest_value(left: Any, right: Any) -> Any:
+    """Reducer that keeps the most recent write (parallel branches may all write it)"""
+    return right
+
+
 class ContentMarketingState(TypedDict):
     """State object that flows through the LangGraph workflow"""
     
@@ -15,6 +27,7 @@ class ContentMarketingState(TypedDict):
     query_intent: str
     required_agents: List[str]
     research_needed: bool
+    speculative_research: Optional[Dict[str, Any]]  # kept/dropped flag and cost when research ran speculatively
     
     # Research Data
     research_results: List[Dict[str, Any]]
@@ -38,16 +51,20 @@ class ContentMarketingState(TypedDict):
     readability_score: Optional[float]
     
     # Quality Control
-    content_quality_scores: Dict[str, int]
+    content_quality_scores: Annotated[Dict[str, int], merge_dicts]
     fact_check_results: List[Dict[str, Any]]
     
     # Metadata
-    processing_steps: List[str]
-    errors: List[str]
-    warnings: List[str]
+    processing_steps: Annotated[List[str], operator.add]
+    errors: Annotated[List[str], operator.add]
+    warnings: Annotated[List[str], operator.add]
     success: bool
+    timings: Annotated[List[Dict[str, Any]], operator.add]  # per-node latency/token records
+    latency_budget: Optional[float]  # seconds; overrides the orchestrator's default for this run
+    deadline: Annotated[Optional[float], latest_value]  # epoch seconds, fixed by the first node
+    skipped_stages: Annotated[List[str], operator.add]  # optional stages dropped to meet the deadline
     
     # Flow Control
-    current_step: str
+    current_step: Annotated[str, latest_value]
     next_steps: List[str]
-    completed_agents: List[str]
+    completed_agents: Annotated[List[str], operator.add]
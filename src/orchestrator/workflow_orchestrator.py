@@ -1,7 +1,9 @@
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-from typing import Dict, Any
+from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_config, get_stream_writer
+from typing import Dict, Any, List, Callable, Optional, Iterator, AsyncIterator
 import json
+import time
 
 from ..agents.query_handler_agent import QueryHandlerAgent
 from ..agents.deep_research_agent import DeepResearchAgent
@@ -9,54 +11,152 @@ from ..agents.deep_research_agent import DeepResearchAgent
 # from ..agents.linkedin_writer import LinkedInWriterAgent
 # from ..agents.image_generator import ImageGenerationAgent
 # from ..agents.content_strategist import ContentStrategistAgent
+from ..utils.config import Config
+from ..utils.instrumentation import timed_node, atimed_node
 from .state import ContentMarketingState
+from .checkpoint import create_checkpointer
 
 
 class ContentMarketingOrchestrator:
     """Main orchestrator using LangGraph for intelligent content creation workflow"""
 
-    def __init__(self):
-        # Initialize all agents
-        self.query_handler = QueryHandlerAgent()
-        self.research_agent = DeepResearchAgent()
+    # Writer nodes that only depend on research output and can run side by side
+    FAN_OUT_BRANCHES = {
+        "blog": "blog_writing",
+        "linkedin": "linkedin_writing",
+        "images": "image_generation",
+        "strategy": "strategy",
+    }
+
+    # Rough seconds each stage adds to a run, used to decide what still fits in a latency budget
+    STAGE_SECONDS = {
+        "fact_verification": 5,
+        "blog_writing": 45,
+        "linkedin_writing": 15,
+        "images": 40,
+        "second_image": 15,
+    }
+    STAGE_LABELS = {
+        "fact_verification": "fact verification",
+        "images": "image generation",
+        "second_image": "the second image",
+    }
+
+    def __init__(self, parallel: bool = None, model: str = None, api_key: str = None,
+                 checkpoint_path: str = None, speculative_research: bool = None,
+                 latency_budget: float = None):
+        # Fan-out/fan-in mode runs every writer concurrently after research
+        self.parallel = Config.PARALLEL_WORKFLOW if parallel is None else parallel
+        # Speculative mode starts research at the entry, alongside query analysis
+        self.speculative_research = (
+            Config.SPECULATIVE_RESEARCH if speculative_research is None else speculative_research
+        )
+
+        # Seconds a run may take before optional stages are dropped (None or 0: no budget)
+        self.latency_budget = Config.LATENCY_BUDGET_SECONDS if latency_budget is None else latency_budget
+
+        # Initialize all agents (model/api_key default to Config)
+        llm_settings = {"model": model, "api_key": api_key}
+        self.llm_settings = llm_settings
+        self._fast_agents: Dict[str, Any] = {}
+        self.query_handler = QueryHandlerAgent(**llm_settings)
+        self.research_agent = DeepResearchAgent(**llm_settings)
         
         # Import and initialize other agents
         from ..agents.blog_writer_agent import SEOBlogWriterAgent
         from ..agents.image_generation_agent import ImageGenerationAgent
         from ..agents.linkedin_writer_agent import LinkedInWriterAgent
+        from ..agents.content_strategist_agent import ContentStrategistAgent
         
-        self.blog_writer = SEOBlogWriterAgent()
-        self.image_generator = ImageGenerationAgent()
-        self.linkedin_writer = LinkedInWriterAgent()
+        self.blog_writer = SEOBlogWriterAgent(**llm_settings)
+        self.image_generator = ImageGenerationAgent(**llm_settings)
+        self.linkedin_writer = LinkedInWriterAgent(**llm_settings)
+        self.content_strategist = ContentStrategistAgent(**llm_settings)
         
         # Build the workflow
         self.workflow = self._build_workflow()
-        # Compile with memory
-        self.app = self.workflow.compile(checkpointer=MemorySaver())
+        # Compile with memory, or a SQLite file when durable checkpoints are configured
+        self.checkpointer = create_checkpointer(checkpoint_path or Config.CHECKPOINT_DB)
+        self.app = self.workflow.compile(checkpointer=self.checkpointer)
+
+    def discard_thread(self, thread_id: str) -> None:
+        """Drop a finished run's checkpoints so a long-lived orchestrator does not grow without bound"""
+        self.app.checkpointer.delete_thread(thread_id)
+
+    def stream_run(self, initial_state: ContentMarketingState, thread_id: str) -> Iterator[Dict[str, Any]]:
+        """Run the workflow and yield events as they happen.
+
+        Events are dicts with a "type" of:
+          - "token":  {"node", "token"} - a chunk of blog or LinkedIn text as the LLM writes it
+          - "update": {"node", "update"} - a node finished; update holds the fields it wrote
+          - "done":   {"state"} - the final workflow state
+        """
+        config = {"configurable": {"thread_id": thread_id, "stream_tokens": True}}
+        for mode, payload in self.app.stream(initial_state, config, stream_mode=["updates", "custom"]):
+            yield from self._stream_events(mode, payload)
+        yield {"type": "done", "state": self.app.get_state(config).values}
+
+    async def astream_run(self, initial_state: ContentMarketingState, thread_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Async variant of stream_run"""
+        config = {"configurable": {"thread_id": thread_id, "stream_tokens": True}}
+        async for mode, payload in self.app.astream(initial_state, config, stream_mode=["updates", "custom"]):
+            for event in self._stream_events(mode, payload):
+                yield event
+        snapshot = await self.app.aget_state(config)
+        yield {"type": "done", "state": snapshot.values}
+
+    def _stream_events(self, mode: str, payload: Any) -> Iterator[Dict[str, Any]]:
+        if mode == "custom":
+            yield {"type": "token", **payload}
+            return
+        for node, update in (payload or {}).items():
+            yield {"type": "update", "node": node, "update": update or {}}
+
+    def resume(self, thread_id: str) -> ContentMarketingState:
+        """Continue a run from its last completed node.
+
+        Nodes that already finished (including successful parallel siblings of a failed node)
+        are not re-run. Returns the final state; a run that already finished is returned as-is.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        snapshot = self.app.get_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for thread '{thread_id}'")
+        if not snapshot.next:
+            return snapshot.values
+        print(f"⏯️ Resuming {thread_id} at {', '.join(snapshot.next)}...")
+        return self.app.invoke(None, config)
+
+    async def aresume(self, thread_id: str) -> ContentMarketingState:
+        """Async variant of resume"""
+        config = {"configurable": {"thread_id": thread_id}}
+        snapshot = await self.app.aget_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for thread '{thread_id}'")
+        if not snapshot.next:
+            return snapshot.values
+        print(f"⏯️ Resuming {thread_id} at {', '.join(snapshot.next)}...")
+        return await self.app.ainvoke(None, config)
 
     def _build_workflow(self) -> StateGraph:
         """Build the LangGraph workflow"""
+        if self.parallel:
+            return self._build_parallel_workflow()
+
         workflow = StateGraph(ContentMarketingState)
         
+        # Entry, query analysis and research
+        research_exit = self._add_research_stage(workflow)
+
         # Add nodes
-        workflow.add_node("query_analysis", self._query_analysis_node)
-        workflow.add_node("research", self._research_node)
-        workflow.add_node("blog_writing", self._blog_writing_node)
-        workflow.add_node("image_generation", self._image_generation_node)
-        workflow.add_node("linkedin_writing", self._linkedin_writing_node)
-        workflow.add_node("finalize", self._finalize_node)
-        
-        # Set entry point
-        workflow.set_entry_point("query_analysis")
+        workflow.add_node("blog_writing", self._node("blog_writing"))
+        workflow.add_node("image_generation", self._node("image_generation"))
+        workflow.add_node("linkedin_writing", self._node("linkedin_writing"))
+        workflow.add_node("finalize", self._node("finalize"))
         
         # Add conditional routing
         workflow.add_conditional_edges(
-            "query_analysis",
-            self._route_after_query_analysis,
-            {"research": "research"}
-        )
-        workflow.add_conditional_edges(
-            "research",
+            research_exit,
             self._route_after_research,
             {"blog": "blog_writing", "finalize": "finalize"}
         )
@@ -79,16 +179,138 @@ class ContentMarketingOrchestrator:
         
         return workflow
 
+    def _add_research_stage(self, workflow: StateGraph) -> str:
+        """Add query analysis and research; returns the node the writers are routed from.
+
+        In speculative mode research starts at the entry alongside query analysis, and a
+        research_gate node joins them and keeps or drops the research once routing is known.
+        """
+        workflow.add_node("query_analysis", self._node("query_analysis"))
+        workflow.add_node("research", self._node("research"))
+
+        if self.speculative_research:
+            workflow.add_node("research_gate", self._node("research_gate"))
+            workflow.add_edge(START, "query_analysis")
+            workflow.add_edge(START, "research")
+            workflow.add_edge(["query_analysis", "research"], "research_gate")
+            return "research_gate"
+
+        workflow.set_entry_point("query_analysis")
+        workflow.add_conditional_edges(
+            "query_analysis",
+            self._route_after_query_analysis,
+            {"research": "research"}
+        )
+        return "research"
+
+    def _build_parallel_workflow(self) -> StateGraph:
+        """Build the fan-out/fan-in workflow: writers start together once research is done"""
+        workflow = StateGraph(ContentMarketingState)
+
+        research_exit = self._add_research_stage(workflow)
+        workflow.add_node("blog_writing", self._node("blog_writing"))
+        workflow.add_node("image_generation", self._node("image_generation"))
+        workflow.add_node("linkedin_writing", self._node("linkedin_writing"))
+        workflow.add_node("strategy", self._node("strategy"))
+        workflow.add_node("finalize", self._node("finalize"))
+
+        # Fan out: every selected writer runs in the same superstep
+        workflow.add_conditional_edges(
+            research_exit,
+            self._route_fan_out,
+            {**self.FAN_OUT_BRANCHES, "finalize": "finalize"}
+        )
+        # Fan in: finalize runs once, after every branch of the superstep has finished
+        for node in self.FAN_OUT_BRANCHES.values():
+            workflow.add_edge(node, "finalize")
+        workflow.add_edge("finalize", END)
+
+        return workflow
+
+    def _node(self, name: str) -> RunnableLambda:
+        """Pair a node's sync and async implementations so both app.invoke and app.ainvoke work"""
+        return RunnableLambda(
+            timed_node(name, getattr(self, f"_{name}_node")),
+            afunc=atimed_node(name, getattr(self, f"_a{name}_node"))
+        )
+
+    def _writer_context(self, state: ContentMarketingState) -> Dict[str, Any]:
+        """Research-derived context shared by every writer agent"""
+        return {
+            "topic": state["user_query"],
+            "research_summary": state.get("research_summary", ""),
+            "key_insights": state.get("key_insights", []),
+            "target_audience": state.get("target_audience", ""),
+            "brand_voice": state.get("brand_voice", "")
+        }
+
+    def _deadline_update(self, state: ContentMarketingState) -> ContentMarketingState:
+        """Fix the run's deadline on its first node; a per-run latency_budget overrides the default"""
+        if state.get("deadline"):
+            return {}
+        budget = state.get("latency_budget") or self.latency_budget
+        return {"deadline": time.time() + budget} if budget else {}
+
+    def _can_afford(self, state: ContentMarketingState, *stages: str) -> bool:
+        """Whether the time left before the deadline covers the given stages"""
+        deadline = state.get("deadline")
+        if not deadline:
+            return True
+        return deadline - time.time() >= sum(self.STAGE_SECONDS[stage] for stage in stages)
+
+    def _skip_update(self, state: ContentMarketingState, stages: List[str]) -> ContentMarketingState:
+        """Record stages dropped to stay within the latency budget"""
+        if not stages:
+            return {}
+        budget = state.get("latency_budget") or self.latency_budget
+        return {
+            "skipped_stages": stages,
+            "warnings": [
+                f"Skipped {self.STAGE_LABELS.get(stage, stage)} to stay within the {budget:g}s latency budget"
+                for stage in stages
+            ]
+        }
+
+    def _budget_agent(self, state: ContentMarketingState, name: str, stage: str):
+        """The regular agent, or one on Config.FAST_MODEL when the stage no longer fits the budget"""
+        agent = getattr(self, name)
+        if self._can_afford(state, stage) or Config.FAST_MODEL == (self.llm_settings["model"] or Config.OPENAI_MODEL):
+            return agent, {}
+        fast_agent = self._fast_agents.get(name)
+        if fast_agent is None:
+            fast_agent = type(agent)(model=Config.FAST_MODEL, api_key=self.llm_settings["api_key"])
+            self._fast_agents[name] = fast_agent
+        print(f"⏱️ Over budget: {stage} switches to {Config.FAST_MODEL}")
+        return fast_agent, {"warnings": [f"Switched {stage.replace('_', ' ')} to {Config.FAST_MODEL} to stay within the latency budget"]}
+
+    def _token_sink(self, node: str) -> Optional[Callable[[str], None]]:
+        """Forward LLM tokens to the custom stream when the run was started by stream_run"""
+        if not get_config().get("configurable", {}).get("stream_tokens"):
+            return None
+        writer = get_stream_writer()
+        return lambda token: writer({"node": node, "token": token})
+
+    def _conversation_history(self, state: ContentMarketingState) -> List[str]:
+        """Flatten conversation messages into the plain strings QueryHandlerAgent expects"""
+        return [getattr(m, "content", str(m)) for m in state.get("conversation_history") or []]
+
     def _query_analysis_node(self, state: ContentMarketingState) -> ContentMarketingState:
         """Analyze the user query to determine workflow requirements"""
         print("🔍 Analyzing query...")
-        query_result = self.query_handler.analyze_query({
-            "query": state["user_query"],
-            "conversation_history": state.get("conversation_history", [])
-        })
-        
+        query_result = self.query_handler.analyze_query(
+            state["user_query"], self._conversation_history(state)
+        )
+        return {**self._query_analysis_update(query_result), **self._deadline_update(state)}
+
+    async def _aquery_analysis_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        print("🔍 Analyzing query...")
+        query_result = await self.query_handler.aanalyze_query(
+            state["user_query"], self._conversation_history(state)
+        )
+        return {**self._query_analysis_update(query_result), **self._deadline_update(state)}
+
+    def _query_analysis_update(self, query_result: Dict[str, Any]) -> ContentMarketingState:
         return {
-            **state,
             "query_intent": query_result.get("intent", ""),
             "content_type": query_result.get("content_type", "blog"),
             "target_audience": query_result.get("target_audience", ""),
@@ -96,19 +318,38 @@ class ContentMarketingOrchestrator:
             "required_agents": query_result.get("required_agents", []),
             "research_needed": query_result.get("research_needed", True),
             "current_step": "query_analysis",
-            "processing_steps": state.get("processing_steps", []) + ["Query Analysis Complete"],
-            "completed_agents": state.get("completed_agents", []) + ["query_handler_agent"]
+            "processing_steps": ["Query Analysis Complete"],
+            "completed_agents": ["query_handler_agent"]
         }
 
     def _research_node(self, state: ContentMarketingState) -> ContentMarketingState:
         """Perform deep research on the topic"""
         print("🔬 Conducting research...")
+        budget = self._deadline_update(state)
+        verify = self._can_afford({**state, **budget}, "fact_verification", "blog_writing")
         research_result = self.research_agent.conduct_research(
             topic=state["user_query"],
-            depth="comprehensive"
+            depth="comprehensive",
+            verify_facts=verify
         )
+        return self._research_update(research_result, state, budget, verify)
+
+    async def _aresearch_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        print("🔬 Conducting research...")
+        budget = self._deadline_update(state)
+        verify = self._can_afford({**state, **budget}, "fact_verification", "blog_writing")
+        research_result = await self.research_agent.aconduct_research(
+            topic=state["user_query"],
+            depth="comprehensive",
+            verify_facts=verify
+        )
+        return self._research_update(research_result, state, budget, verify)
+
+    def _research_update(self, research_result: Dict[str, Any], state: ContentMarketingState,
+                         budget: Dict[str, Any], verified: bool) -> ContentMarketingState:
         return {
-            **state,
+            **budget,
+            **self._skip_update(state, [] if verified else ["fact_verification"]),
             "research_results": research_result.get("search_results", []),
             "web_sources": research_result.get("sources", []),
             "key_insights": research_result.get("key_insights", []),
@@ -116,86 +357,169 @@ class ContentMarketingOrchestrator:
             "research_summary": research_result.get("summary", ""),
             "keywords": [],
             "current_step": "research",
-            "processing_steps": state.get("processing_steps", []) + ["Research Complete"],
-            "completed_agents": state.get("completed_agents", []) + ["deep_research_agent"]
+            "processing_steps": [self._research_step(research_result)],
+            "completed_agents": ["deep_research_agent"]
+        }
+
+    @staticmethod
+    def _research_step(research_result: Dict[str, Any]) -> str:
+        reused = research_result.get("reused_from")
+        if reused:
+            return f"Research Complete (reused from '{reused['topic']}', similarity {reused['similarity']})"
+        return "Research Complete"
+
+    def _research_gate_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        """Keep speculative research if routing needs it, otherwise drop it and record what it cost"""
+        research_timing = next((t for t in reversed(state.get("timings", [])) if t["node"] == "research"), {})
+        cost = {
+            "wall_ms": research_timing.get("wall_ms", 0.0),
+            "prompt_tokens": research_timing.get("prompt_tokens", 0),
+            "completion_tokens": research_timing.get("completion_tokens", 0),
+        }
+        if state.get("research_needed", True):
+            return {
+                "speculative_research": {"kept": True, **cost},
+                "current_step": "research_gate",
+                "processing_steps": ["Speculative Research Kept"]
+            }
+
+        print("🗑️ Dropping speculative research...")
+        return {
+            "research_results": [],
+            "web_sources": [],
+            "key_insights": [],
+            "facts_and_stats": [],
+            "research_summary": "",
+            "speculative_research": {"kept": False, **cost},
+            "warnings": [
+                f"Speculative research discarded (not needed): {cost['wall_ms'] / 1000:.1f}s, "
+                f"{cost['prompt_tokens'] + cost['completion_tokens']} tokens"
+            ],
+            "current_step": "research_gate",
+            "processing_steps": ["Speculative Research Discarded"]
         }
 
+    async def _aresearch_gate_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        return self._research_gate_node(state)
+
     def _blog_writing_node(self, state: ContentMarketingState) -> ContentMarketingState:
         """Generate blog content"""
         print("✍️ Generating blog content...")
-        blog_result = self.blog_writer.create_blog_post({
-            "topic": state["user_query"],
-            "research_summary": state.get("research_summary", ""),
-            "key_insights": state.get("key_insights", []),
-            "target_audience": state.get("target_audience", ""),
-            "brand_voice": state.get("brand_voice", "")
-        })
-        
+        writer, fallback = self._budget_agent(state, "blog_writer", "blog_writing")
+        blog_result = writer.create_blog_post(
+            self._writer_context(state), on_token=self._token_sink("blog_writing")
+        )
+        return {**self._blog_writing_update(blog_result), **fallback}
+
+    async def _ablog_writing_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        print("✍️ Generating blog content...")
+        writer, fallback = self._budget_agent(state, "blog_writer", "blog_writing")
+        blog_result = await writer.acreate_blog_post(
+            self._writer_context(state), on_token=self._token_sink("blog_writing")
+        )
+        return {**self._blog_writing_update(blog_result), **fallback}
+
+    def _blog_writing_update(self, blog_result: Dict[str, Any]) -> ContentMarketingState:
         return {
-            **state,
             "blog_content": blog_result.get("content", ""),
             "keywords": blog_result.get("keywords", []),
             "seo_score": blog_result.get("seo_score", None),
             "readability_score": blog_result.get("readability_score", None),
             "content_quality_scores": {"blog": blog_result.get("quality_score", None)},
             "current_step": "blog_writing",
-            "processing_steps": state.get("processing_steps", []) + ["Blog Writing Complete"],
-            "completed_agents": state.get("completed_agents", []) + ["blog_writer_agent"]
+            "processing_steps": ["Blog Writing Complete"],
+            "completed_agents": ["blog_writer_agent"]
         }
 
     def _image_generation_node(self, state: ContentMarketingState) -> ContentMarketingState:
         """Generate images for the content"""
         print("🖼️ Generating images...")
-        image_result = self.image_generator.generate_images({
-            "topic": state["user_query"],
-            "research_summary": state.get("research_summary", ""),
-            "target_audience": state.get("target_audience", ""),
-            "brand_voice": state.get("brand_voice", "")
-        })
-        
+        # Only one DALL-E image when the second one no longer fits the latency budget
+        max_images = None if self._can_afford(state, "images", "second_image") else 1
+        image_result = self.image_generator.generate_images(self._writer_context(state), max_images=max_images)
+        return self._image_generation_update(image_result, state, max_images)
+
+    async def _aimage_generation_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        print("🖼️ Generating images...")
+        # Only one DALL-E image when the second one no longer fits the latency budget
+        max_images = None if self._can_afford(state, "images", "second_image") else 1
+        image_result = await self.image_generator.agenerate_images(self._writer_context(state), max_images=max_images)
+        return self._image_generation_update(image_result, state, max_images)
+
+    def _image_generation_update(self, image_result: Dict[str, Any], state: ContentMarketingState,
+                                 max_images: Optional[int]) -> ContentMarketingState:
         return {
-            **state,
+            **self._skip_update(state, ["second_image"] if max_images == 1 else []),
             "image_prompts": image_result.get("prompts", []),
             "generated_images": image_result.get("images", []),
             "current_step": "image_generation",
-            "processing_steps": state.get("processing_steps", []) + ["Image Generation Complete"],
-            "completed_agents": state.get("completed_agents", []) + ["image_generation_agent"]
+            "processing_steps": ["Image Generation Complete"],
+            "completed_agents": ["image_generation_agent"]
         }
 
     def _linkedin_writing_node(self, state: ContentMarketingState) -> ContentMarketingState:
         """Generate LinkedIn content"""
         print("🔗 Generating LinkedIn content...")
-        linkedin_result = self.linkedin_writer.create_linkedin_post({
-            "topic": state["user_query"],
-            "research_summary": state.get("research_summary", ""),
-            "key_insights": state.get("key_insights", []),
-            "target_audience": state.get("target_audience", ""),
-            "brand_voice": state.get("brand_voice", "")
-        })
-        
+        writer, fallback = self._budget_agent(state, "linkedin_writer", "linkedin_writing")
+        linkedin_result = writer.create_linkedin_post(
+            self._writer_context(state), on_token=self._token_sink("linkedin_writing")
+        )
+        return {**self._linkedin_writing_update(linkedin_result), **fallback}
+
+    async def _alinkedin_writing_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        print("🔗 Generating LinkedIn content...")
+        writer, fallback = self._budget_agent(state, "linkedin_writer", "linkedin_writing")
+        linkedin_result = await writer.acreate_linkedin_post(
+            self._writer_context(state), on_token=self._token_sink("linkedin_writing")
+        )
+        return {**self._linkedin_writing_update(linkedin_result), **fallback}
+
+    def _linkedin_writing_update(self, linkedin_result: Dict[str, Any]) -> ContentMarketingState:
         return {
-            **state,
             "linkedin_content": linkedin_result.get("content", ""),
-            "content_quality_scores": {
-                **state.get("content_quality_scores", {}), 
-                "linkedin": linkedin_result.get("quality_score", None)
-            },
+            "content_quality_scores": {"linkedin": linkedin_result.get("quality_score", None)},
             "current_step": "linkedin_writing",
-            "processing_steps": state.get("processing_steps", []) + ["LinkedIn Writing Complete"],
-            "completed_agents": state.get("completed_agents", []) + ["linkedin_writer_agent"]
+            "processing_steps": ["LinkedIn Writing Complete"],
+            "completed_agents": ["linkedin_writer_agent"]
+        }
+
+    def _strategy_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        """Generate a content strategy from the research"""
+        print("📈 Building content strategy...")
+        strategy_result = self.content_strategist.create_strategy(self._writer_context(state))
+        return self._strategy_update(strategy_result)
+
+    async def _astrategy_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        print("📈 Building content strategy...")
+        strategy_result = await self.content_strategist.acreate_strategy(self._writer_context(state))
+        return self._strategy_update(strategy_result)
+
+    def _strategy_update(self, strategy_result: Dict[str, Any]) -> ContentMarketingState:
+        return {
+            "strategy_content": strategy_result.get("strategy", ""),
+            "current_step": "strategy",
+            "processing_steps": ["Strategy Complete"],
+            "completed_agents": ["content_strategist_agent"]
         }
 
     def _finalize_node(self, state: ContentMarketingState) -> ContentMarketingState:
         """Finalize the workflow and prepare final output"""
         print("✅ Finalizing workflow...")
+        images_skipped = (
+            state.get("deadline") and self._images_planned(state)
+            and "image_generation_agent" not in state.get("completed_agents", [])
+        )
         return {
-            **state,
+            **self._skip_update(state, ["images"] if images_skipped else []),
             "current_step": "finalize",
             "success": True,
-            "processing_steps": state.get("processing_steps", []) + ["Workflow Complete"],
+            "processing_steps": ["Workflow Complete"],
             "next_steps": []
         }
 
+    async def _afinalize_node(self, state: ContentMarketingState) -> ContentMarketingState:
+        return self._finalize_node(state)
+
     # Routing logic
     def _route_after_query_analysis(self, state: ContentMarketingState) -> str:
         """Route after query analysis based on requirements"""
@@ -212,15 +536,44 @@ class ContentMarketingOrchestrator:
     
     def _route_after_research(self, state: ContentMarketingState) -> str:
         """Route after research based on content type"""
-        if state.get("content_type") == "blog":
+        if state.get("content_type") in ("blog", "mixed"):
             return "blog"
         return "finalize"
 
-    def _route_after_blog(self, state: ContentMarketingState) -> str:
+    def _images_planned(self, state: ContentMarketingState) -> bool:
+        """Whether routing would have run image generation without a latency budget"""
+        if self.parallel:
+            return "images" in self._route_fan_out(state, apply_budget=False)
+        return (self._route_after_research(state) == "blog"
+                and self._route_after_blog(state, apply_budget=False) == "images")
+
+    def _route_fan_out(self, state: ContentMarketingState, apply_budget: bool = True) -> List[str]:
+        """Select every writer branch the request needs; they all start at once.
+
+        Image generation is left out when it no longer fits the latency budget.
+        """
+        agents = set(state.get("required_agents", []))
+        content_type = state.get("content_type")
+        branches = []
+        if content_type in ("blog", "mixed") or agents & {"blog_writer", "SEOBlogWriterAgent"}:
+            branches.append("blog")
+        if content_type == "linkedin" or agents & {"LinkedInWriterAgent"}:
+            branches.append("linkedin")
+        if content_type == "image" or agents & {"image_generator", "ImageGenerationAgent"}:
+            if not apply_budget or self._can_afford(state, "images"):
+                branches.append("images")
+        if content_type == "strategy" or agents & {"content_strategist", "ContentStrategistAgent"}:
+            branches.append("strategy")
+        return branches or ["finalize"]
+
+    def _route_after_blog(self, state: ContentMarketingState, apply_budget: bool = True) -> str:
         """Route after blog writing - to image generation, LinkedIn, or finalize"""
         # If LinkedIn content is required, route to LinkedIn writing
         if "LinkedInWriterAgent" in state.get("required_agents", []):
             return "linkedin"
+        # Images are optional: finish instead when they no longer fit the latency budget
+        if apply_budget and not self._can_afford(state, "images"):
+            return "finalize"
         return "images"
 
     def _route_after_linkedin(self, state: ContentMarketingState) -> str:
@@ -0,0 +1,486 @@
+"""Local stand-in for the OpenAI chat-completions and images API (and the SERP API search endpoint).
+
+Usage:
+    python -m src.tools.fake_openai_server --port 8900 --latency lognormal:0.8,0.5 --rate-429 0.05
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake streamlit run streamlit_app/app.py
+
+or from Python (tests, benchmarks):
+
+    with FakeOpenAIServer(FakeServerConfig(latency="fixed:0.05")) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+
+Responses are deterministic (seeded by the request) and shaped like what each agent asks for:
+a CONTENT_TYPE block for query analysis, bullet insights, a structured research summary (or
+the research JSON schema), a markdown blog post ending in "Keywords:" (or a long-form outline
+and its sections), a LinkedIn post with hashtags and DALL-E prompts. Usage counts are reported (and streamed when include_usage is
+requested) so token accounting works as against the real API.
+
+Failure injection, all per request and seeded:
+- latency: a distribution (see parse_latency) applied before the first byte, plus
+  token_interval seconds between streamed chunks
+- rate_429: share of requests answered with 429 and a Retry-After header
+- rate_500: share answered with a 500 server error
+- rate_timeout: share that stall for timeout_seconds before answering
+
+Images are small deterministic PNGs served from /images/<id>.png. GET /search.json answers
+like SerpAPI's Google engine (point SERP_API_URL at search_url), with its own search_latency.
+With page_links the result links point at article pages served from /pages/..., wrapped in the
+usual navigation, cookie banner, sidebar and footer boilerplate, with their own page_latency.
+GET /stats returns request counters and POST /control updates the configuration of a running
+server.
+"""
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, urlparse
+from dataclasses import dataclass, asdict, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for a latency spec in seconds.
+
+    fixed:S, uniform:LO,HI, normal:MEAN,STD, lognormal:MEDIAN,SIGMA, or
+    bimodal:FAST,SLOW,P_SLOW (FAST most of the time, SLOW with probability P_SLOW).
+    """
+    kind, _, args = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    if kind == "fixed":
+        return lambda rng: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "bimodal":
+        return lambda rng: values[1] if rng.random() < values[2] else values[0]
+    raise ValueError(f"Unknown latency distribution '{kind}'")
+
+
+@dataclass
+class FakeServerConfig:
+    latency: str = "fixed:0"
+    image_latency: str = "fixed:0"
+    search_latency: str = "fixed:0"
+    page_latency: str = "fixed:0"
+    page_links: bool = False  # link search results to /pages/... on this server instead of external sites
+    token_interval: float = 0.0
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    rate_timeout: float = 0.0
+    timeout_seconds: float = 120.0
+    retry_after: float = 1.0
+    completion_tokens: int = 0  # pad completions to about this many tokens (0 = natural length)
+    seed: int = 0
+
+
+_WORDS = ("adoption", "growth", "teams", "strategy", "customers", "data", "automation", "trust",
+          "efficiency", "insight", "workflow", "measurement", "quality", "scale", "budget", "risk")
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _topic(prompt: str) -> str:
+    quoted = re.search(r'"([^"]{3,120})"', prompt)
+    if quoted:
+        return quoted.group(1).strip()
+    labelled = re.search(r"(?:Topic|Analyze this request):\s*(.+)", prompt)
+    return labelled.group(1).strip()[:120] if labelled else "the topic"
+
+
+def _sentences(rng: random.Random, topic: str, count: int) -> List[str]:
+    sentences = []
+    for _ in range(count):
+        a, b = rng.sample(_WORDS, 2)
+        sentences.append(f"{topic} is driving {a} for {b}, with {rng.randint(12, 87)}% of organisations reporting results.")
+    return sentences
+
+
+def _complete(messages: List[Dict[str, Any]], body: Dict[str, Any], rng: random.Random) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    topic = _topic(prompt)
+    lower = prompt.lower()
+    response_format = body.get("response_format") or {}
+    if (response_format.get("json_schema") or {}).get("name") == "blog_outline":
+        headings = ["Introduction", "Why it matters", "What the data says", "How to get started", "Conclusion"]
+        return json.dumps({
+            "title": f"{topic.title()}: A Practical Guide",
+            "sections": [{"heading": h, "key_points": _sentences(rng, topic, 2), "words": 400} for h in headings],
+            "keywords": [topic] + rng.sample(_WORDS, 4),
+        })
+    if response_format.get("type") == "json_schema":
+        return json.dumps({
+            "insights": [{"insight": s, "evidence": f"Reported in source {i}", "source_index": i}
+                         for i, s in enumerate(_sentences(rng, topic, 5))],
+            "summary": "Executive Summary: " + " ".join(_sentences(rng, topic, 3)),
+        })
+    if "query analysis agent" in lower:
+        content_type = "linkedin" if "linkedin" in lower.split("analyze this request:")[-1] else "blog"
+        return (f"CONTENT_TYPE: {content_type}\nREQUIRED_AGENTS: research, {content_type}, image\n"
+                f"RESEARCH_NEEDED: yes\nTARGET_AUDIENCE: none\nBRAND_VOICE: none\nINTENT: write about {topic}")
+    section = re.search(r"write only section \d+, \"([^\"]+)\", in about (\d+) words", lower)
+    if section:
+        return " ".join(_sentences(rng, topic, max(2, int(section.group(2)) // 20)))
+    if "dall-e" in lower:
+        count = int((re.search(r"generate (\d+)", lower) or [None, 2])[1])
+        return "\n".join(f"A detailed editorial illustration of {topic}, {rng.choice(_WORDS)} theme, soft light"
+                         for _ in range(count))
+    if "extract the most important" in lower:
+        return "\n".join(f"- {s}" for s in _sentences(rng, topic, 6))
+    if "research summary" in lower and "executive summary" in lower:
+        return ("Executive Summary: " + " ".join(_sentences(rng, topic, 2)) + "\n\nKey Findings:\n" +
+                "\n".join(f"- {s}" for s in _sentences(rng, topic, 4)) +
+                "\n\nCurrent Trends: " + " ".join(_sentences(rng, topic, 2)))
+    if "linkedin" in lower:
+        return (f"{topic} is changing how we work. " + " ".join(_sentences(rng, topic, 3)) +
+                "\n\nWhat are you seeing in your team? Share below.\n\n#AI #Marketing #Leadership")
+    if "content strategist" in lower:
+        return f"# Content strategy: {topic}\n\n" + "\n".join(f"- {s}" for s in _sentences(rng, topic, 6))
+    sections = [f"# {topic.title()}\n"]
+    for heading in ("Why it matters", "What the data says", "How to get started"):
+        sections.append(f"## {heading}\n\n" + " ".join(_sentences(rng, topic, 4)) + "\n")
+    sections.append(f"Keywords: {topic}, {', '.join(rng.sample(_WORDS, 4))}")
+    return "\n".join(sections)
+
+
+def _pad(content: str, target_tokens: int, rng: random.Random) -> str:
+    while target_tokens and _count_tokens(content) < target_tokens:
+        content += " " + " ".join(rng.choice(_WORDS) for _ in range(20))
+    return content
+
+
+def _png(seed: str, size: int = 64) -> bytes:
+    """A solid-colour PNG whose colour is derived from `seed`"""
+    r, g, b = hashlib.sha256(seed.encode()).digest()[:3]
+    raw = b"".join(b"\x00" + bytes((r, g, b)) * size for _ in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - quiet by default
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/search.json":
+            self._search({k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()})
+        elif self.path.startswith("/pages/"):
+            self._page(urlparse(self.path).path)
+        elif self.path.startswith("/images/") and self.path.endswith(".png"):
+            data = _png(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == "/stats":
+            self._send_json(200, self.server.owner.stats())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        owner = self.server.owner
+        body = self._body()
+        if self.path == "/control":
+            owner.configure(**body)
+            self._send_json(200, asdict(owner.config))
+            return
+        if self.path.endswith("/chat/completions"):
+            endpoint = "chat"
+        elif self.path.endswith("/images/generations"):
+            endpoint = "images"
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        rng = self._planned(endpoint, body)
+        if rng is None:
+            return
+        if endpoint == "images":
+            self._images(body, rng)
+        elif body.get("stream"):
+            self._stream(body, rng)
+        else:
+            self._chat(body, rng)
+
+    def _planned(self, endpoint: str, body: Dict[str, Any]) -> Optional[random.Random]:
+        """Apply the planned latency and fault; the content rng, or None when a fault was sent"""
+        owner = self.server.owner
+        rng, fault, delay = owner.plan(endpoint, body)
+        time.sleep(delay)
+        if fault == "timeout":
+            time.sleep(owner.config.timeout_seconds)
+        if fault == "429":
+            self._send_json(429, {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_error",
+                                            "code": "rate_limit_exceeded"}},
+                            {"Retry-After": str(owner.config.retry_after)})
+            return None
+        if fault == "500":
+            self._send_json(500, {"error": {"message": "Internal server error (injected)", "type": "server_error"}})
+            return None
+        return rng
+
+    def _search(self, params: Dict[str, str]) -> None:
+        rng = self._planned("search", {k: v for k, v in params.items() if k != "api_key"})
+        if rng is None:
+            return
+        query = params.get("q", "")
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+        host, port = self.server.server_address[:2]
+        results = []
+        for position in range(1, int(params.get("num") or 10) + 1):
+            domain = f"{rng.choice(_WORDS)}-{rng.choice(('insights', 'review', 'journal', 'labs'))}.com"
+            link = f"https://{domain}/{slug}-{position}"
+            if self.server.owner.config.page_links:
+                link = f"http://{host}:{port}/pages/{domain}/{slug}-{position}"
+            results.append({
+                "position": position,
+                "title": f"{query.title()}: {rng.choice(_WORDS)} and {rng.choice(_WORDS)} in {2023 + rng.randint(0, 2)}",
+                "link": link,
+                "displayed_link": domain,
+                "snippet": " ".join(_sentences(rng, query, 2)),
+            })
+        self._send_json(200, {"search_parameters": {"engine": params.get("engine", "google"), "q": query},
+                              "organic_results": results})
+
+    def _page(self, path: str) -> None:
+        rng = self._planned("pages", {"path": path})
+        if rng is None:
+            return
+        topic = path.rsplit("/", 1)[-1].rsplit("-", 1)[0].replace("-", " ") or "the topic"
+        paragraphs = "".join(f"<p>{' '.join(_sentences(rng, topic, 3))}</p>\n" for _ in range(5))
+        data = f"""<!DOCTYPE html>
+<html><head><title>{topic.title()} | Research</title>
+<style>body {{ font-family: sans-serif; }}</style>
+<script>window.analytics = {{track: function () {{}}}};</script></head>
+<body>
+<header><a href="/">Home</a> <a href="/blog">Blog</a> <a href="/about">About us</a></header>
+<nav class="main-menu"><ul><li><a href="/a">Products</a></li><li><a href="/b">Pricing</a></li></ul></nav>
+<div class="cookie-banner">We use cookies to improve your experience. Accept all cookies to continue browsing.</div>
+<main><article>
+<h1>{topic.title()}</h1>
+{paragraphs}<div class="share-buttons">Share this article on Twitter, LinkedIn and Facebook with your network</div>
+</article></main>
+<aside class="sidebar"><h3>Related posts</h3><ul><li><a href="/c">Ten tips you will not believe about growth</a></li></ul></aside>
+<footer>Copyright 2024 Example Media. All rights reserved. Privacy policy and terms of service apply.</footer>
+</body></html>""".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _completion(self, body: Dict[str, Any], rng: random.Random) -> Tuple[str, Dict[str, int]]:
+        messages = body.get("messages") or []
+        content = _pad(_complete(messages, body, rng), self.server.owner.config.completion_tokens, rng)
+        prompt_tokens = sum(_count_tokens(str(m.get("content", ""))) for m in messages)
+        completion_tokens = _count_tokens(content)
+        return content, {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens}
+
+    def _chat(self, body: Dict[str, Any], rng: random.Random) -> None:
+        content, usage = self._completion(body, rng)
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{rng.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, body: Dict[str, Any], rng: random.Random) -> None:
+        content, usage = self._completion(body, rng)
+        chunk_id = f"chatcmpl-fake-{rng.getrandbits(32):08x}"
+        model = body.get("model", "gpt-4o")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(payload: Any) -> None:
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode()
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+
+        event(chunk({"role": "assistant", "content": ""}))
+        for piece in re.findall(r"\S+\s*", content):
+            if self.server.owner.config.token_interval:
+                time.sleep(self.server.owner.config.token_interval)
+            event(chunk({"content": piece}))
+        event(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event({"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                   "model": model, "choices": [], "usage": usage})
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _images(self, body: Dict[str, Any], rng: random.Random) -> None:
+        host, port = self.server.server_address[:2]
+        data = []
+        for _ in range(int(body.get("n") or 1)):
+            # Unique per request like real DALL-E URLs, so concurrent identical prompts do not share a file
+            image_id = f"{rng.getrandbits(32):08x}{next(self.server.owner.image_ids):08x}"
+            if body.get("response_format") == "b64_json":
+                data.append({"b64_json": base64.b64encode(_png(image_id)).decode(), "revised_prompt": body.get("prompt")})
+            else:
+                data.append({"url": f"http://{host}:{port}/images/{image_id}.png", "revised_prompt": body.get("prompt")})
+        self._send_json(200, {"created": int(time.time()), "data": data})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under benchmark concurrency (SYN retries stall for seconds)
+    request_queue_size = 256
+    owner: "FakeOpenAIServer"
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on a slow or stalled response close the socket; that is expected
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+class FakeOpenAIServer:
+    """Threaded fake OpenAI API; use as a context manager or call start()/stop()"""
+
+    def __init__(self, config: FakeServerConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeServerConfig()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._samplers = {}
+        self._counters: Dict[str, int] = {}
+        self.image_ids = itertools.count()
+        self.configure()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def search_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/search.json"
+
+    def configure(self, **changes) -> None:
+        """Update the configuration (e.g. rate_429=0.2); latency specs are validated"""
+        with self._lock:
+            known = {f.name for f in fields(FakeServerConfig)}
+            for key, value in changes.items():
+                if key not in known:
+                    raise ValueError(f"Unknown setting '{key}'")
+                setattr(self.config, key, value)
+            self._samplers = {"chat": parse_latency(self.config.latency),
+                              "images": parse_latency(self.config.image_latency),
+                              "search": parse_latency(self.config.search_latency),
+                              "pages": parse_latency(self.config.page_latency)}
+            if "seed" in changes:
+                self._rng = random.Random(self.config.seed)
+
+    def plan(self, endpoint: str, body: Dict[str, Any]) -> Tuple[random.Random, Optional[str], float]:
+        """(content rng, injected fault or None, latency) for one request"""
+        # Seeded by the prompt only, so streamed and plain requests get the same content
+        prompt = {k: v for k, v in body.items() if k not in ("stream", "stream_options", "n")}
+        digest = hashlib.sha256(json.dumps(prompt, sort_keys=True, default=str).encode()).digest()
+        content_rng = random.Random(int.from_bytes(digest[:8], "big") ^ self.config.seed)
+        with self._lock:
+            roll = self._rng.random()
+            delay = self._samplers[endpoint](self._rng)
+            config = self.config
+            if roll < config.rate_429:
+                fault = "429"
+            elif roll < config.rate_429 + config.rate_500:
+                fault = "500"
+            elif roll < config.rate_429 + config.rate_500 + config.rate_timeout:
+                fault = "timeout"
+            else:
+                fault = None
+            self._counters[endpoint] = self._counters.get(endpoint, 0) + 1
+            if fault:
+                self._counters[fault] = self._counters.get(fault, 0) + 1
+        return content_rng, fault, delay
+
+    def stats(self) -> Dict[str, int]:
+        """Requests per endpoint and injected faults so far"""
+        with self._lock:
+            return dict(self._counters)
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    for field in fields(FakeServerConfig):
+        kind = type(field.default)
+        parser.add_argument(f"--{field.name.replace('_', '-')}", default=field.default,
+                            type=(lambda value: value.lower() == "true") if kind is bool else kind)
+    args = parser.parse_args()
+    config = FakeServerConfig(**{f.name: getattr(args, f.name) for f in fields(FakeServerConfig)})
+    server = FakeOpenAIServer(config, args.host, args.port)
+    print(f"🧪 Fake OpenAI API on {server.base_url} ({config})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 from typing import Dict, Any
 
@@ -11,15 +12,125 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-1106-preview")
     OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+    # Alternative OpenAI-compatible endpoint, e.g. src/tools/fake_openai_server.py for offline runs
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4000"))
+    # Context tokens per agent prompt (JSON, e.g. {"linkedin_writer": 1500}); MAX_TOKENS otherwise
+    PROMPT_BUDGETS = json.loads(os.getenv("PROMPT_BUDGETS") or
+                                '{"blog_writer": 3000, "linkedin_writer": 1500, "content_strategist": 2000, "image_prompts": 600, '
+                                '"research_pages": 6000}')
 
     # LinkedIn Credentials
     LINKEDIN_CLIENT_ID = os.getenv("LINKEDIN_CLIENT_ID", "")
     LINKEDIN_CLIENT_SECRET = os.getenv("LINKEDIN_CLIENT_SECRET", "")
 
+    # Shared LLM HTTP client: connection pool size, keep-alive and timeouts (seconds)
+    LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+    LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "30"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+
+    # Hedged requests: secondary providers (comma-separated PROVIDERS names, empty disables) that
+    # get the same prompt when the primary is slower than its recent HEDGE_PERCENTILE latency
+    HEDGE_PROVIDERS = [p.strip() for p in os.getenv("HEDGE_PROVIDERS", "").split(",") if p.strip()]
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "30"))
+    HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+
+    # LLM response cache (SQLite file shared by workers, e.g. llm_cache.sqlite; off by default).
+    # Sampled generations repeat verbatim while cached, so the UI can bypass it per run
+    LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "")
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+    # Route clear requests with the local query classifier; the LLM only sees ambiguous ones
+    QUERY_FAST_PATH = os.getenv("QUERY_FAST_PATH", "true").lower() == "true"
+    QUERY_FAST_PATH_CONFIDENCE = float(os.getenv("QUERY_FAST_PATH_CONFIDENCE", "0.8"))
+
+    # Blog mode: "single" (one completion) or "long_form" (outline, then sections written in parallel)
+    BLOG_MODE = os.getenv("BLOG_MODE", "single")
+    BLOG_LONG_FORM_WORDS = int(os.getenv("BLOG_LONG_FORM_WORDS", "3000"))
+    BLOG_MAX_SECTIONS = int(os.getenv("BLOG_MAX_SECTIONS", "8"))
+
+    # Research mode: "two_call" (insights, then summary) or "structured" (one JSON-schema call)
+    RESEARCH_MODE = os.getenv("RESEARCH_MODE", "two_call")
+
+    # Reuse research for near-duplicate topics (SQLite file shared by workers, e.g.
+    # research_index.sqlite; off by default) when their estimated word overlap reaches the threshold
+    RESEARCH_INDEX_DB = os.getenv("RESEARCH_INDEX_DB", "")
+    RESEARCH_REUSE_THRESHOLD = float(os.getenv("RESEARCH_REUSE_THRESHOLD", "0.8"))
+    RESEARCH_REUSE_MAX_AGE_SECONDS = float(os.getenv("RESEARCH_REUSE_MAX_AGE_SECONDS", str(24 * 3600)))
+    RESEARCH_INDEX_MAX_ENTRIES = int(os.getenv("RESEARCH_INDEX_MAX_ENTRIES", "50000"))
+
     # Search Settings
     SERP_API_KEY = os.getenv("SERP_API_KEY")
     SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "10"))
+    SERP_API_URL = os.getenv("SERP_API_URL", "https://serpapi.com/search.json")
+    # SERP result cache (SQLite file shared by workers, e.g. search_cache.sqlite; off by default).
+    # Entries are fresh for the TTL, then served stale and refreshed in the background for
+    # SEARCH_CACHE_STALE_SECONDS more
+    SEARCH_CACHE_DB = os.getenv("SEARCH_CACHE_DB", "")
+    SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(6 * 3600)))
+    SEARCH_CACHE_STALE_SECONDS = float(os.getenv("SEARCH_CACHE_STALE_SECONDS", str(7 * 24 * 3600)))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000"))
+    # Full text of the top PAGE_FETCH_COUNT results is fetched concurrently for insight extraction
+    # (0 uses snippets only); each page is cut off at PAGE_MAX_BYTES or PAGE_FETCH_TIMEOUT seconds
+    PAGE_FETCH_COUNT = int(os.getenv("PAGE_FETCH_COUNT", "5"))
+    PAGE_FETCH_TIMEOUT = float(os.getenv("PAGE_FETCH_TIMEOUT", "8"))
+    PAGE_MAX_BYTES = int(os.getenv("PAGE_MAX_BYTES", str(1024 * 1024)))
+    PAGE_MAX_CHARS = int(os.getenv("PAGE_MAX_CHARS", "8000"))
+    PAGE_FETCH_POOL_SIZE = int(os.getenv("PAGE_FETCH_POOL_SIZE", "10"))
+    PAGE_USER_AGENT = os.getenv("PAGE_USER_AGENT", "Mozilla/5.0 (compatible; AutoBlogWriter research)")
+
+    # Downloaded and processed images go under raw/ and processed/ here (empty: generated_images/)
+    IMAGE_OUTPUT_DIR = os.getenv("IMAGE_OUTPUT_DIR", "")
+
+    # HTTP Settings
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+    LINKEDIN_TIMEOUT = float(os.getenv("LINKEDIN_TIMEOUT", "15"))
+
+    # Retries of transient failures (attempts include the first call; full-jitter backoff in seconds)
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+    # Longest Retry-After we wait for; a longer one fails the call at once
+    RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "30"))
+    # Circuit breakers: consecutive failures that open one, and seconds before a trial call
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+    # Workflow Settings
+    PARALLEL_WORKFLOW = os.getenv("PARALLEL_WORKFLOW", "false").lower() == "true"
+    # Start research alongside query analysis instead of after it
+    SPECULATIVE_RESEARCH = os.getenv("SPECULATIVE_RESEARCH", "false").lower() == "true"
+    # Default per-run latency budget in seconds (0 disables it) and the model used to catch up
+    LATENCY_BUDGET_SECONDS = float(os.getenv("LATENCY_BUDGET_SECONDS", "0"))
+    FAST_MODEL = os.getenv("FAST_MODEL", "gpt-4o-mini")
+    # SQLite file for durable, resumable checkpoints (in-memory when unset)
+    CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "")
+
+    # Rate Limits (per process) for the call scheduler
+    LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+    LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+    IMAGE_RPM = float(os.getenv("IMAGE_RPM", "7"))
+    # Per provider/model overrides, e.g. {"openai:gpt-4o": {"rpm": 500, "tpm": 30000}, "image": {"rpm": 5}}
+    RATE_LIMITS = json.loads(os.getenv("RATE_LIMITS", "{}"))
+
+    # Background Job Settings
+    JOB_DB = os.getenv("JOB_DB", "jobs.sqlite")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    # Let the Streamlit server run worker threads; jobs it submits carry an API key held only in its
+    # memory, so separately started workers (python -m src.jobs.worker) only take keyless jobs
+    JOB_SPAWN_WORKERS = os.getenv("JOB_SPAWN_WORKERS", "true").lower() == "true"
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    # Running jobs without a heartbeat for this long are handed to another worker; queued jobs whose
+    # API key holder (the submitting process) has been silent this long are failed
+    JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "900"))
+    # A job whose worker stalls this many times is failed instead of being handed on again
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Submit Generate Content to the job queue instead of running it in the Streamlit session
+    BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "false").lower() == "true"
 
     # LangSmith Settings
     LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
@@ -0,0 +1,232 @@
+"""Hedged LLM requests and provider failover.
+
+With HEDGE_PROVIDERS set (e.g. "anthropic,gemini"), get_hedged_model() wraps an agent's chat
+model in a HedgedModel that also holds the same-temperature model of each secondary provider
+that has an API key. invoke_llm / ainvoke_llm then race them:
+
+- The prompt goes to the primary first. If it has not answered by the hedge deadline, the same
+  prompt goes to the first secondary and the first answer wins.
+- The deadline is the HEDGE_PERCENTILE latency of recent successful calls with the same name
+  and model (HEDGE_DELAY_SECONDS until HEDGE_MIN_SAMPLES calls have been seen), so only the
+  slow tail is duplicated. It runs from when the attempt starts, so time a sync call spends
+  waiting for a pool thread does not count as provider latency.
+- A hard error from a provider fails over to the next one straight away.
+- The losing async call is cancelled. A losing sync call cannot be interrupted mid-request: its
+  thread finishes in the background and the result is dropped.
+
+stream_llm / astream_llm only fail over, and only before the first token has been emitted,
+because streamed text cannot be taken back.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextvars import copy_context
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import Config
+from .scheduler import llm_key
+
+
+class HedgedModel:
+    """A primary chat model plus the secondary models used for hedging and failover"""
+
+    def __init__(self, primary: Any, secondaries: List[Any]):
+        self.primary = primary
+        self.secondaries = list(secondaries)
+
+    @property
+    def models(self) -> List[Any]:
+        return [self.primary] + self.secondaries
+
+    def __repr__(self) -> str:
+        names = ", ".join("/".join(llm_key(m)) for m in self.models)
+        return f"HedgedModel({names})"
+
+
+def primary_model(llm: Any) -> Any:
+    """The model a call is attributed to for caching: the primary of a HedgedModel, else llm itself"""
+    return llm.primary if isinstance(llm, HedgedModel) else llm
+
+
+class LatencyTracker:
+    """Recent successful call latencies per key, for percentile hedge deadlines"""
+
+    def __init__(self, window: int = None, percentile: float = None, min_samples: int = None,
+                 default_delay: float = None):
+        self.window = Config.HEDGE_WINDOW if window is None else window
+        self.percentile = Config.HEDGE_PERCENTILE if percentile is None else percentile
+        self.min_samples = Config.HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.default_delay = Config.HEDGE_DELAY_SECONDS if default_delay is None else default_delay
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def deadline(self, key: str) -> float:
+        """Seconds to wait for the primary before hedging"""
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+
+_tracker: Optional[LatencyTracker] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_tracker() -> LatencyTracker:
+    global _tracker
+    with _lock:
+        if _tracker is None:
+            _tracker = LatencyTracker()
+        return _tracker
+
+
+def set_tracker(tracker: LatencyTracker) -> None:
+    global _tracker
+    with _lock:
+        _tracker = tracker
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.LLM_POOL_SIZE, thread_name_prefix="hedge")
+        return _executor
+
+
+def _latency_key(name: str, llm: Any) -> str:
+    provider, model = llm_key(llm)
+    return f"{name}:{provider}:{model}"
+
+
+def _label(llm: Any) -> str:
+    return "/".join(llm_key(llm))
+
+
+def hedged_call(hedged: HedgedModel, name: str, send: Callable[[Any], Tuple[Any, float]],
+                call: Dict[str, Any]) -> Tuple[Any, float]:
+    """Run `send(model)` on the primary, hedging and failing over to the secondaries.
+
+    Returns the winning (response, queue_ms). The call record gets the winning `provider`,
+    whether a hedge was sent and the errors that caused failovers.
+    """
+    tracker = get_tracker()
+    models = hedged.models
+    pending: Dict[Any, Any] = {}
+    errors: List[str] = []
+    next_model = 0
+    call["hedged"] = False
+    # Start time of the latest launched attempt, set once a pool thread picks it up
+    running = threading.Event()
+    started_at = [0.0]
+
+    def launch() -> None:
+        nonlocal next_model
+        model = models[next_model]
+        next_model += 1
+        running.clear()
+
+        def attempt():
+            started_at[0] = started = time.perf_counter()
+            running.set()
+            result = send(model)
+            tracker.record(_latency_key(name, model), time.perf_counter() - started)
+            return result
+
+        # copy_context keeps the node timer and scheduling session in the worker thread
+        pending[_pool().submit(copy_context().run, attempt)] = model
+
+    launch()
+    deadline = tracker.deadline(_latency_key(name, hedged.primary))
+    while pending:
+        can_hedge = not call["hedged"] and next_model < len(models)
+        timeout = None
+        if can_hedge:
+            # Only the one attempt is pending here; it cannot finish before it starts
+            running.wait()
+            timeout = max(0.0, started_at[0] + deadline - time.perf_counter())
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            call["hedged"] = True
+            launch()
+            continue
+        for future in done:
+            model = pending.pop(future)
+            try:
+                response, queue_ms = future.result()
+            except Exception as e:
+                errors.append(f"{_label(model)}: {e}")
+                call["failovers"] = errors
+                if not pending and next_model < len(models):
+                    launch()
+                continue
+            for loser in pending:
+                loser.cancel()
+            call["provider"] = _label(model)
+            return response, queue_ms
+    raise RuntimeError(f"All providers failed for {name}: {'; '.join(errors)}")
+
+
+async def ahedged_call(hedged: HedgedModel, name: str, send: Callable[[Any], Awaitable[Tuple[Any, float]]],
+                       call: Dict[str, Any]) -> Tuple[Any, float]:
+    """Async variant of hedged_call; the losing request is cancelled"""
+    tracker = get_tracker()
+    models = hedged.models
+    pending: Dict[asyncio.Task, Any] = {}
+    errors: List[str] = []
+    next_model = 0
+    call["hedged"] = False
+
+    def launch() -> None:
+        nonlocal next_model
+        model = models[next_model]
+        next_model += 1
+
+        async def attempt():
+            started = time.perf_counter()
+            result = await send(model)
+            tracker.record(_latency_key(name, model), time.perf_counter() - started)
+            return result
+
+        pending[asyncio.ensure_future(attempt())] = model
+
+    launch()
+    deadline = tracker.deadline(_latency_key(name, hedged.primary))
+    try:
+        while pending:
+            can_hedge = not call["hedged"] and next_model < len(models)
+            done, _ = await asyncio.wait(list(pending), timeout=deadline if can_hedge else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                call["hedged"] = True
+                launch()
+                continue
+            for task in done:
+                model = pending.pop(task)
+                try:
+                    response, queue_ms = task.result()
+                except Exception as e:
+                    errors.append(f"{_label(model)}: {e}")
+                    call["failovers"] = errors
+                    if not pending and next_model < len(models):
+                        launch()
+                    continue
+                call["provider"] = _label(model)
+                return response, queue_ms
+    finally:
+        for task in pending:
+            task.cancel()
+    raise RuntimeError(f"All providers failed for {name}: {'; '.join(errors)}")
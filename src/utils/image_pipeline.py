@@ -1,19 +1,32 @@
 import os
+import asyncio
 import requests
 from PIL import Image
 from io import BytesIO
+from .config import Config
+from .instrumentation import track_call
+from .resilience import retry_call, aretry_call
 
-def download_image(url: str, save_dir: str, filename: str = None) -> str:
-    """Download image from URL and save locally. Returns saved file path."""
+def _save_path(url: str, save_dir: str, filename: str = None) -> str:
+    """Resolve the local path a downloaded image is written to."""
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
     if not filename:
         filename = os.path.basename(url.split('?')[0])
         if not filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
             filename += '.png'
-    save_path = os.path.join(save_dir, filename)
-    response = requests.get(url)
-    response.raise_for_status()
+    return os.path.join(save_dir, filename)
+
+def download_image(url: str, save_dir: str, filename: str = None) -> str:
+    """Download image from URL and save locally. Returns saved file path."""
+    save_path = _save_path(url, save_dir, filename)
+    with track_call("http", "image_download") as call:
+        def attempt():
+            response = requests.get(url, timeout=Config.HTTP_TIMEOUT)
+            response.raise_for_status()
+            return response
+        response = retry_call("image_download", attempt, call)
+        call["bytes"] = len(response.content)
     with open(save_path, 'wb') as f:
         f.write(response.content)
     return save_path
@@ -41,3 +54,33 @@ def pipeline(image_urls: list, save_dir: str, output_dir: str, resize: tuple = (
         except Exception as e:
             print(f"Error processing {url}: {e}")
     return processed_files
+
+async def adownload_image(client, url: str, save_dir: str, filename: str = None) -> str:
+    """Download image with a shared httpx.AsyncClient and save locally. Returns saved file path."""
+    save_path = _save_path(url, save_dir, filename)
+    with track_call("http", "image_download") as call:
+        async def attempt():
+            response = await client.get(url)
+            response.raise_for_status()
+            return response
+        response = await aretry_call("image_download", attempt, call)
+        call["bytes"] = len(response.content)
+    with open(save_path, 'wb') as f:
+        f.write(response.content)
+    return save_path
+
+async def apipeline(image_urls: list, save_dir: str, output_dir: str, resize: tuple = (1024, 1024), fmt: str = 'PNG') -> list:
+    """Async pipeline: downloads run concurrently, resizing runs in worker threads. Returns processed file paths."""
+    import httpx
+
+    async def _one(client, url):
+        try:
+            raw_path = await adownload_image(client, url, save_dir)
+            return await asyncio.to_thread(process_image, raw_path, output_dir, resize, fmt)
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            return None
+
+    async with httpx.AsyncClient(timeout=Config.HTTP_TIMEOUT, follow_redirects=True) as client:
+        results = await asyncio.gather(*[_one(client, url) for url in image_urls])
+    return [path for path in results if path]
@@ -0,0 +1,370 @@
+"""Per-node latency and token instrumentation.
+
+Each workflow node runs inside track_node(); every LLM, HTTP or image call made while it runs
+is recorded through track_call() (or the invoke_llm/ainvoke_llm helpers) and attached to that
+node's record. The records end up in the `timings` field of ContentMarketingState:
+
+    {"node": "research", "started_at": 1700000000.0, "wall_ms": 8123.4,
+     "prompt_tokens": 950, "completion_tokens": 610, "retries": 0, "bytes_downloaded": 48213,
+     "queue_ms": 0.0,
+     "calls": [{"kind": "http", "name": "serpapi", "started_at": ..., "wall_ms": 412.0, ...}, ...]}
+
+The active node is tracked with a context variable, so concurrent nodes (threads or asyncio
+tasks) each collect only their own calls.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from .scheduler import get_scheduler, llm_key, estimate_tokens
+from .llm_cache import get_cache, cache_key, cache_bypassed
+from .hedging import HedgedModel, hedged_call, ahedged_call, primary_model
+from .resilience import retry_call, aretry_call, is_transient
+
+_current_node: ContextVar[Optional["NodeTimer"]] = ContextVar("current_node", default=None)
+
+
+class NodeTimer:
+    """Collects wall time and the calls made while a node runs"""
+
+    def __init__(self, node: str):
+        self.node = node
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.wall_ms = 0.0
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_call(self, call: Dict[str, Any]) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def stop(self) -> None:
+        self.wall_ms = round((time.perf_counter() - self._start) * 1000, 2)
+
+    def as_record(self) -> Dict[str, Any]:
+        calls = list(self.calls)
+        return {
+            "node": self.node,
+            "started_at": self.started_at,
+            "wall_ms": self.wall_ms,
+            "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in calls),
+            "completion_tokens": sum(c.get("completion_tokens", 0) for c in calls),
+            "retries": sum(c.get("retries", 0) for c in calls),
+            "bytes_downloaded": sum(c.get("bytes", 0) for c in calls),
+            "queue_ms": round(sum(c.get("queue_ms", 0.0) for c in calls), 2),
+            "prompt_tokens_saved": sum(c.get("tokens_saved", 0) for c in calls),
+            "calls": calls,
+        }
+
+
+@contextmanager
+def track_node(node: str):
+    """Time a workflow node and collect the calls made inside it"""
+    timer = NodeTimer(node)
+    token = _current_node.set(timer)
+    try:
+        yield timer
+    finally:
+        timer.stop()
+        _current_node.reset(token)
+
+
+@contextmanager
+def track_call(kind: str, name: str):
+    """Time one external call; the yielded dict can be filled with tokens, bytes or retries.
+
+    Calls made outside any node are timed but not recorded anywhere.
+    """
+    call = {
+        "kind": kind,
+        "name": name,
+        "started_at": time.time(),
+        "wall_ms": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "retries": 0,
+        "bytes": 0,
+        "queue_ms": 0.0,
+    }
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call["error"] = str(e)
+        raise
+    finally:
+        call["wall_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        timer = _current_node.get()
+        if timer is not None:
+            timer.add_call(call)
+
+
+def _usage(response: Any) -> Dict[str, int]:
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+        }
+    return {"input_tokens": usage.get("input_tokens", 0) or 0, "output_tokens": usage.get("output_tokens", 0) or 0}
+
+
+def record_usage(call: Dict[str, Any], response: Any) -> None:
+    """Copy token usage from a LangChain chat response into a call record"""
+    usage = _usage(response)
+    call["prompt_tokens"] += usage["input_tokens"]
+    call["completion_tokens"] += usage["output_tokens"]
+
+
+def _cache_lookup(llm, messages: list, call: Dict[str, Any], options: Dict[str, Any] = None):
+    """(key, cached AIMessage or None); the key is None when caching is off"""
+    cache = get_cache()
+    if cache is None:
+        return None, None
+    key = cache_key(llm, messages, options)
+    if cache_bypassed():
+        call["cache"] = "bypass"
+        return key, None
+    content = cache.get(key)
+    call["cache"] = "miss" if content is None else "hit"
+    if content is None:
+        return key, None
+    from langchain_core.messages import AIMessage
+    return key, AIMessage(content=content)
+
+
+def _cache_store(llm, key: Optional[str], response: Any, call: Dict[str, Any]) -> None:
+    # The key is the primary's: an answer from a secondary that won a hedge or failover is not stored
+    label = "/".join(llm_key(llm))
+    if key is not None and call.get("provider", label) == label and isinstance(getattr(response, "content", None), str):
+        get_cache().put(key, llm_key(llm)[1], response.content)
+
+
+# Call options only the OpenAI API accepts, dropped for secondaries of other providers
+_OPENAI_OPTIONS = ("response_format",)
+
+
+def _options_for(model, primary, options: Dict[str, Any]) -> Dict[str, Any]:
+    if model is primary or llm_key(model)[0] == "openai":
+        return options
+    return {name: value for name, value in options.items() if name not in _OPENAI_OPTIONS}
+
+
+def _dependency(llm) -> str:
+    """Circuit-breaker name of a model, e.g. llm:openai/gpt-4o"""
+    return "llm:" + "/".join(llm_key(llm))
+
+
+def _attempts(llm, models: list) -> Optional[int]:
+    """A hedged provider with a fallback after it fails over instead of retrying"""
+    return 1 if llm is not models[-1] else None
+
+
+def _send(llm, messages: list, options: Dict[str, Any], call: Dict[str, Any] = None, attempts: int = None):
+    """One scheduled model call, retried on transient errors; returns (response, time spent queued in ms)"""
+    scheduler = get_scheduler()
+    queued = 0.0
+
+    def attempt():
+        nonlocal queued
+        ticket = scheduler.acquire(llm_key(llm), estimate_tokens(messages))
+        queued += ticket.wait_ms
+        try:
+            response = llm.invoke(messages, **options)
+        except BaseException:
+            # A failed call gives its reserved tokens back, so its retries are not throttled by them
+            scheduler.refund(ticket)
+            raise
+        usage = _usage(response)
+        scheduler.settle(ticket, usage["input_tokens"] + usage["output_tokens"])
+        return response
+
+    return retry_call(_dependency(llm), attempt, call, attempts=attempts), queued
+
+
+async def _asend(llm, messages: list, options: Dict[str, Any], call: Dict[str, Any] = None,
+                 attempts: int = None):
+    scheduler = get_scheduler()
+    queued = 0.0
+
+    async def attempt():
+        nonlocal queued
+        ticket = await scheduler.aacquire(llm_key(llm), estimate_tokens(messages))
+        queued += ticket.wait_ms
+        try:
+            response = await llm.ainvoke(messages, **options)
+        except BaseException:
+            scheduler.refund(ticket)
+            raise
+        usage = _usage(response)
+        scheduler.settle(ticket, usage["input_tokens"] + usage["output_tokens"])
+        return response
+
+    return await aretry_call(_dependency(llm), attempt, call, attempts=attempts), queued
+
+
+def invoke_llm(llm, messages: list, name: str, **options):
+    """llm.invoke with caching, scheduling, retries, hedging, timing and token capture.
+
+    `options` are passed to the model call (e.g. response_format) and are part of the cache key.
+    A HedgedModel is raced against its secondaries (see hedging.py).
+    """
+    primary = primary_model(llm)
+    with track_call("llm", name) as call:
+        key, cached = _cache_lookup(primary, messages, call, options)
+        if cached is not None:
+            return cached
+        if isinstance(llm, HedgedModel):
+            response, call["queue_ms"] = hedged_call(
+                llm, name,
+                lambda model: _send(model, messages, _options_for(model, primary, options), call,
+                                    _attempts(model, llm.models)),
+                call)
+        else:
+            response, call["queue_ms"] = _send(llm, messages, options, call)
+        record_usage(call, response)
+        _cache_store(primary, key, response, call)
+    return response
+
+
+async def ainvoke_llm(llm, messages: list, name: str, **options):
+    """llm.ainvoke with caching, scheduling, retries, hedging, timing and token capture"""
+    primary = primary_model(llm)
+    with track_call("llm", name) as call:
+        key, cached = _cache_lookup(primary, messages, call, options)
+        if cached is not None:
+            return cached
+        if isinstance(llm, HedgedModel):
+            response, call["queue_ms"] = await ahedged_call(
+                llm, name,
+                lambda model: _asend(model, messages, _options_for(model, primary, options), call,
+                                     _attempts(model, llm.models)),
+                call)
+        else:
+            response, call["queue_ms"] = await _asend(llm, messages, options, call)
+        record_usage(call, response)
+        _cache_store(primary, key, response, call)
+    return response
+
+
+def _failover_models(llm) -> list:
+    return llm.models if isinstance(llm, HedgedModel) else [llm]
+
+
+def stream_llm(llm, messages: list, name: str, on_token: Callable[[str], None]):
+    """llm.stream with caching, scheduling, timing and token capture; each text chunk is passed to on_token.
+
+    Returns the aggregated message, so callers can read .content as with invoke_llm. Transient
+    errors before the first token are retried; a HedgedModel then fails over to its secondaries.
+    """
+    scheduler = get_scheduler()
+    primary = primary_model(llm)
+    with track_call("llm", name) as call:
+        key, cached = _cache_lookup(primary, messages, call)
+        if cached is not None:
+            on_token(cached.content)
+            return cached
+        models = _failover_models(llm)
+        ticket = response = None
+
+        def attempt():
+            nonlocal ticket, response
+            ticket = scheduler.acquire(llm_key(model), estimate_tokens(messages))
+            call["queue_ms"] += ticket.wait_ms
+            try:
+                for chunk in model.stream(messages):
+                    if chunk.content:
+                        on_token(chunk.content)
+                    response = chunk if response is None else response + chunk
+            except BaseException:
+                # A stream cut off mid-way keeps its estimate: part of it was generated
+                if response is None:
+                    scheduler.refund(ticket)
+                raise
+
+        for index, model in enumerate(models):
+            response = None
+            try:
+                # Retried only while nothing has been streamed
+                retry_call(_dependency(model), attempt, call, attempts=_attempts(model, models),
+                           retryable=lambda e: response is None and is_transient(e))
+                break
+            except Exception as e:
+                if response is not None or index == len(models) - 1:
+                    raise
+                call.setdefault("failovers", []).append(f"{'/'.join(llm_key(model))}: {e}")
+        if len(models) > 1:
+            call["provider"] = "/".join(llm_key(model))
+        record_usage(call, response)
+        scheduler.settle(ticket, call["prompt_tokens"] + call["completion_tokens"])
+        _cache_store(primary, key, response, call)
+    return response
+
+
+async def astream_llm(llm, messages: list, name: str, on_token: Callable[[str], None]):
+    """llm.astream with caching, scheduling, timing and token capture; each text chunk is passed to on_token"""
+    scheduler = get_scheduler()
+    primary = primary_model(llm)
+    with track_call("llm", name) as call:
+        key, cached = _cache_lookup(primary, messages, call)
+        if cached is not None:
+            on_token(cached.content)
+            return cached
+        models = _failover_models(llm)
+        ticket = response = None
+
+        async def attempt():
+            nonlocal ticket, response
+            ticket = await scheduler.aacquire(llm_key(model), estimate_tokens(messages))
+            call["queue_ms"] += ticket.wait_ms
+            try:
+                async for chunk in model.astream(messages):
+                    if chunk.content:
+                        on_token(chunk.content)
+                    response = chunk if response is None else response + chunk
+            except BaseException:
+                if response is None:
+                    scheduler.refund(ticket)
+                raise
+
+        for index, model in enumerate(models):
+            response = None
+            try:
+                await aretry_call(_dependency(model), attempt, call, attempts=_attempts(model, models),
+                                  retryable=lambda e: response is None and is_transient(e))
+                break
+            except Exception as e:
+                if response is not None or index == len(models) - 1:
+                    raise
+                call.setdefault("failovers", []).append(f"{'/'.join(llm_key(model))}: {e}")
+        if len(models) > 1:
+            call["provider"] = "/".join(llm_key(model))
+        record_usage(call, response)
+        scheduler.settle(ticket, call["prompt_tokens"] + call["completion_tokens"])
+        _cache_store(primary, key, response, call)
+    return response
+
+
+def timed_node(node: str, fn: Callable) -> Callable:
+    """Wrap a sync node so its update carries a `timings` record"""
+    @functools.wraps(fn)
+    def wrapper(state):
+        with track_node(node) as timer:
+            update = fn(state)
+        return {**update, "timings": [timer.as_record()]}
+    return wrapper
+
+
+def atimed_node(node: str, fn: Callable) -> Callable:
+    """Wrap an async node so its update carries a `timings` record"""
+    @functools.wraps(fn)
+    async def wrapper(state):
+        with track_node(node) as timer:
+            update = await fn(state)
+        return {**update, "timings": [timer.as_record()]}
+    return wrapper
@@ -0,0 +1,88 @@
+"""Disk-backed cache of LLM responses, shared by every agent and worker process.
+
+invoke_llm / stream_llm (and their async twins) look up each request here before it is
+scheduled. The key is a hash of the provider, model, temperature and messages, so re-running
+the same topic while editing costs no API calls. Entries live in a SQLite file (LLM_CACHE_DB,
+empty by default, which disables caching) with a TTL (LLM_CACHE_TTL_SECONDS) and a size cap
+(LLM_CACHE_MAX_ENTRIES) enforced by evicting the least recently used entries. Only successful,
+non-empty responses are stored.
+
+Because a cached sampled generation comes back word for word, a run can skip the lookups with
+`with bypass_cache():` (the "Regenerate" path); its fresh responses replace the cached ones.
+"""
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from .config import Config
+from .sqlite_store import ProcessSingleton, SQLiteStore
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_cache(enabled: bool = True):
+    """Skip cache lookups for the calls made inside this block; their responses are still stored"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_bypassed() -> bool:
+    return _bypass.get()
+
+
+def cache_key(llm: Any, messages: list, options: Dict[str, Any] = None) -> str:
+    """Hash of provider, model, temperature, the messages sent and any extra call options"""
+    from .scheduler import llm_key
+    provider, model = llm_key(llm)
+    payload = {
+        "provider": provider,
+        "model": model,
+        "temperature": getattr(llm, "temperature", None),
+        "messages": [[getattr(m, "type", "text"), str(getattr(m, "content", m))] for m in messages],
+    }
+    if options:
+        payload["options"] = options
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMCache(SQLiteStore):
+    """SQLite response store with TTL and LRU eviction; safe across threads and processes"""
+
+    table = "responses"
+    label_column = "model"
+    value_column = "content"
+
+    def __init__(self, db_path: str = None, ttl: float = None, max_entries: int = None):
+        super().__init__(db_path or Config.LLM_CACHE_DB,
+                         Config.LLM_CACHE_TTL_SECONDS if ttl is None else ttl,
+                         Config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached content for `key`, or None on a miss (expired entries are removed)"""
+        found = self._lookup(key)
+        self._count("hits" if found is not None else "misses")
+        return found[0] if found is not None else None
+
+    def put(self, key: str, model: str, content: str) -> None:
+        """Store a successful response and evict the least recently used entries over the cap"""
+        if content:
+            self._store(key, model, content)
+
+
+_shared: ProcessSingleton[LLMCache] = ProcessSingleton(lambda: LLMCache() if Config.LLM_CACHE_DB else None)
+
+
+def get_cache() -> Optional[LLMCache]:
+    """The process-wide response cache, or None when LLM_CACHE_DB is empty"""
+    return _shared.get()
+
+
+def set_cache(cache: Optional[LLMCache]) -> None:
+    """Replace the process-wide cache; None turns caching off"""
+    _shared.set(cache)
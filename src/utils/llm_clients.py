@@ -0,0 +1,158 @@
+"""Shared LLM clients for every agent.
+
+Agents used to build their own ChatOpenAI, so each one had its own HTTP client, connection
+pool and TLS handshakes. get_chat_model() hands out one client per (provider, model,
+temperature, API key) instead, and all OpenAI traffic in the process (chat and DALL-E) goes
+through a single keep-alive httpx.Client sized by LLM_POOL_SIZE with LLM_TIMEOUT /
+LLM_CONNECT_TIMEOUT timeouts. The clients are thread-safe and shared across orchestrators.
+get_hedged_model() adds the HEDGE_PROVIDERS secondaries used for hedging and failover.
+
+Async calls use the SDK's own async client: an httpx.AsyncClient is tied to the event loop
+that opened its connections, and batch runs and job workers each start their own loop.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .config import Config
+
+# Provider names accepted by get_chat_model, with the default model and API-key variable
+PROVIDERS = {
+    "openai": {"model": None, "key_env": "OPENAI_API_KEY"},
+    "perplexity": {"model": "sonar-large-online", "key_env": "PERPLEXITY_API_KEY"},
+    "anthropic": {"model": "claude-3-sonnet-20240229", "key_env": "CLAUDE_API_KEY"},
+    "gemini": {"model": "gemini-pro", "key_env": "GEMINI_API_KEY"},
+}
+
+_lock = threading.Lock()
+_models: Dict[Tuple, Any] = {}
+_openai_clients: Dict[Tuple, Any] = {}
+_http_client = None
+
+
+def _key_hash(api_key: Optional[str]) -> str:
+    # Credentials are hashed so raw keys are never kept as dict keys
+    return hashlib.sha256((api_key or "").encode()).hexdigest()
+
+
+def http_client():
+    """The process-wide keep-alive httpx.Client used for OpenAI requests"""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            import httpx
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=Config.LLM_POOL_SIZE,
+                    max_keepalive_connections=Config.LLM_POOL_SIZE,
+                    keepalive_expiry=Config.LLM_KEEPALIVE_SECONDS,
+                ),
+                timeout=httpx.Timeout(Config.LLM_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT),
+            )
+        return _http_client
+
+
+def get_chat_model(provider: str = "openai", model: str = None, temperature: float = None,
+                   api_key: str = None):
+    """Shared LangChain chat model for these settings, created on first use"""
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unsupported LLM provider: {provider}")
+    defaults = PROVIDERS[provider]
+    model = model or defaults["model"] or Config.OPENAI_MODEL
+    temperature = Config.OPENAI_TEMPERATURE if temperature is None else temperature
+    api_key = api_key or os.getenv(defaults["key_env"], "") or (Config.OPENAI_API_KEY if provider == "openai" else "")
+
+    key = (provider, model, temperature, _key_hash(api_key), Config.OPENAI_BASE_URL if provider == "openai" else None)
+    with _lock:
+        llm = _models.get(key)
+    if llm is not None:
+        return llm
+
+    llm = _build_chat_model(provider, model, temperature, api_key)
+    with _lock:
+        # Another thread may have built the same client meanwhile; keep the first one
+        return _models.setdefault(key, llm)
+
+
+def get_hedged_model(provider: str = "openai", model: str = None, temperature: float = None,
+                     api_key: str = None):
+    """get_chat_model plus a HedgedModel wrapper when HEDGE_PROVIDERS lists usable secondaries.
+
+    Secondaries use their provider's default model and API key; providers without a key or
+    without their LangChain package installed are skipped.
+    """
+    primary = get_chat_model(provider, model, temperature, api_key)
+    secondaries = []
+    for name in Config.HEDGE_PROVIDERS:
+        if name == provider or name not in PROVIDERS:
+            continue
+        if not (os.getenv(PROVIDERS[name]["key_env"]) or (name == "openai" and Config.OPENAI_API_KEY)):
+            continue
+        try:
+            secondaries.append(get_chat_model(name, temperature=temperature))
+        except ImportError as e:
+            print(f"Hedging provider {name} unavailable: {e}")
+    if not secondaries:
+        return primary
+
+    from .hedging import HedgedModel
+    key = ("hedged", provider, model, temperature, _key_hash(api_key), Config.OPENAI_BASE_URL,
+           tuple(Config.HEDGE_PROVIDERS))
+    with _lock:
+        return _models.setdefault(key, HedgedModel(primary, secondaries))
+
+
+def _build_chat_model(provider: str, model: str, temperature: float, api_key: str):
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=api_key,
+            base_url=Config.OPENAI_BASE_URL,
+            timeout=Config.LLM_TIMEOUT,
+            max_retries=0,
+            http_client=http_client(),
+        )
+    if provider == "perplexity":
+        from langchain_perplexity import ChatPerplexity
+        return ChatPerplexity(model=model, temperature=temperature, api_key=api_key, timeout=Config.LLM_TIMEOUT,
+                              max_retries=0)
+    if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic(model=model, temperature=temperature, api_key=api_key, timeout=Config.LLM_TIMEOUT,
+                             max_retries=0)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, api_key=api_key, timeout=Config.LLM_TIMEOUT,
+                                  max_retries=0)
+
+
+def get_openai_client(api_key: str = None):
+    """Shared openai.OpenAI client (used for DALL-E) on the pooled HTTP client"""
+    api_key = api_key or Config.OPENAI_API_KEY
+    key = (_key_hash(api_key), Config.OPENAI_BASE_URL)
+    with _lock:
+        client = _openai_clients.get(key)
+    if client is not None:
+        return client
+    import openai
+    client = openai.OpenAI(api_key=api_key, base_url=Config.OPENAI_BASE_URL, timeout=Config.LLM_TIMEOUT,
+                           max_retries=0, http_client=http_client())
+    with _lock:
+        return _openai_clients.setdefault(key, client)
+
+
+def clear() -> int:
+    """Forget every shared client (the HTTP pool stays open); returns how many were dropped"""
+    with _lock:
+        count = len(_models) + len(_openai_clients)
+        _models.clear()
+        _openai_clients.clear()
+    return count
+
+
+def cached_count() -> int:
+    """Number of chat models and OpenAI clients currently shared"""
+    with _lock:
+        return len(_models) + len(_openai_clients)
@@ -0,0 +1,258 @@
+"""Concurrent fetching of search-result pages into clean article text.
+
+fetch_pages / afetch_pages download the given URLs side by side (threads over one pooled
+httpx.Client, or one httpx.AsyncClient), so the stage takes about as long as the slowest page:
+
+- Each page is streamed and fed to an incremental HTML parser as it arrives. The download stops
+  at PAGE_MAX_BYTES, at PAGE_FETCH_TIMEOUT seconds, or once there is plenty more than
+  PAGE_MAX_CHARS of text.
+- Boilerplate is dropped while parsing: scripts, styles, navigation, headers, footers, sidebars,
+  forms and elements whose class or id looks like a menu, cookie banner, share bar, comment
+  list or ad. When the page has <article> or <main> text, only that is kept.
+- Short fragments (link lists, buttons, captions) and repeated blocks are dropped afterwards.
+
+Non-HTML responses and failed pages are skipped: the research step falls back to that result's
+snippet. Pages are not retried, a slow page is simply cut off. Each page is recorded as an
+"http" call named "page_fetch" with the bytes downloaded.
+"""
+import asyncio
+import codecs
+import functools
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+from .instrumentation import track_call
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "nav", "header", "footer",
+             "aside", "form", "button", "select", "textarea", "figure", "menu", "dialog"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+              "blockquote", "pre", "td", "th", "tr", "table", "dd", "dt", "br", "hr"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_BOILERPLATE = re.compile(r"(^|[-_ ])(nav|navbar|menu|header|footer|sidebar|cookie|consent|banner|subscribe|"
+                          r"newsletter|share|social|comments?|related|advert|ads?|promo|breadcrumbs?|popup|modal|"
+                          r"signup|login)([-_ ]|$)", re.I)
+_SPACE = re.compile(r"\s+")
+MIN_BLOCK_WORDS = 6
+
+_client = None
+_lock = threading.Lock()
+
+
+class PageTextParser(HTMLParser):
+    """Incremental HTML to text: feed() chunks as they arrive, then text()"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._skip: List[str] = []  # open boilerplate elements
+        self._in_title = False
+        self._main_depth = 0
+        self._blocks: List[str] = []
+        self._main_blocks: List[str] = []
+        self._current: List[str] = []
+        self.chars = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in VOID_TAGS:
+            if tag in ("br", "hr"):
+                self._flush()
+            return
+        if self._skip:
+            self._skip.append(tag)
+            return
+        marker = " ".join(value or "" for name, value in attrs if name in ("class", "id", "role"))
+        if tag in SKIP_TAGS or (marker and _BOILERPLATE.search(marker) and tag not in ("body", "html", "main", "article")):
+            self._flush()
+            self._skip.append(tag)
+        elif tag == "title":
+            self._in_title = True
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag in ("article", "main"):
+                self._main_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip:
+            # Pop back to the matching start tag; unclosed children of it go with it
+            if tag in self._skip:
+                while self._skip and self._skip.pop() != tag:
+                    pass
+            return
+        if tag == "title":
+            self._in_title = False
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag in ("article", "main") and self._main_depth:
+                self._main_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._skip:
+            return
+        if self._in_title:
+            self.title += data
+        else:
+            self._current.append(data)
+
+    def _flush(self) -> None:
+        block = _SPACE.sub(" ", "".join(self._current)).strip()
+        self._current = []
+        if not block:
+            return
+        self._blocks.append(block)
+        if self._main_depth:
+            self._main_blocks.append(block)
+        self.chars += len(block)
+
+    def text(self) -> str:
+        """Clean article text: main content when the page marks it, long blocks only, no repeats"""
+        self._flush()
+        blocks = self._main_blocks if sum(map(len, self._main_blocks)) >= 200 else self._blocks
+        seen, kept = set(), []
+        for block in blocks:
+            if len(block.split()) < MIN_BLOCK_WORDS or block in seen:
+                continue
+            seen.add(block)
+            kept.append(block)
+        return "\n\n".join(kept)
+
+
+def _is_html(content_type: str) -> bool:
+    return not content_type or "html" in content_type.lower()
+
+
+def _page(url: str, parser: PageTextParser, size: int, truncated: bool) -> Dict[str, Any]:
+    text = parser.text()[:Config.PAGE_MAX_CHARS]
+    return {"url": url, "title": _SPACE.sub(" ", parser.title).strip(), "text": text, "bytes": size,
+            "truncated": truncated}
+
+
+def _limits():
+    import httpx
+    return httpx.Limits(max_connections=Config.PAGE_FETCH_POOL_SIZE,
+                        max_keepalive_connections=Config.PAGE_FETCH_POOL_SIZE)
+
+
+def _timeout():
+    import httpx
+    return httpx.Timeout(Config.PAGE_FETCH_TIMEOUT, connect=min(Config.PAGE_FETCH_TIMEOUT, 5.0))
+
+
+@functools.lru_cache(maxsize=1)
+def _ssl_context():
+    """One SSL context for every async client: loading the CA bundle takes tens of ms and blocks the loop"""
+    import httpx
+    return httpx.create_ssl_context()
+
+
+def page_client():
+    """The process-wide keep-alive httpx.Client used for page fetches"""
+    global _client
+    with _lock:
+        if _client is None:
+            import httpx
+            _client = httpx.Client(limits=_limits(), timeout=_timeout(), follow_redirects=True,
+                                   headers={"User-Agent": Config.PAGE_USER_AGENT})
+        return _client
+
+
+class _Reader:
+    """Feeds streamed bytes to a PageTextParser until a byte, time or text limit is reached"""
+
+    def __init__(self, response, deadline: float):
+        self.parser = PageTextParser()
+        self.decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        self.deadline = deadline
+        self.size = 0
+        self.truncated = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse one chunk; False when the download should stop"""
+        chunk = chunk[:max(0, Config.PAGE_MAX_BYTES - self.size)]
+        self.size += len(chunk)
+        self.parser.feed(self.decoder.decode(chunk))
+        if self.size >= Config.PAGE_MAX_BYTES or time.monotonic() >= self.deadline \
+                or self.parser.chars >= Config.PAGE_MAX_CHARS * 2:
+            self.truncated = True
+            return False
+        return True
+
+
+def fetch_page(url: str, client=None) -> Optional[Dict[str, Any]]:
+    """One page as {"url", "title", "text", "bytes", "truncated"}, or None when it is unusable"""
+    client = client or page_client()
+    reader = None
+    with track_call("http", "page_fetch") as call:
+        try:
+            with client.stream("GET", url, timeout=_timeout()) as response:
+                response.raise_for_status()
+                if _is_html(response.headers.get("content-type", "")):
+                    reader = _Reader(response, time.monotonic() + Config.PAGE_FETCH_TIMEOUT)
+                    for chunk in response.iter_bytes():
+                        if not reader.feed(chunk):
+                            break
+        except Exception as e:
+            print(f"Page fetch failed for {url}: {e.__class__.__name__}")
+            reader = None
+        call["bytes"] = reader.size if reader else 0
+    if reader is None:
+        return None
+    page = _page(url, reader.parser, reader.size, reader.truncated)
+    return page if page["text"] else None
+
+
+async def afetch_page(client, url: str) -> Optional[Dict[str, Any]]:
+    """Async variant of fetch_page with a shared httpx.AsyncClient; the time limit is enforced by cancellation"""
+    reader = None
+
+    async def download():
+        nonlocal reader
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            if not _is_html(response.headers.get("content-type", "")):
+                return
+            reader = _Reader(response, time.monotonic() + Config.PAGE_FETCH_TIMEOUT)
+            async for chunk in response.aiter_bytes():
+                if not reader.feed(chunk):
+                    break
+
+    with track_call("http", "page_fetch") as call:
+        try:
+            await asyncio.wait_for(download(), Config.PAGE_FETCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            if reader is not None:
+                reader.truncated = True  # keep what arrived before the deadline
+        except Exception as e:
+            print(f"Page fetch failed for {url}: {e.__class__.__name__}")
+            reader = None
+        call["bytes"] = reader.size if reader else 0
+    if reader is None:
+        return None
+    page = _page(url, reader.parser, reader.size, reader.truncated)
+    return page if page["text"] else None
+
+
+def fetch_pages(urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """fetch_page for every URL concurrently; results in the order of `urls`"""
+    if not urls:
+        return []
+    client = page_client()
+    with ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="page-fetch") as pool:
+        # copy_context keeps the node timer in the worker threads
+        futures = [pool.submit(copy_context().run, fetch_page, url, client) for url in urls]
+        return [future.result() for future in futures]
+
+
+async def afetch_pages(urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Async variant of fetch_pages"""
+    if not urls:
+        return []
+    import httpx
+    async with httpx.AsyncClient(limits=_limits(), timeout=_timeout(), follow_redirects=True, verify=_ssl_context(),
+                                 headers={"User-Agent": Config.PAGE_USER_AGENT}) as client:
+        return list(await asyncio.gather(*[afetch_page(client, url) for url in urls]))
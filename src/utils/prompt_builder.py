@@ -0,0 +1,166 @@
+"""Token-aware prompt context shared by the writing agents.
+
+The research summary, key insights and (for LinkedIn) the whole blog post are pasted into
+several prompts. fit_context() counts their tokens locally and, when together they exceed the
+agent's input budget, compresses the largest ones by extractive selection: sentences (or list
+items) are scored and the best ones are kept, in their original order, until the field fits.
+
+- Budgets come from PROMPT_BUDGETS (per agent name), falling back to MAX_TOKENS.
+- The budget is shared water-filling style: fields smaller than an equal share are kept whole
+  and the space they leave goes to the larger ones.
+- Sentences score higher for frequent content words, overlap with the topic, numbers and
+  statistics, and being near the start (where summaries put their conclusions).
+
+Each fit is recorded as a "prompt" call on the current node with tokens_before, tokens_after
+and tokens_saved, which NodeTimer sums into the node's prompt_tokens_saved.
+"""
+import functools
+import re
+from collections import Counter
+from typing import Any, Dict, List, Union
+
+from .config import Config
+from .instrumentation import track_call
+
+Field = Union[str, List[str]]
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'*•-])|\n+")
+_WORD = re.compile(r"[a-z][a-z0-9'-]+")
+_NUMBER = re.compile(r"\d")
+_STOPWORDS = {
+    "the", "and", "for", "that", "with", "this", "are", "was", "from", "have", "has", "will", "can",
+    "their", "they", "its", "into", "more", "than", "also", "such", "these", "those", "which", "while",
+    "about", "been", "being", "but", "not", "our", "your", "you", "how", "what", "when", "who", "all",
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use; offline hosts fall back to the estimate
+        print(f"tiktoken encoding unavailable, estimating tokens: {e.__class__.__name__}")
+        return None
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """Tokens in `text` for the model's tokenizer (tiktoken), or a 4-characters-per-token estimate"""
+    if not text:
+        return 0
+    encoding = _encoding(model or Config.OPENAI_MODEL)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _field_tokens(value: Field) -> int:
+    return count_tokens(value if isinstance(value, str) else "\n".join(value))
+
+
+def _units(value: Field) -> List[str]:
+    if isinstance(value, list):
+        return [item for item in value if item]
+    return [unit.strip() for unit in _SENTENCE_SPLIT.split(value) if unit and unit.strip()]
+
+
+def _separators(text: str, units: List[str]) -> List[str]:
+    """The original text between each unit and the one before it (newlines, indentation, spaces)"""
+    separators, end = [], 0
+    for unit in units:
+        start = text.find(unit, end)
+        separators.append(text[end:start] if separators else "")
+        end = start + len(unit)
+    return separators
+
+
+def _join(units: List[str], separators: List[str], kept: List[int]) -> str:
+    """The kept units joined with their original separators; a paragraph or line break in a
+    dropped stretch is kept too, so headings, bullets and paragraphs stay on their own lines"""
+    parts, previous = [], None
+    for index in kept:
+        if previous is not None:
+            gaps = separators[previous + 1:index + 1]
+            parts.append(max(reversed(gaps), key=lambda gap: gap.count("\n")))
+        parts.append(units[index])
+        previous = index
+    return "".join(parts)
+
+
+def _scores(units: List[str], topic: str) -> List[float]:
+    words = [[w for w in _WORD.findall(unit.lower()) if w not in _STOPWORDS] for unit in units]
+    frequency = Counter(w for unit_words in words for w in set(unit_words))
+    topic_words = {w for w in _WORD.findall(topic.lower()) if w not in _STOPWORDS}
+    scores = []
+    for position, (unit, unit_words) in enumerate(zip(units, words)):
+        if not unit_words:
+            scores.append(0.0)
+            continue
+        # Share of units that repeat this unit's words: 1.0 for a unit made only of recurring terms
+        importance = sum(frequency[w] for w in unit_words) / (len(unit_words) * len(units))
+        relevance = len(topic_words & set(unit_words))
+        facts = 1.0 if _NUMBER.search(unit) else 0.0
+        lead = 1.0 / (1 + position)
+        scores.append(importance + 2 * relevance + facts + lead)
+    return scores
+
+
+def compress(value: Field, budget: int, topic: str = "") -> Field:
+    """The highest-value sentences (or list items) of `value` that fit in `budget` tokens, in order"""
+    if _field_tokens(value) <= budget:
+        return value
+    units = _units(value)
+    separators = [""] * len(units) if isinstance(value, list) else _separators(value, units)
+    scores = _scores(units, topic)
+    kept, used = set(), 0
+    for index in sorted(range(len(units)), key=lambda i: -scores[i]):
+        cost = count_tokens(units[index]) + max(1, count_tokens(separators[index]))
+        if used + cost <= budget:
+            kept.add(index)
+            used += cost
+    if not kept and units:
+        # Not even one sentence fits: keep the start of the best one
+        best = units[max(range(len(units)), key=lambda i: scores[i])]
+        return [_truncate(best, budget)] if isinstance(value, list) else _truncate(best, budget)
+    if isinstance(value, list):
+        return [unit for i, unit in enumerate(units) if i in kept]
+    return _join(units, separators, sorted(kept))
+
+
+def _truncate(text: str, budget: int) -> str:
+    encoding = _encoding(Config.OPENAI_MODEL)
+    if encoding is None:
+        return text[:budget * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:budget])
+
+
+def input_budget(agent: str) -> int:
+    """Context tokens allowed in `agent`'s prompt"""
+    return int(Config.PROMPT_BUDGETS.get(agent, Config.MAX_TOKENS))
+
+
+def fit_context(agent: str, fields: Dict[str, Field], topic: str = "", budget: int = None) -> Dict[str, Field]:
+    """`fields` compressed so that together they fit `agent`'s input budget"""
+    budget = input_budget(agent) if budget is None else budget
+    with track_call("prompt", agent) as call:
+        sizes = {name: _field_tokens(value) for name, value in fields.items()}
+        fitted: Dict[str, Any] = dict(fields)
+        if sum(sizes.values()) > budget:
+            remaining = budget
+            ordered = sorted(sizes, key=sizes.get)
+            for position, name in enumerate(ordered):
+                share = remaining // (len(ordered) - position)
+                if sizes[name] > share:
+                    fitted[name] = compress(fields[name], share, topic)
+                remaining -= min(sizes[name], _field_tokens(fitted[name]))
+        call["tokens_before"] = sum(sizes.values())
+        call["tokens_after"] = sum(_field_tokens(value) for value in fitted.values())
+        call["tokens_saved"] = call["tokens_before"] - call["tokens_after"]
+    return fitted
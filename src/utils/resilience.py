@@ -0,0 +1,320 @@
+"""Retries, backoff and circuit breakers for every external call.
+
+retry_call / aretry_call wrap one call to a named dependency ("llm:openai/gpt-4o", "serpapi",
+"dall-e", "image_download", "linkedin"):
+
+- Transient failures are retried up to RETRY_MAX_ATTEMPTS times in total, with full-jitter
+  exponential backoff (RETRY_BASE_DELAY doubling up to RETRY_MAX_DELAY). Transient means
+  timeouts, connection errors and HTTP 408/409/425/429/5xx, from httpx/openai and requests alike.
+- A Retry-After (or retry-after-ms) header on the error response sets the minimum wait. A
+  wait longer than RETRY_AFTER_MAX is not attempted: the error is raised straight away.
+- Non-idempotent calls (idempotent=False, e.g. publishing a LinkedIn post) are only retried
+  when the request cannot have been processed: connection failures, 429 and 503.
+- A HedgedModel does not retry a provider that has a fallback: the error fails over to the next
+  provider straight away, and only the last one is retried.
+- Each dependency has a circuit breaker. It opens after BREAKER_FAILURE_THRESHOLD consecutive
+  transient failures, and while it is open calls fail at once with CircuitOpenError (so a
+  HedgedModel fails over to its next provider). After BREAKER_RESET_SECONDS one trial call is
+  let through: success closes the breaker, a transient failure opens it again. A non-transient
+  error (the dependency answered, e.g. HTTP 400) counts as a success, and a cancelled trial
+  lets the next call try again.
+
+Client-side retries in the SDKs are turned off (max_retries=0) so every retry happens here.
+Each retry is counted in the call record's `retries` (summed per node by NodeTimer).
+get_resilience().stats() reports calls, failures, retries, short-circuits and breaker state
+per dependency.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .config import Config
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+# Statuses that guarantee the server did not act on the request
+UNPROCESSED_STATUSES = {429, 503}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit breaker is open"""
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _wrapped(exc: BaseException) -> list:
+    """`exc` and the errors it wraps: requests puts urllib3's MaxRetryError in args[0], whose
+    `reason` is the underlying NewConnectionError / ConnectTimeoutError"""
+    chain = []
+    while isinstance(exc, BaseException) and len(chain) < 5 and exc not in chain:
+        chain.append(exc)
+        exc = exc.__cause__ or getattr(exc, "reason", None) or (exc.args[0] if exc.args else None)
+    return chain
+
+
+def _is_connect_error(exc: BaseException) -> bool:
+    """A failure to connect, so the request was never sent"""
+    for error in _wrapped(exc):
+        name = type(error).__name__
+        if name in ("ConnectError", "ConnectTimeout", "APIConnectionError", "NewConnectionError",
+                    "ConnectTimeoutError") or isinstance(error, ConnectionRefusedError):
+            return True
+    return False
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """The builtin ConnectionError or requests.exceptions.ConnectionError (an IOError), except TLS failures"""
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return isinstance(exc, ConnectionError) or ("ConnectionError" in names and "SSLError" not in names)
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(exc).__name__
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether `exc` is worth retrying: a timeout, a connection failure or a retryable HTTP status"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = _status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return _is_timeout(exc) or _is_connect_error(exc) or _is_connection_error(exc) or \
+        type(exc).__name__ in ("RemoteProtocolError", "ReadError", "ChunkedEncodingError")
+
+
+def is_unprocessed(exc: BaseException) -> bool:
+    """Whether the failed request certainly had no effect, so even a non-idempotent call can be repeated"""
+    status = _status(exc)
+    if status is not None:
+        return status in UNPROCESSED_STATUSES
+    return _is_connect_error(exc)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), or None"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    millis = headers.get("retry-after-ms")
+    if millis:
+        try:
+            return float(millis) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value) if value else None
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed, open for `reset_seconds`, then half-open for one trial call"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._trial_owner = None
+        self._lock = threading.Lock()
+
+    def allow(self, owner: object = None) -> bool:
+        """Whether a call may go ahead; `owner` holds the half-open trial until release(owner)"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self._trial_running = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                self._trial_owner = owner
+                return True
+            return False
+
+    def release(self, owner: object) -> None:
+        """End `owner`'s trial however its call finished (error, cancellation), so another can run"""
+        with self._lock:
+            if owner is not None and self._trial_owner is owner:
+                self._trial_running = False
+                self._trial_owner = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class Resilience:
+    """Retry policy plus one circuit breaker and counters per dependency"""
+
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None,
+                 retry_after_max: float = None, failure_threshold: int = None, reset_seconds: float = None):
+        self.max_attempts = max(1, Config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts)
+        self.base_delay = Config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.retry_after_max = Config.RETRY_AFTER_MAX if retry_after_max is None else retry_after_max
+        self.failure_threshold = Config.BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.reset_seconds = Config.BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def breaker(self, dependency: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(dependency)
+            if breaker is None:
+                breaker = self._breakers[dependency] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+                self._stats[dependency] = {"calls": 0, "failures": 0, "retries": 0, "short_circuits": 0}
+            return breaker
+
+    def _count(self, dependency: str, counter: str) -> None:
+        with self._lock:
+            self._stats[dependency][counter] += 1
+
+    def delay(self, attempt: int, exc: BaseException) -> Optional[float]:
+        """Seconds to wait before retry number `attempt` (1-based), or None to give up"""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        requested = retry_after(exc)
+        if requested is None:
+            return backoff
+        if requested > self.retry_after_max:
+            return None
+        return max(requested, backoff)
+
+    def _admit(self, dependency: str, owner: object) -> CircuitBreaker:
+        breaker = self.breaker(dependency)
+        self._count(dependency, "calls")
+        if not breaker.allow(owner):
+            self._count(dependency, "short_circuits")
+            raise CircuitOpenError(f"Circuit open for {dependency}; not calling it for up to {self.reset_seconds:.0f}s")
+        return breaker
+
+    def _next_delay(self, dependency: str, breaker: CircuitBreaker, exc: BaseException, attempt: int,
+                    attempts: int, retryable: Callable[[BaseException], bool]) -> Optional[float]:
+        """Record a failed attempt; the wait before the next one, or None when it should be raised"""
+        transient = is_transient(exc)
+        if transient:
+            breaker.record_failure()
+            self._count(dependency, "failures")
+        else:
+            breaker.record_success()  # e.g. HTTP 400: the dependency answered, the request was at fault
+        if not transient or not retryable(exc) or attempt >= attempts or breaker.state == "open":
+            return None
+        return self.delay(attempt, exc)
+
+    def call(self, dependency: str, fn: Callable[[], T], call: Dict[str, Any] = None, idempotent: bool = True,
+             retryable: Callable[[BaseException], bool] = None, attempts: int = None) -> T:
+        retryable = retryable or (is_transient if idempotent else is_unprocessed)
+        attempts = attempts or self.max_attempts
+        attempt = 0
+        while True:
+            owner = object()
+            breaker = self._admit(dependency, owner)
+            attempt += 1
+            try:
+                result = fn()
+                breaker.record_success()
+                return result
+            except Exception as e:
+                wait = self._next_delay(dependency, breaker, e, attempt, attempts, retryable)
+                if wait is None:
+                    raise
+                self._record_retry(dependency, call, e, wait)
+            finally:
+                breaker.release(owner)
+            time.sleep(wait)
+
+    async def acall(self, dependency: str, fn: Callable[[], Awaitable[T]], call: Dict[str, Any] = None,
+                    idempotent: bool = True, retryable: Callable[[BaseException], bool] = None,
+                    attempts: int = None) -> T:
+        retryable = retryable or (is_transient if idempotent else is_unprocessed)
+        attempts = attempts or self.max_attempts
+        attempt = 0
+        while True:
+            owner = object()
+            breaker = self._admit(dependency, owner)
+            attempt += 1
+            try:
+                result = await fn()
+                breaker.record_success()
+                return result
+            except Exception as e:
+                wait = self._next_delay(dependency, breaker, e, attempt, attempts, retryable)
+                if wait is None:
+                    raise
+                self._record_retry(dependency, call, e, wait)
+            finally:
+                breaker.release(owner)
+            await asyncio.sleep(wait)
+
+    def _record_retry(self, dependency: str, call: Optional[Dict[str, Any]], exc: BaseException, wait: float) -> None:
+        self._count(dependency, "retries")
+        if call is not None:
+            call["retries"] = call.get("retries", 0) + 1
+            call.setdefault("retry_errors", []).append(f"{type(exc).__name__}: {exc}"[:200])
+        print(f"🔁 {dependency}: {type(exc).__name__}, retrying in {wait:.1f}s")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters and breaker state per dependency"""
+        with self._lock:
+            return {dep: {**counters, "state": self._breakers[dep].state} for dep, counters in self._stats.items()}
+
+
+_resilience: Optional[Resilience] = None
+_lock = threading.Lock()
+
+
+def get_resilience() -> Resilience:
+    global _resilience
+    with _lock:
+        if _resilience is None:
+            _resilience = Resilience()
+        return _resilience
+
+
+def set_resilience(resilience: Optional[Resilience]) -> None:
+    global _resilience
+    with _lock:
+        _resilience = resilience
+
+
+def retry_call(dependency: str, fn: Callable[[], T], call: Dict[str, Any] = None, idempotent: bool = True,
+               retryable: Callable[[BaseException], bool] = None, attempts: int = None) -> T:
+    """fn() with retries and the dependency's circuit breaker; see the module docstring.
+
+    `attempts` overrides RETRY_MAX_ATTEMPTS (1 disables retries but keeps the breaker).
+    """
+    return get_resilience().call(dependency, fn, call, idempotent, retryable, attempts)
+
+
+async def aretry_call(dependency: str, fn: Callable[[], Awaitable[T]], call: Dict[str, Any] = None,
+                      idempotent: bool = True, retryable: Callable[[BaseException], bool] = None,
+                      attempts: int = None) -> T:
+    """Async variant of retry_call"""
+    return await get_resilience().acall(dependency, fn, call, idempotent, retryable, attempts)
@@ -0,0 +1,293 @@
+"""Fair scheduler for LLM and image API calls.
+
+Every chat completion (through invoke_llm / stream_llm and their async twins) and every
+DALL-E request asks the process-wide scheduler for a slot before it is sent:
+
+- Limits are token buckets per (provider, model): requests per minute, and for chat models
+  tokens per minute. A call reserves an estimate of its tokens up front and settles the
+  difference once the real usage is known.
+- Waiting calls are served by priority class first (interactive before batch), then fairly
+  across sessions, so one large batch cannot starve an editor in the UI.
+- The time a call spent queued is reported as `queue_ms` in its timing record.
+
+Callers tag their work with scheduling_context():
+
+    with scheduling_context(session_id="editor-42", priority=INTERACTIVE):
+        orchestrator.app.invoke(...)
+
+Limits are per process; with several worker processes, size them per worker.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import Config
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+_PRIORITY_RANK = {INTERACTIVE: 0, BATCH: 1}
+
+# Completion tokens reserved per chat call before the real usage is known
+COMPLETION_ESTIMATE = 500
+
+_context: ContextVar[Tuple[str, str]] = ContextVar("scheduling_context", default=("default", INTERACTIVE))
+
+
+@contextmanager
+def scheduling_context(session_id: str, priority: str = INTERACTIVE):
+    """Attribute the calls made inside this block to a session and priority class"""
+    if priority not in _PRIORITY_RANK:
+        raise ValueError(f"Unknown priority '{priority}', expected one of {list(_PRIORITY_RANK)}")
+    token = _context.set((session_id, priority))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, up to one minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests larger than the bucket wait for a full one)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative: an oversized or under-estimated call is paid back by later callers
+        self.level -= amount
+
+    def adjust(self, delta: float) -> None:
+        self.level = min(self.capacity, self.level - delta)
+
+
+class Ticket:
+    """One call waiting for (or holding) a slot"""
+
+    def __init__(self, key: Tuple[str, str], session: str, priority: str, tokens: int):
+        self.key = key
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.wait_ms = 0.0
+
+
+class _Limiter:
+    """Buckets and wait queues for one (provider, model)"""
+
+    def __init__(self, rpm: float, tpm: Optional[float]):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        # priority rank -> session -> tickets in arrival order
+        self.waiting: Dict[int, "OrderedDict[str, deque]"] = {rank: OrderedDict() for rank in _PRIORITY_RANK.values()}
+        # Requests served per waiting session; the session with the fewest goes next. An entry
+        # is dropped when its session stops waiting, and rebased on the floor when it returns
+        self.served: Dict[str, int] = {}
+
+    def enqueue(self, ticket: Ticket) -> None:
+        sessions = self.waiting[_PRIORITY_RANK[ticket.priority]]
+        if ticket.session not in sessions:
+            # A session that was idle starts level with the busiest waiters instead of far behind them
+            active = [self.served.get(s, 0) for queue in self.waiting.values() for s in queue]
+            floor = min(active) if active else 0
+            self.served[ticket.session] = max(self.served.get(ticket.session, 0), floor)
+            sessions[ticket.session] = deque()
+        sessions[ticket.session].append(ticket)
+
+    def remove(self, ticket: Ticket) -> None:
+        sessions = self.waiting[_PRIORITY_RANK[ticket.priority]]
+        queue = sessions.get(ticket.session)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del sessions[ticket.session]
+                if not any(ticket.session in waiting for waiting in self.waiting.values()):
+                    self.served.pop(ticket.session, None)
+
+    def head(self) -> Optional[Ticket]:
+        for rank in sorted(self.waiting):
+            sessions = self.waiting[rank]
+            if sessions:
+                session = min(sessions, key=lambda s: (self.served.get(s, 0), sessions[s][0].enqueued_at))
+                return sessions[session][0]
+        return None
+
+
+class Scheduler:
+    """Token-bucket rate limits with priority classes and per-session fair queuing"""
+
+    def __init__(self, limits: Dict[str, Dict[str, float]] = None):
+        self.limits = limits if limits is not None else Config.RATE_LIMITS
+        self._cond = threading.Condition()
+        self._limiters: Dict[Tuple[str, str], _Limiter] = {}
+        self._stats: Dict[str, float] = {"granted": 0, "queued": 0, "queue_ms": 0.0}
+        # Wake-up callbacks of async waiters, which cannot wait on the condition
+        self._async_waiters: Dict[Ticket, Callable[[], None]] = {}
+
+    def _notify(self) -> None:
+        """Wake every waiter to re-check its ticket (call with the condition held)"""
+        self._cond.notify_all()
+        for wake in self._async_waiters.values():
+            wake()
+
+    def _limiter(self, key: Tuple[str, str]) -> _Limiter:
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            provider, model = key
+            limits = self.limits.get(f"{provider}:{model}") or self.limits.get(provider) or {}
+            if provider == "image":
+                limiter = _Limiter(limits.get("rpm", Config.IMAGE_RPM), None)
+            else:
+                limiter = _Limiter(limits.get("rpm", Config.LLM_RPM), limits.get("tpm", Config.LLM_TPM))
+            self._limiters[key] = limiter
+        return limiter
+
+    def _try_grant(self, ticket: Ticket) -> Tuple[bool, float]:
+        """Grant the ticket if it is next in line and the buckets allow it; else seconds to wait"""
+        limiter = self._limiter(ticket.key)
+        if limiter.head() is not ticket:
+            # The head only changes on a grant or removal, which notifies; the timeout is a fallback
+            return False, 1.0
+        now = time.monotonic()
+        wait = limiter.requests.wait_time(1, now)
+        if limiter.tokens is not None:
+            wait = max(wait, limiter.tokens.wait_time(ticket.tokens, now))
+        if wait > 0:
+            return False, wait
+        limiter.requests.take(1)
+        if limiter.tokens is not None:
+            limiter.tokens.take(ticket.tokens)
+        limiter.served[ticket.session] = limiter.served.get(ticket.session, 0) + 1
+        limiter.remove(ticket)
+        ticket.wait_ms = round((now - ticket.enqueued_at) * 1000, 2)
+        self._stats["granted"] += 1
+        if ticket.wait_ms > 1:
+            self._stats["queued"] += 1
+            self._stats["queue_ms"] += ticket.wait_ms
+        return True, 0.0
+
+    def _new_ticket(self, key: Tuple[str, str], tokens: int) -> Ticket:
+        session, priority = _context.get()
+        ticket = Ticket(key, session, priority, tokens)
+        self._limiter(key).enqueue(ticket)
+        return ticket
+
+    def acquire(self, key: Tuple[str, str], tokens: int = 0) -> Ticket:
+        """Block until a call to `key` may be sent; the ticket's wait_ms is the time spent queued"""
+        with self._cond:
+            ticket = self._new_ticket(key, tokens)
+            try:
+                while True:
+                    granted, wait = self._try_grant(ticket)
+                    if granted:
+                        self._notify()
+                        return ticket
+                    self._cond.wait(timeout=min(wait, 1.0))
+            except BaseException:
+                self._limiter(key).remove(ticket)
+                self._notify()
+                raise
+
+    async def aacquire(self, key: Tuple[str, str], tokens: int = 0) -> Ticket:
+        """Async variant of acquire; waits on the event loop instead of blocking a thread.
+
+        The wait ends when the buckets should have refilled enough, or earlier when another
+        call is granted, settled or refunded (the waker is safe to call from any thread).
+        """
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+        with self._cond:
+            ticket = self._new_ticket(key, tokens)
+            self._async_waiters[ticket] = lambda: loop.call_soon_threadsafe(woken.set)
+        try:
+            while True:
+                with self._cond:
+                    granted, wait = self._try_grant(ticket)
+                    if granted:
+                        del self._async_waiters[ticket]
+                        self._notify()
+                        return ticket
+                    woken.clear()
+                try:
+                    await asyncio.wait_for(woken.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                self._async_waiters.pop(ticket, None)
+                self._limiter(key).remove(ticket)
+                self._notify()
+            raise
+
+    def settle(self, ticket: Ticket, actual_tokens: int) -> None:
+        """Correct the token bucket once the call's real usage is known"""
+        with self._cond:
+            limiter = self._limiter(ticket.key)
+            if limiter.tokens is not None and actual_tokens:
+                limiter.tokens.adjust(actual_tokens - ticket.tokens)
+            self._notify()
+
+    def refund(self, ticket: Ticket) -> None:
+        """Give back the tokens reserved for a call that failed; its request slot stays spent"""
+        with self._cond:
+            limiter = self._limiter(ticket.key)
+            if limiter.tokens is not None:
+                limiter.tokens.adjust(-ticket.tokens)
+            self._notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls granted, how many had to queue and their total queue time"""
+        with self._cond:
+            waiting = sum(len(q) for limiter in self._limiters.values()
+                          for sessions in limiter.waiting.values() for q in sessions.values())
+            return {**self._stats, "waiting": waiting}
+
+
+def llm_key(llm: Any) -> Tuple[str, str]:
+    """(provider, model) of a LangChain chat model, e.g. ("openai", "gpt-4o")"""
+    provider = type(llm).__name__.lower().replace("chat", "") or "llm"
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or "default"
+    return provider, str(model)
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough prompt size (4 characters per token) plus the completion reserve"""
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return chars // 4 + COMPLETION_ESTIMATE
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """The process-wide scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
+
+
+def set_scheduler(scheduler: Scheduler) -> None:
+    """Replace the process-wide scheduler (e.g. with different limits)"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
@@ -0,0 +1,109 @@
+"""Disk-backed cache of SERP API results, shared by every worker process.
+
+DeepResearchAgent looks up each search here before calling the SERP API. The key is a hash of
+the normalised query (case, accents, punctuation and spacing folded) and the result count, so
+"AI in Marketing" and "ai in marketing?" share one entry. Entries live in a SQLite file
+(SEARCH_CACHE_DB, off unless set, e.g. to search_cache.sqlite):
+
+- Fresh for SEARCH_CACHE_TTL_SECONDS: served without calling the API.
+- Then stale for SEARCH_CACHE_STALE_SECONDS: still served at once, and the caller refreshes the
+  entry in the background (stale-while-revalidate; one refresh per key at a time).
+- Older entries are deleted on lookup and count as a miss.
+- At most SEARCH_CACHE_MAX_ENTRIES are kept; the least recently used are evicted first.
+
+Only real API results are stored, never the simulated fallback. The table, TTL/LRU bookkeeping
+and counters come from sqlite_store.SQLiteStore; this module adds the stale window. Lookups are recorded as
+"cache" calls named "serp_search" (cache "hit", "stale" or "miss") in the research node's
+timing record; stats() has the per-process counters.
+"""
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import Config
+from .sqlite_store import ProcessSingleton, SQLiteStore
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, accent-free query with punctuation and repeated spaces removed"""
+    text = unicodedata.normalize("NFKD", query).encode("ascii", "ignore").decode().lower()
+    return " ".join(re.findall(r"[a-z0-9]+(?:[.+#'][a-z0-9]+)*", text))
+
+
+def search_key(query: str, num: int, engine: str = "google") -> str:
+    """Hash of the engine, normalised query and result count"""
+    payload = {"engine": engine, "q": normalize_query(query), "num": int(num)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class SearchCache(SQLiteStore):
+    """SQLite search-result store with TTL, a stale window and LRU eviction; safe across threads and processes"""
+
+    table = "searches"
+    label_column = "query"
+    value_column = "results"
+    counters = ("hits", "stale_hits", "misses", "stores", "evictions", "expired", "revalidations",
+                "revalidation_errors")
+
+    def __init__(self, db_path: str = None, ttl: float = None, stale_ttl: float = None, max_entries: int = None):
+        self.stale_ttl = Config.SEARCH_CACHE_STALE_SECONDS if stale_ttl is None else stale_ttl
+        self._revalidating = set()
+        super().__init__(db_path or Config.SEARCH_CACHE_DB,
+                         Config.SEARCH_CACHE_TTL_SECONDS if ttl is None else ttl,
+                         Config.SEARCH_CACHE_MAX_ENTRIES if max_entries is None else max_entries)
+
+    def max_age(self) -> float:
+        return self.ttl + self.stale_ttl if self.ttl else 0
+
+    def get(self, key: str) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        """(results, "hit" | "stale"), or (None, "miss") when absent or past the stale window"""
+        found = self._lookup(key)
+        if found is None:
+            self._count("misses")
+            return None, "miss"
+        results, age = found
+        state = "stale" if self.ttl and age > self.ttl else "hit"
+        self._count("stale_hits" if state == "stale" else "hits")
+        return json.loads(results), state
+
+    def put(self, key: str, query: str, results: List[Dict[str, Any]]) -> None:
+        """Store API results and evict the least recently used entries over the cap"""
+        if results:
+            self._store(key, normalize_query(query), json.dumps(results))
+
+    def revalidate(self, key: str, query: str, search) -> bool:
+        """Refresh a stale entry with search() in a background thread; False if one is already running"""
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+
+        def refresh():
+            try:
+                self.put(key, query, search())
+                self._count("revalidations")
+            except Exception as e:
+                print(f"Search cache refresh failed for '{query}': {e}")
+                self._count("revalidation_errors")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=refresh, name="search-revalidate", daemon=True).start()
+        return True
+
+
+_shared: ProcessSingleton[SearchCache] = ProcessSingleton(lambda: SearchCache() if Config.SEARCH_CACHE_DB else None)
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """The process-wide search cache, or None when SEARCH_CACHE_DB is empty"""
+    return _shared.get()
+
+
+def set_search_cache(cache: Optional[SearchCache]) -> None:
+    """Replace the process-wide search cache; None turns it off"""
+    _shared.set(cache)
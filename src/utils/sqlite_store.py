@@ -0,0 +1,159 @@
+"""SQLite key/value store with a TTL and LRU eviction, shared by the on-disk caches.
+
+LLMCache (llm_cache.py) and SearchCache (search_cache.py) each keep one table of
+(key, label, value, created_at, last_used) rows in a file that every worker process opens.
+SQLiteStore owns that table: lookups that touch last_used and drop expired rows, inserts that
+evict the least recently used rows past `max_entries`, and the per-process counters behind
+stats(). Subclasses decode the value and decide what a hit means.
+
+ProcessSingleton holds the lazily built, replaceable process-wide instance behind each
+get_*/set_* pair.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    {label} TEXT NOT NULL,
+    {value} TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used);
+"""
+
+
+class SQLiteStore:
+    """One table of TTL/LRU-bounded rows; safe across threads and processes.
+
+    Subclasses set `table`, `label_column`, `value_column` and `counters`.
+    """
+
+    table = ""
+    label_column = "label"
+    value_column = "value"
+    counters = ("hits", "misses", "stores", "evictions", "expired")
+
+    def __init__(self, db_path: str, ttl: float, max_entries: int):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.counters, 0)
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA.format(table=self.table, label=self.label_column, value=self.value_column))
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += amount
+
+    def max_age(self) -> float:
+        """Seconds after which a row is deleted on lookup (0: never)"""
+        return self.ttl
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, float]]:
+        """(value, age in seconds) for `key`, or None when absent or past max_age()"""
+        now = time.time()
+        max_age = self.max_age()
+        conn = self._connect()
+        try:
+            row = conn.execute(f"SELECT {self.value_column}, created_at FROM {self.table} WHERE key = ?",
+                               (key,)).fetchone()
+            if row is not None and max_age and now - row[1] > max_age:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._count("expired")
+                row = None
+            if row is None:
+                return None
+            conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+        finally:
+            conn.close()
+        return row[0], now - row[1]
+
+    def _store(self, key: str, label: str, value: str) -> None:
+        """Insert or replace a row, then evict the least recently used rows over the cap"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, {self.label_column}, {self.value_column}, "
+                "created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, label, value, now, now)
+            )
+            evicted = conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        finally:
+            conn.close()
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(f"DELETE FROM {self.table}")
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process plus the number of stored entries"""
+        conn = self._connect()
+        try:
+            entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            counters = dict(self._counters)
+        served = counters["hits"] + counters.get("stale_hits", 0)
+        lookups = served + counters["misses"]
+        return {**counters, "entries": entries, "hit_rate": served / lookups if lookups else 0.0}
+
+
+class ProcessSingleton(Generic[T]):
+    """A process-wide instance built by `factory` on first use (None when disabled), replaceable with set()"""
+
+    def __init__(self, factory: Callable[[], Optional[T]]):
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        with self._lock:
+            if not self._configured:
+                self._value = self._factory()
+                self._configured = True
+            return self._value
+
+    def set(self, value: Optional[T]) -> None:
+        with self._lock:
+            self._value = value
+            self._configured = True
+
+    def save(self) -> Tuple[Optional[T], bool]:
+        """The current state without building the instance, for restore()"""
+        with self._lock:
+            return self._value, self._configured
+
+    def restore(self, state: Tuple[Optional[T], bool]) -> None:
+        with self._lock:
+            self._value, self._configured = state
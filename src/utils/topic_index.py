@@ -0,0 +1,284 @@
+"""Near-duplicate topic index used to reuse earlier research.
+
+Editors often resubmit almost the same request ("AI in marketing" vs "Write a blog post about
+AI in marketing"). DeepResearchAgent stores each research run here and, before researching a
+new topic, asks for a stored topic that is similar enough and still fresh.
+
+Topics are normalized (lowercase, light stemming, function words and leading request
+boilerplate such as "write a blog post about" removed) and turned into word and word-pair
+shingles. Subject words are kept, even ones like "LinkedIn" or "content": "LinkedIn marketing"
+and "content marketing" are different topics. Each topic gets a MinHash signature whose
+agreement with another signature estimates their Jaccard similarity. Signatures are split into
+LSH bands, so a lookup only compares against topics that share a band bucket, and lookup time
+stays flat as the index grows into tens of thousands of topics.
+
+Signatures and research payloads are kept in SQLite (RESEARCH_INDEX_DB, empty by default,
+which disables reuse) so every worker process shares them; each process keeps one connection,
+the signatures and buckets in memory, and picks up rows written by other processes on the
+next lookup.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import Config
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Function words; subject words are kept however generic they look
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "for", "to", "with", "about", "into", "from",
+    "by", "at", "as", "is", "are", "be", "how", "what", "why", "my", "our", "your", "their", "its",
+    "this", "that", "these", "those", "can", "do", "does",
+}
+# Request boilerplate in front of the subject: "Please write a blog post and a LinkedIn post about ..."
+_REQUEST = re.compile(r"^\s*(?:(?:please|can you|could you)\s+)*"
+                      r"(?:write|create|generate|draft|make|produce|give me|i need|i want)\b"
+                      r"(?:\s+\S+){0,8}?\s+(?:about|on|regarding|covering)\s+", re.I)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    verified INTEGER NOT NULL,
+    research TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS topics_created ON topics (created_at);
+"""
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    # Fixed seeds so signatures stored by one process are comparable in every other
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.sha256(f"minhash-{i}".encode()).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE - 1) + 1
+        b = int.from_bytes(digest[8:16], "big") % _MERSENNE
+        perms.append((a, b))
+    return perms
+
+
+_PERMS = _permutations()
+
+
+def shingles(text: str) -> Set[str]:
+    """Normalized words and adjacent word pairs of a topic"""
+    words = []
+    for word in re.findall(r"[a-z0-9]+", _REQUEST.sub("", text, count=1).lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def signature(text: str) -> Tuple[int, ...]:
+    """MinHash signature of a topic (NUM_PERM values)"""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+              for s in shingles(text)]
+    if not hashes:
+        return tuple([_MAX_HASH] * NUM_PERM)
+    rows = [[((a * h + b) % _MERSENNE) & _MAX_HASH for a, b in _PERMS] for h in hashes]
+    return tuple(map(min, zip(*rows)))
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _bands(sig: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(band, sig[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+def _pack(sig: Tuple[int, ...]) -> bytes:
+    return struct.pack(f"<{NUM_PERM}I", *sig)
+
+
+def _unpack(blob: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f"<{NUM_PERM}I", blob)
+
+
+class TopicIndex:
+    """MinHash/LSH index of researched topics; safe across threads and processes"""
+
+    def __init__(self, db_path: str = None, threshold: float = None, max_age: float = None,
+                 max_entries: int = None):
+        self.db_path = db_path or Config.RESEARCH_INDEX_DB
+        self.threshold = Config.RESEARCH_REUSE_THRESHOLD if threshold is None else threshold
+        self.max_age = Config.RESEARCH_REUSE_MAX_AGE_SECONDS if max_age is None else max_age
+        self.max_entries = Config.RESEARCH_INDEX_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        # id -> (signature, verified, created_at)
+        self._entries: Dict[int, Tuple[Tuple[int, ...], bool, float]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = defaultdict(set)
+        self._last_id = 0
+        self._counters = {"hits": 0, "misses": 0, "stores": 0}
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid = 0
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This process's connection, kept open: opening one costs more than a lookup. Hold _db_lock."""
+        if self._db is None or self._db_pid != os.getpid():
+            self._db, self._db_pid = self._connect(), os.getpid()
+        return self._db
+
+    def _add(self, entry_id: int, sig: Tuple[int, ...], verified: bool, created_at: float) -> None:
+        self._entries[entry_id] = (sig, verified, created_at)
+        for band in _bands(sig):
+            self._buckets[band].add(entry_id)
+        self._last_id = max(self._last_id, entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for band in _bands(entry[0]):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _sync(self, conn: sqlite3.Connection) -> None:
+        """Load rows written since the last sync (by this or any other process)"""
+        rows = conn.execute(
+            "SELECT id, signature, verified, created_at FROM topics WHERE id > ? AND created_at >= ?",
+            (self._last_id, time.time() - self.max_age)
+        ).fetchall()
+        with self._lock:
+            for entry_id, blob, verified, created_at in rows:
+                self._add(entry_id, _unpack(blob), bool(verified), created_at)
+
+    def find(self, topic: str, verified: bool = True) -> Optional[Dict[str, Any]]:
+        """Best fresh match for `topic` at or above the threshold, or None.
+
+        A match carries the stored `research`, the original `topic` and its `similarity`.
+        Research stored without fact verification is only returned when `verified` is False.
+        """
+        sig = signature(topic)
+        with self._db_lock:
+            conn = self._connection()
+            self._sync(conn)
+            best_id, best_score = self._best_candidate(sig, verified)
+            if best_id is None:
+                self._count("misses")
+                return None
+            row = conn.execute("SELECT topic, research FROM topics WHERE id = ?", (best_id,)).fetchone()
+        if row is None:
+            with self._lock:
+                self._remove(best_id)
+            self._count("misses")
+            return None
+        self._count("hits")
+        return {"topic": row[0], "similarity": round(best_score, 3), "research": json.loads(row[1])}
+
+    def _best_candidate(self, sig: Tuple[int, ...], verified: bool) -> Tuple[Optional[int], float]:
+        now = time.time()
+        best_id, best_score = None, 0.0
+        with self._lock:
+            candidates = set()
+            for band in _bands(sig):
+                candidates |= self._buckets.get(band, set())
+            for entry_id in candidates:
+                entry_sig, entry_verified, created_at = self._entries[entry_id]
+                if now - created_at > self.max_age:
+                    self._remove(entry_id)
+                    continue
+                if verified and not entry_verified:
+                    continue
+                score = similarity(sig, entry_sig)
+                # Prefer the newest research among equally similar topics
+                if score >= self.threshold and (score > best_score or (score == best_score and entry_id > best_id)):
+                    best_id, best_score = entry_id, score
+        return best_id, best_score
+
+    def add(self, topic: str, research: Dict[str, Any], verified: bool = True) -> None:
+        """Store a research run and drop the oldest rows past the size cap"""
+        sig = signature(topic)
+        now = time.time()
+        with self._db_lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO topics (topic, signature, verified, research, created_at) VALUES (?, ?, ?, ?, ?)",
+                (topic, _pack(sig), int(verified), json.dumps(research, default=str), now)
+            )
+            dropped = conn.execute(
+                "SELECT id FROM topics WHERE created_at < ? OR id NOT IN ("
+                "SELECT id FROM topics ORDER BY id DESC LIMIT ?)",
+                (now - self.max_age, self.max_entries)
+            ).fetchall()
+            if dropped:
+                conn.executemany("DELETE FROM topics WHERE id = ?", dropped)
+            self._sync(conn)
+        with self._lock:
+            for (entry_id,) in dropped:
+                self._remove(entry_id)
+        self._count("stores")
+
+    def clear(self) -> None:
+        with self._db_lock:
+            self._connection().execute("DELETE FROM topics")
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup counters for this process plus the number of indexed topics"""
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "buckets": len(self._buckets)}
+
+
+_index: Optional[TopicIndex] = None
+_index_configured = False
+_index_lock = threading.Lock()
+
+
+def get_topic_index() -> Optional[TopicIndex]:
+    """The process-wide topic index, or None when RESEARCH_INDEX_DB is empty (the default)"""
+    global _index, _index_configured
+    with _index_lock:
+        if not _index_configured:
+            _index = TopicIndex() if Config.RESEARCH_INDEX_DB else None
+            _index_configured = True
+        return _index
+
+
+def set_topic_index(index: Optional[TopicIndex]) -> None:
+    """Replace the process-wide topic index; None turns research reuse off"""
+    global _index, _index_configured
+    with _index_lock:
+        _index = index
+        _index_configured = True
@@ -1,6 +1,7 @@
 import sys
 import os
 import uuid
+import time
 import logging
 import requests
 import urllib.parse
@@ -10,8 +11,14 @@ from streamlit_app.blog_persistence import save_blog_content, load_blog_content,
 
 # Make src importable (adjust if your project layout differs)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+from src.orchestrator.registry import get_orchestrator, invalidate
 from src.orchestrator.state import ContentMarketingState
+from src.jobs.queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+from src.jobs.worker import start_worker_threads
+from src.utils.config import Config
+from src.utils.scheduler import scheduling_context, INTERACTIVE
+from src.utils.resilience import get_resilience
+from src.utils.llm_cache import bypass_cache
 
 # Must be the first Streamlit command
 st.set_page_config(
@@ -108,6 +115,319 @@ def extract_code_from_url(url: str) -> str:
     except Exception:
         return ""
 
+def render_timings_waterfall(timings: list) -> None:
+    """Draw node and call timings from ContentMarketingState["timings"] as a waterfall"""
+    import pandas as pd
+    import altair as alt
+
+    run_start = min(t["started_at"] for t in timings)
+    rows = []
+    for t in timings:
+        start_ms = (t["started_at"] - run_start) * 1000
+        rows.append({
+            "step": t["node"],
+            "kind": "node",
+            "start_ms": round(start_ms, 1),
+            "end_ms": round(start_ms + t["wall_ms"], 1),
+            "wall_ms": t["wall_ms"],
+            "prompt_tokens": t.get("prompt_tokens", 0),
+            "completion_tokens": t.get("completion_tokens", 0),
+            "retries": t.get("retries", 0),
+            "bytes": t.get("bytes_downloaded", 0),
+            "queue_ms": t.get("queue_ms", 0.0),
+        })
+        for call in t.get("calls", []):
+            call_start_ms = (call["started_at"] - run_start) * 1000
+            rows.append({
+                "step": f"{t['node']} › {call['name']}",
+                "kind": call["kind"],
+                "start_ms": round(call_start_ms, 1),
+                "end_ms": round(call_start_ms + call["wall_ms"], 1),
+                "wall_ms": call["wall_ms"],
+                "prompt_tokens": call.get("prompt_tokens", 0),
+                "completion_tokens": call.get("completion_tokens", 0),
+                "retries": call.get("retries", 0),
+                "bytes": call.get("bytes", 0),
+                "queue_ms": call.get("queue_ms", 0.0),
+            })
+    df = pd.DataFrame(rows)
+
+    c1, c2, c3, c4, c5 = st.columns(5)
+    with c1:
+        st.metric("End-to-end", f"{df['end_ms'].max() / 1000:.1f} s")
+    with c2:
+        node_rows = df[df["kind"] == "node"]
+        st.metric("Tokens (prompt / completion)", f"{node_rows['prompt_tokens'].sum()} / {node_rows['completion_tokens'].sum()}")
+    with c3:
+        st.metric("Downloaded", f"{node_rows['bytes'].sum() / 1024:.0f} KB")
+    with c4:
+        st.metric("Rate-limit wait", f"{node_rows['queue_ms'].sum() / 1000:.1f} s")
+    with c5:
+        st.metric("Prompt tokens saved", sum(t.get("prompt_tokens_saved", 0) for t in timings))
+
+    chart = alt.Chart(df).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms since run start"),
+        x2="end_ms:Q",
+        y=alt.Y("step:N", sort=None, title=None),
+        color=alt.Color("kind:N"),
+        tooltip=["step", "kind", "wall_ms", "queue_ms", "prompt_tokens", "completion_tokens", "retries", "bytes"],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    calls = [c for t in timings for c in t.get("calls", [])]
+    # Only model calls: the query fast path and the research index record hit/miss on their own calls too
+    cache_results = [c["cache"] for c in calls if c.get("cache") and c.get("kind") == "llm"]
+    if cache_results:
+        st.caption(f"LLM cache: {cache_results.count('hit')} hits, {cache_results.count('miss')} misses")
+    search_results = [c["cache"] for c in calls if c.get("cache") and c.get("name") == "serp_search"]
+    if search_results:
+        st.caption(f"Search cache: {search_results.count('hit') + search_results.count('stale')} hits "
+                   f"({search_results.count('stale')} stale), {search_results.count('miss')} misses")
+    retried = [c for t in timings for c in t.get("calls", []) if c.get("retries")]
+    open_breakers = [dep for dep, s in get_resilience().stats().items() if s["state"] != "closed"]
+    if retried or open_breakers:
+        st.caption(f"Retries: {sum(c['retries'] for c in retried)} across {len(retried)} calls"
+                   + (f"; circuit open: {', '.join(open_breakers)}" if open_breakers else ""))
+    with st.expander("Timing details"):
+        st.dataframe(df, use_container_width=True)
+
+NODE_LABELS = {
+    "query_analysis": "Query analyzed",
+    "research": "Research complete",
+    "research_gate": "Research checked",
+    "blog_writing": "Blog post written",
+    "linkedin_writing": "LinkedIn post written",
+    "image_generation": "Images generated",
+    "strategy": "Strategy drafted",
+    "finalize": "Finalized",
+}
+
+def stream_generation(orchestrator, initial_state: Dict[str, Any], thread_id: str) -> Dict[str, Any]:
+    """Run the workflow, showing research, blog and LinkedIn text as soon as each is produced"""
+    import re
+    status = st.status("Generating content...", expanded=True)
+    research_box = st.empty()
+    blog_box = st.empty()
+    linkedin_box = st.empty()
+    boxes = {"blog_writing": (blog_box, "Blog Content"), "linkedin_writing": (linkedin_box, "LinkedIn Content")}
+    streamed = {"blog_writing": "", "linkedin_writing": ""}
+    final_state: Dict[str, Any] = {}
+
+    for event in orchestrator.stream_run(initial_state, thread_id):
+        if event["type"] == "token" and event["node"] in boxes:
+            streamed[event["node"]] += event["token"]
+            box, title = boxes[event["node"]]
+            box.markdown(f"#### {title}\n" + re.sub(r"#[\w]+", "", streamed[event["node"]]) + " ▌")
+        elif event["type"] == "update":
+            status.write(f"✅ {NODE_LABELS.get(event['node'], event['node'])}")
+            if event["node"] == "research" and event["update"].get("research_summary"):
+                research_box.markdown("#### Research Summary\n" + event["update"]["research_summary"])
+        elif event["type"] == "done":
+            final_state = event["state"]
+
+    status.update(label="Content generation completed!", state="complete", expanded=False)
+    # The tabs below render the final versions
+    for box in (research_box, blog_box, linkedin_box):
+        box.empty()
+    return final_state
+
+def render_content_result(result: Dict[str, Any]) -> None:
+    """Show a finished generation in tabs and persist its blog post"""
+    tab6, tab1, tab2, tab3, tab4, tab5, tab7 = st.tabs(
+        [
+            "📊 Metrics",
+            "📝 Blog Content",
+            "🔬 Research Summary",
+            "🛠️ Workflow Steps",
+            "💡 Key Insights",
+            "🖼️ Images",
+            "💼 LinkedIn Content"
+        ]
+    )
+
+    # Persist blog content
+    blog_content = result.get("blog_content", "No blog content generated.")
+    save_blog_content(blog_content)
+
+    with tab1:
+        st.subheader("Blog Content")
+        # Remove hashtags from blog content
+        import re
+        blog_content_no_hashtags = re.sub(r"#[\w]+", "", blog_content)
+        st.markdown(blog_content_no_hashtags)
+        if st.button("🧹 Clear & Start New Blog", key="btn_clear_blog"):
+            clear_blog_content()
+            st.success("Blog content cleared. You can start a new blog.")
+
+    with tab2:
+        st.subheader("Research Summary")
+        summary = result.get("research_summary", "No research summary generated.")
+        if summary and summary != "No research summary generated.":
+            st.markdown(summary)
+        else:
+            st.info(summary)
+
+    with tab3:
+        st.subheader("Workflow Steps")
+        steps = result.get("processing_steps", [])
+        if steps:
+            for i, step in enumerate(steps, 1):
+                st.write(f"{i}. {step}")
+        else:
+            st.info("No workflow steps recorded.")
+
+    with tab4:
+        st.subheader("Key Insights")
+        insights = result.get("key_insights", [])
+        if insights:
+            for insight in insights:
+                st.write(f"• {insight}")
+        else:
+            st.info("No key insights generated.")
+
+    with tab5:
+        st.subheader("Generated Images")
+        images = result.get("generated_images", [])
+        if images:
+            for img in images:
+                if isinstance(img, str):
+                    st.write(f"Image prompt: {img}")
+                else:
+                    st.image(img)
+        else:
+            st.info("No images generated.")
+
+    with tab6:
+        st.subheader("Content Metrics")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric("SEO Score", result.get("seo_score", "N/A"))
+        with c2:
+            st.metric("Readability Score", result.get("readability_score", "N/A"))
+        quality = result.get("content_quality_scores", {})
+        if quality:
+            st.subheader("Content Quality Scores")
+            for metric, score in quality.items():
+                st.metric(metric.title(), score)
+        timings = result.get("timings", [])
+        if timings:
+            st.subheader("Latency Waterfall")
+            render_timings_waterfall(timings)
+
+    with tab7:
+        st.subheader("LinkedIn Content")
+        linkedin_content = result.get("linkedin_content", "No LinkedIn content generated.")
+        st.markdown(linkedin_content)
+        st.markdown("---")
+        st.markdown("## 📱 Publish LinkedIn Content")
+        access_token = st.session_state.get("linkedin_access_token", "")
+        LINKEDIN_SCOPE = "w_member_social r_basicprofile openid profile email w_organization_social"
+        if linkedin_content and linkedin_content != "No LinkedIn content generated.":
+            st.markdown("**Preview of Generated LinkedIn Content:**")
+            with st.expander("Show LinkedIn Content", expanded=True):
+                st.markdown(linkedin_content)
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                if st.button("🚀 Publish Generated Content", type="primary", key="btn_publish_generated_tab7"):
+                    if not access_token:
+                        st.error("❌ Missing Access Token. Complete the OAuth flow in the sidebar first!")
+                    elif not validate_linkedin_token(access_token, LINKEDIN_SCOPE):
+                        st.error("❌ Access Token is invalid or expired. Please get a new one.")
+                    else:
+                        with st.spinner("Publishing to LinkedIn..."):
+                            res = post_to_linkedin_api(access_token, linkedin_content)
+                            if res.get("success"):
+                                st.success("✅ Generated content posted to LinkedIn successfully!")
+                                st.balloons()
+                            else:
+                                st.error(f"❌ Failed to post: {res.get('error', 'Unknown error occurred')}")
+            with col2:
+                custom_linkedin_content = st.text_area(
+                    "Edit content before posting:",
+                    value=linkedin_content,
+                    height=150,
+                    key="custom_linkedin_content_tab7"
+                )
+                if st.button("📝 Publish Edited Content", key="btn_publish_edited_tab7"):
+                    if not access_token:
+                        st.error("❌ Missing Access Token. Complete the OAuth flow in the sidebar first!")
+                    elif not validate_linkedin_token(access_token, LINKEDIN_SCOPE):
+                        st.error("❌ Access Token is invalid or expired. Please get a new one.")
+                    else:
+                        with st.spinner("Publishing to LinkedIn..."):
+                            res = post_to_linkedin_api(access_token, custom_linkedin_content)
+                            if res.get("success"):
+                                st.success("✅ Edited content posted to LinkedIn successfully!")
+                                st.balloons()
+                            else:
+                                st.error(f"❌ Failed to post: {res.get('error', 'Unknown error occurred')}")
+        else:
+            st.info("No LinkedIn content was generated. Try generating content first.")
+
+
+    if result.get("errors"):
+        st.error("Errors encountered:")
+        for err in result["errors"]:
+            st.error(f"• {err}")
+    if result.get("warnings"):
+        st.warning("Warnings:")
+        for warn in result["warnings"]:
+            st.warning(f"• {warn}")
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Job queue shared by every session; starts the worker threads once per server"""
+    queue = JobQueue()
+    if Config.JOB_SPAWN_WORKERS:
+        # Threads, not processes: the API keys of submitted jobs live only in this process's memory
+        start_worker_threads()
+    return queue
+
+def scheduler_session_id() -> str:
+    """Stable id for this browser session, used for fair scheduling of its API calls"""
+    if "scheduler_session_id" not in st.session_state:
+        st.session_state["scheduler_session_id"] = str(uuid.uuid4())
+    return st.session_state["scheduler_session_id"]
+
+def forget_job() -> None:
+    st.session_state.pop("job_id", None)
+    st.query_params.pop("job", None)
+
+def poll_job(queue: JobQueue, job_id: str) -> None:
+    """Show a background job's progress, rerunning until it finishes, then its result"""
+    job = queue.get(job_id)
+    if job is None:
+        st.warning(f"Job {job_id} not found.")
+        forget_job()
+        return
+    if job["status"] == QUEUED and queue.fail_orphaned():
+        # Its API key went with a restarted server: show the failure instead of waiting forever
+        job = queue.get(job_id)
+
+    if job["status"] == DONE:
+        st.success(f"Background job {job_id[:8]} completed!")
+        st.session_state["content_result"] = job["result"]
+        render_content_result(job["result"])
+    elif job["status"] == FAILED:
+        st.error(f"Background job {job_id[:8]} failed: {job['error']}")
+        st.info("Please check your API key and try again.")
+
+    if st.button("🧹 Dismiss Job", key="btn_dismiss_job"):
+        forget_job()
+        st.rerun()
+
+    if job["status"] in (QUEUED, RUNNING):
+        progress = job["progress"]
+        label = "Waiting for a worker..." if job["status"] == QUEUED else "Generating content in the background..."
+        with st.status(label, expanded=True):
+            for node in progress.get("completed_nodes", []):
+                st.write(f"✅ {NODE_LABELS.get(node, node)}")
+            for node, chars in progress.get("streamed_chars", {}).items():
+                if node not in progress.get("completed_nodes", []):
+                    st.write(f"✍️ {NODE_LABELS.get(node, node)}: {chars} characters so far")
+        st.caption(f"Job id: {job_id} - you can refresh or close this page and come back.")
+        time.sleep(Config.JOB_POLL_INTERVAL)
+        st.rerun()
+
 def get_access_token(client_id: str, client_secret: str, redirect_uri: str, auth_code: str) -> Dict[str, Any]:
     """Exchange authorization code for access token"""
     token_url = "https://www.linkedin.com/oauth/v2/accessToken"
@@ -366,9 +686,36 @@ if persisted_blog_content:
         clear_blog_content()
         st.success("Blog content cleared. You can start a new blog.")
 
+run_in_background = st.checkbox(
+    "Run in background (keeps running if you refresh or close the page)",
+    value=Config.BACKGROUND_JOBS,
+    key="run_in_background",
+)
+# Sampled generations repeat word for word while cached; unticking regenerates (and refreshes the cache)
+reuse_cache = st.checkbox(
+    "Reuse cached LLM responses",
+    value=True,
+    key="reuse_llm_cache",
+) if Config.LLM_CACHE_DB else True
+
 if st.button("Generate Content", key="btn_generate_content", type="primary"):
     if not api_key_value:
         st.error("Please enter your API key above.")
+    elif run_in_background:
+        job_inputs = {
+            "linkedin_person_id": st.session_state.get("linkedin_person_id", ""),
+            "linkedin_auth_code": st.session_state.get("linkedin_auth_code", ""),
+            "urls": st.session_state.get("urls", ""),
+        }
+        job_id = get_job_queue().submit(
+            user_query,
+            inputs=job_inputs,
+            settings={"provider": llm_provider, "session_id": scheduler_session_id(), "priority": INTERACTIVE,
+                      "reuse_cache": reuse_cache},
+            api_key=api_key_value,
+        )
+        st.session_state["job_id"] = job_id
+        st.query_params["job"] = job_id
     else:
         try:
             os.environ["OPENAI_API_KEY"] = api_key_value
@@ -380,152 +727,31 @@ if st.button("Generate Content", key="btn_generate_content", type="primary"):
                 urls=st.session_state.get("urls", ""),
             )
 
-            with st.spinner("Generating content..."):
-                orchestrator = ContentMarketingOrchestrator()
-                result = orchestrator.app.invoke(initial_state, config={"thread_id": str(uuid.uuid4())})
-                st.session_state["content_result"] = result
+            # Reuse the process-wide orchestrator; drop the cached one if settings changed
+            orchestrator_settings = {"provider": llm_provider, "api_key": api_key_value}
+            previous_settings = st.session_state.get("orchestrator_settings")
+            if previous_settings and previous_settings != orchestrator_settings:
+                invalidate(**previous_settings)
+            st.session_state["orchestrator_settings"] = orchestrator_settings
+
+            orchestrator = get_orchestrator(**orchestrator_settings)
+            thread_id = str(uuid.uuid4())
+            with scheduling_context(scheduler_session_id(), INTERACTIVE), bypass_cache(not reuse_cache):
+                result = stream_generation(orchestrator, initial_state, thread_id)
+            orchestrator.discard_thread(thread_id)
+            st.session_state["content_result"] = result
             
             st.success("Content generation completed!")
 
-            tab6, tab1, tab2, tab3, tab4, tab5, tab7 = st.tabs(
-                [
-                    "📊 Metrics",
-                    "📝 Blog Content",
-                    "🔬 Research Summary",
-                    "🛠️ Workflow Steps",
-                    "💡 Key Insights",
-                    "🖼️ Images",
-                    "💼 LinkedIn Content"
-                ]
-            )
-
-            # Persist blog content
-            blog_content = result.get("blog_content", "No blog content generated.")
-            save_blog_content(blog_content)
-
-            with tab1:
-                st.subheader("Blog Content")
-                # Remove hashtags from blog content
-                import re
-                blog_content_no_hashtags = re.sub(r"#[\w]+", "", blog_content)
-                st.markdown(blog_content_no_hashtags)
-                if st.button("🧹 Clear & Start New Blog", key="btn_clear_blog"):
-                    clear_blog_content()
-                    st.success("Blog content cleared. You can start a new blog.")
-
-            with tab2:
-                st.subheader("Research Summary")
-                summary = result.get("research_summary", "No research summary generated.")
-                if summary and summary != "No research summary generated.":
-                    st.markdown(summary)
-                else:
-                    st.info(summary)
-
-            with tab3:
-                st.subheader("Workflow Steps")
-                steps = result.get("processing_steps", [])
-                if steps:
-                    for i, step in enumerate(steps, 1):
-                        st.write(f"{i}. {step}")
-                else:
-                    st.info("No workflow steps recorded.")
-
-            with tab4:
-                st.subheader("Key Insights")
-                insights = result.get("key_insights", [])
-                if insights:
-                    for insight in insights:
-                        st.write(f"• {insight}")
-                else:
-                    st.info("No key insights generated.")
-
-            with tab5:
-                st.subheader("Generated Images")
-                images = result.get("generated_images", [])
-                if images:
-                    for img in images:
-                        if isinstance(img, str):
-                            st.write(f"Image prompt: {img}")
-                        else:
-                            st.image(img)
-                else:
-                    st.info("No images generated.")
-
-            with tab6:
-                st.subheader("Content Metrics")
-                c1, c2 = st.columns(2)
-                with c1:
-                    st.metric("SEO Score", result.get("seo_score", "N/A"))
-                with c2:
-                    st.metric("Readability Score", result.get("readability_score", "N/A"))
-                quality = result.get("content_quality_scores", {})
-                if quality:
-                    st.subheader("Content Quality Scores")
-                    for metric, score in quality.items():
-                        st.metric(metric.title(), score)
-
-            with tab7:
-                st.subheader("LinkedIn Content")
-                linkedin_content = result.get("linkedin_content", "No LinkedIn content generated.")
-                st.markdown(linkedin_content)
-                st.markdown("---")
-                st.markdown("## 📱 Publish LinkedIn Content")
-                access_token = st.session_state.get("linkedin_access_token", "")
-                LINKEDIN_SCOPE = "w_member_social r_basicprofile openid profile email w_organization_social"
-                if linkedin_content and linkedin_content != "No LinkedIn content generated.":
-                    st.markdown("**Preview of Generated LinkedIn Content:**")
-                    with st.expander("Show LinkedIn Content", expanded=True):
-                        st.markdown(linkedin_content)
-                    col1, col2 = st.columns([1, 1])
-                    with col1:
-                        if st.button("🚀 Publish Generated Content", type="primary", key="btn_publish_generated_tab7"):
-                            if not access_token:
-                                st.error("❌ Missing Access Token. Complete the OAuth flow in the sidebar first!")
-                            elif not validate_linkedin_token(access_token, LINKEDIN_SCOPE):
-                                st.error("❌ Access Token is invalid or expired. Please get a new one.")
-                            else:
-                                with st.spinner("Publishing to LinkedIn..."):
-                                    res = post_to_linkedin_api(access_token, linkedin_content)
-                                    if res.get("success"):
-                                        st.success("✅ Generated content posted to LinkedIn successfully!")
-                                        st.balloons()
-                                    else:
-                                        st.error(f"❌ Failed to post: {res.get('error', 'Unknown error occurred')}")
-                    with col2:
-                        custom_linkedin_content = st.text_area(
-                            "Edit content before posting:",
-                            value=linkedin_content,
-                            height=150,
-                            key="custom_linkedin_content_tab7"
-                        )
-                        if st.button("📝 Publish Edited Content", key="btn_publish_edited_tab7"):
-                            if not access_token:
-                                st.error("❌ Missing Access Token. Complete the OAuth flow in the sidebar first!")
-                            elif not validate_linkedin_token(access_token, LINKEDIN_SCOPE):
-                                st.error("❌ Access Token is invalid or expired. Please get a new one.")
-                            else:
-                                with st.spinner("Publishing to LinkedIn..."):
-                                    res = post_to_linkedin_api(access_token, custom_linkedin_content)
-                                    if res.get("success"):
-                                        st.success("✅ Edited content posted to LinkedIn successfully!")
-                                        st.balloons()
-                                    else:
-                                        st.error(f"❌ Failed to post: {res.get('error', 'Unknown error occurred')}")
-                else:
-                    st.info("No LinkedIn content was generated. Try generating content first.")
-
-
-            if result.get("errors"):
-                st.error("Errors encountered:")
-                for err in result["errors"]:
-                    st.error(f"• {err}")
-            if result.get("warnings"):
-                st.warning("Warnings:")
-                for warn in result["warnings"]:
-                    st.warning(f"• {warn}")
+            render_content_result(result)
 
         except Exception as e:
             st.error(f"An error occurred while generating content: {str(e)}")
             st.info("Please check your API key and try again.")
 
+# Background job for this session (or the one named in the URL after a refresh)
+active_job_id = st.session_state.get("job_id") or st.query_params.get("job")
+if active_job_id:
+    poll_job(get_job_queue(), active_job_id)
+
 ## LinkedIn publishing UI removed from all tabs except 'LinkedIn Content' tab
\ No newline at end of file
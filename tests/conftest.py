@@ -0,0 +1,26 @@
+import sys
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+import pytest
+from src.utils import llm_cache, search_cache, topic_index
+
+
+@pytest.fixture(autouse=True)
+def no_shared_stores():
+    """Run each test without the process-wide LLM cache, search cache and topic index.
+
+    Tests that need one install their own (in a temp dir) with set_cache / set_search_cache /
+    set_topic_index. The previous state is saved without building it, so no default SQLite file
+    is ever created.
+    """
+    saved = (llm_cache._shared.save(), search_cache._shared.save(), topic_index._index,
+             topic_index._index_configured)
+    llm_cache.set_cache(None)
+    search_cache.set_search_cache(None)
+    topic_index.set_topic_index(None)
+    yield
+    llm_cache._shared.restore(saved[0])
+    search_cache._shared.restore(saved[1])
+    topic_index._index, topic_index._index_configured = saved[2:]
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+import tempfile
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+from src.orchestrator.batch import load_topics, completed_ids, run_batch
+
+
+class _FakeApp:
+    """Records peak concurrency and fails on demand"""
+    def __init__(self, fail_topics=()):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = []
+        self.fail_topics = set(fail_topics)
+
+    async def ainvoke(self, state, config=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.calls.append(state["user_query"])
+        try:
+            await asyncio.sleep(0.01)
+            if state["user_query"] in self.fail_topics:
+                raise RuntimeError("provider error")
+            return {"blog_content": f"Blog about {state['user_query']}"}
+        finally:
+            self.in_flight -= 1
+
+
+class _FakeOrchestrator:
+    def __init__(self, **kwargs):
+        self.app = _FakeApp(**kwargs)
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, "topics.jsonl")
+        self.output_path = os.path.join(self.tmp.name, "results.jsonl")
+        with open(self.input_path, "w") as f:
+            for i in range(10):
+                f.write(json.dumps({"id": f"t{i}", "topic": f"topic {i}"}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read_output(self):
+        with open(self.output_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_concurrency_is_bounded_and_results_streamed(self):
+        orchestrator = _FakeOrchestrator()
+        summary = asyncio.run(run_batch(orchestrator, load_topics(self.input_path), self.output_path, concurrency=3))
+        self.assertEqual(summary["succeeded"], 10)
+        self.assertLessEqual(orchestrator.app.peak, 3)
+        records = self._read_output()
+        self.assertEqual({r["id"] for r in records}, {f"t{i}" for i in range(10)})
+        self.assertEqual(records[0]["blog_content"], f"Blog about {records[0]['topic']}")
+
+    def test_resume_skips_finished_and_retries_failed(self):
+        first = _FakeOrchestrator(fail_topics={"topic 4"})
+        asyncio.run(run_batch(first, load_topics(self.input_path), self.output_path, concurrency=4))
+        # Simulate a crash mid-write
+        with open(self.output_path, "a") as f:
+            f.write('{"id": "t9", "stat')
+        self.assertEqual(len(completed_ids(self.output_path)), 9)
+
+        second = _FakeOrchestrator()
+        summary = asyncio.run(run_batch(second, load_topics(self.input_path), self.output_path, concurrency=4))
+        self.assertEqual(second.app.calls, ["topic 4"])
+        self.assertEqual(summary["skipped"], 9)
+        self.assertEqual(len(completed_ids(self.output_path)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
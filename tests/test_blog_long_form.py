@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from src.utils.instrumentation import track_node
+from src.utils.prompt_builder import count_tokens
+from src.agents.blog_writer_agent import SEOBlogWriterAgent
+
+HEADINGS = ["Introduction", "Adoption", "Measurement", "Risks", "Conclusion"]
+OUTLINE = json.dumps({
+    "title": "AI in Marketing",
+    "sections": [{"heading": h, "key_points": [f"{h} point"], "words": 300} for h in HEADINGS],
+    "keywords": ["ai", "marketing", "automation"],
+})
+# Sections take 0.3-0.42s each: 1.8s one after another, 0.42s side by side
+SERIAL_SECONDS = sum(0.3 * (1 + (len(HEADINGS) - n) / 10) for n in range(1, len(HEADINGS) + 1))
+CONTEXT = {"topic": "AI in marketing", "research_summary": "AI is mainstream.", "key_insights": ["73% use AI"]}
+
+
+class _Writer(FakeListChatModel):
+    """Answers the outline prompt with OUTLINE and each section prompt after `delay` seconds"""
+    responses: list = []
+    delay: float = 0.0
+    outline: str = OUTLINE
+
+    def _respond(self, messages) -> str:
+        prompt = messages[-1].content
+        if "Create an outline" in prompt:
+            return self.outline
+        number = prompt.split("Write only section ")[1].split(",")[0]
+        return f"## Section {number}\n\nBody of section {number}.\n\n# Stray heading\n\nMore.\n\nKeywords: x, y"
+
+    def _wait(self, messages) -> float:
+        # Later sections finish first, so stitching has to restore the order
+        prompt = messages[-1].content
+        if "Create an outline" in prompt:
+            return 0.0
+        number = int(prompt.split("Write only section ")[1].split(",")[0])
+        return self.delay * (1 + (len(HEADINGS) - number) / 10)
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self._wait(messages))
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self._wait(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._respond(messages)))])
+
+
+class TestBlogLongForm(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        count_tokens("warm up")  # load (or fail to download) the tokenizer outside the timings
+
+    def _agent(self, **kwargs):
+        agent = SEOBlogWriterAgent(mode="long_form")
+        agent.llm = _Writer(**kwargs)
+        return agent
+
+    def test_sections_are_written_concurrently_and_stitched_in_order(self):
+        agent = self._agent(delay=0.3)
+        started = time.perf_counter()
+        with track_node("blog_writing") as timer:
+            result = agent.create_blog_post(CONTEXT)
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, SERIAL_SECONDS / 2)
+        self.assertEqual([c["name"] for c in timer.calls if c["kind"] == "llm"],
+                         ["blog_outline"] + ["blog_section"] * len(HEADINGS))
+
+        content = result["content"]
+        self.assertTrue(content.startswith("# AI in Marketing\n\n## Introduction\n\nBody of section 1."))
+        positions = [content.index(f"## {h}") for h in HEADINGS]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn("### Stray heading", content)
+        self.assertNotIn("## Section", content)
+        self.assertEqual(content.count("Keywords:"), 1)
+        self.assertEqual(result["keywords"], ["ai", "marketing", "automation"])
+        self.assertEqual(result["sections"], len(HEADINGS))
+
+    def test_async_stream_emits_sections_in_article_order(self):
+        agent, tokens = self._agent(delay=0.3), []
+        started = time.perf_counter()
+        result = asyncio.run(agent.acreate_blog_post(CONTEXT, on_token=tokens.append))
+        self.assertLess(time.perf_counter() - started, SERIAL_SECONDS / 2)
+        self.assertEqual("".join(tokens), result["content"])
+
+        sync_tokens = []
+        sync_result = self._agent(delay=0.05).create_blog_post(CONTEXT, on_token=sync_tokens.append)
+        self.assertEqual("".join(sync_tokens), sync_result["content"])
+
+    def test_unusable_outline_falls_back_to_a_single_completion(self):
+        agent = SEOBlogWriterAgent(mode="long_form")
+        agent.llm = FakeListChatModel(responses=["Here is an outline: intro, body, end",
+                                                 "# Post\n\nWhole post.\n\nKeywords: a, b"])
+        with track_node("blog_writing") as timer:
+            result = agent.create_blog_post(CONTEXT)
+        self.assertEqual([c["name"] for c in timer.calls if c["kind"] == "llm"], ["blog_outline", "blog_writer"])
+        self.assertEqual(result["keywords"], ["a", "b"])
+        self.assertNotIn("sections", result)
+        with self.assertRaises(ValueError):
+            SEOBlogWriterAgent(mode="chapters")
+
+
+if __name__ == "__main__":
+    unittest.main()
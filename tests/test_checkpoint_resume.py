@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+from tests.test_parallel_workflow import _stub_agents
+
+
+class _FailOnce:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("DALL-E error")
+        return self.result
+
+
+class _Counter:
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.inner(*args, **kwargs)
+
+
+class TestCheckpointResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "checkpoints.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _orchestrator(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True, checkpoint_path=self.db_path)
+        _stub_agents(orchestrator, delay=0)
+        orchestrator.research_agent.conduct_research = _Counter(orchestrator.research_agent.conduct_research)
+        orchestrator.blog_writer.create_blog_post = _Counter(orchestrator.blog_writer.create_blog_post)
+        return orchestrator
+
+    def test_resume_after_failed_node_in_new_process(self):
+        config = {"configurable": {"thread_id": "run-1"}}
+        first = self._orchestrator()
+        first.image_generator.generate_images = _FailOnce({"images": ["a.png"], "prompts": ["p"]})
+        with self.assertRaises(RuntimeError):
+            first.app.invoke({"user_query": "AI in marketing"}, config=config)
+
+        # A fresh orchestrator on the same file stands in for a restarted process
+        second = self._orchestrator()
+        result = second.resume("run-1")
+        self.assertEqual(result["generated_images"], ["a.png"])
+        self.assertEqual(result["blog_content"], "AI blog")
+        self.assertEqual(second.research_agent.conduct_research.calls, 0)
+        self.assertEqual(second.blog_writer.create_blog_post.calls, 0)
+        self.assertEqual(result["processing_steps"].count("Research Complete"), 1)
+
+    def test_async_run_and_unknown_thread(self):
+        orchestrator = self._orchestrator()
+        result = asyncio.run(orchestrator.app.ainvoke(
+            {"user_query": "AI"}, config={"configurable": {"thread_id": "run-2"}}
+        ))
+        self.assertTrue(result["success"])
+        self.assertEqual(asyncio.run(orchestrator.aresume("run-2"))["blog_content"], "AI blog")
+        with self.assertRaises(ValueError):
+            orchestrator.resume("missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
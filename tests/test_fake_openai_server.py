@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import random
+import time
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+from src.tools.fake_openai_server import FakeOpenAIServer, FakeServerConfig, parse_latency
+
+
+class TestFakeOpenAIServer(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeOpenAIServer(FakeServerConfig(seed=1)).start()
+        self.client = openai.OpenAI(api_key="fake", base_url=self.server.base_url, max_retries=0, timeout=5)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _llm(self, **kwargs):
+        return ChatOpenAI(model="gpt-4o", api_key="fake", base_url=self.server.base_url, max_retries=0, **kwargs)
+
+    def test_chat_responses_are_deterministic_and_shaped(self):
+        prompt = [("human", 'You are an expert SEO blog writer. Write a blog post about "AI in marketing".')]
+        first = self._llm().invoke(prompt)
+        self.assertEqual(first.content, self._llm().invoke(prompt).content)
+        self.assertIn("AI in marketing", first.content)
+        self.assertIn("Keywords:", first.content)
+        self.assertGreater(first.usage_metadata["output_tokens"], 0)
+
+        chunks = list(self._llm(stream_usage=True).stream(prompt))
+        self.assertEqual("".join(c.content for c in chunks), first.content)
+        self.assertGreater(sum(c.usage_metadata["output_tokens"] for c in chunks if c.usage_metadata), 0)
+
+    def test_rate_limit_and_server_errors_are_injected(self):
+        self.server.configure(rate_429=1.0, retry_after=7)
+        with self.assertRaises(openai.RateLimitError) as caught:
+            self.client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        self.assertEqual(caught.exception.response.headers["Retry-After"], "7")
+        self.server.configure(rate_429=0.0, rate_500=1.0)
+        with self.assertRaises(openai.InternalServerError):
+            self.client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        self.assertEqual(self.server.stats(), {"chat": 2, "429": 1, "500": 1})
+
+    def test_latency_and_timeout_injection(self):
+        self.server.configure(latency="fixed:0.3")
+        start = time.perf_counter()
+        self.client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.3)
+
+        self.server.configure(latency="fixed:0", rate_timeout=1.0, timeout_seconds=5)
+        with self.assertRaises(openai.APITimeoutError):
+            self.client.with_options(timeout=0.5).chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+
+        sampler = parse_latency("bimodal:0.1,2.0,0.25")
+        samples = [sampler(random.Random(i)) for i in range(400)]
+        self.assertAlmostEqual(samples.count(2.0) / len(samples), 0.25, delta=0.08)
+
+    def test_images_are_served_as_png(self):
+        response = self.client.images.generate(model="dall-e-3", prompt="a rocket", n=1, size="1024x1024")
+        image = httpx.get(response.data[0].url)
+        self.assertEqual(image.headers["content-type"], "image/png")
+        self.assertTrue(image.content.startswith(b"\x89PNG"))
+
+    def test_search_endpoint_feeds_research(self):
+        response = httpx.get(self.server.search_url, params={"engine": "google", "q": "AI in marketing", "num": 5})
+        results = response.json()["organic_results"]
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r["link"].startswith("https://") and r["snippet"] for r in results))
+        again = httpx.get(self.server.search_url, params={"engine": "google", "q": "AI in marketing", "num": 5})
+        self.assertEqual(again.json()["organic_results"], results)
+
+
+if __name__ == "__main__":
+    unittest.main()
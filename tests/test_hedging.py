@@ -0,0 +1,139 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+import tempfile
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from pydantic import Field
+from src.utils import hedging, llm_cache
+from src.utils.llm_cache import LLMCache
+from src.utils.hedging import HedgedModel, LatencyTracker
+from src.utils.instrumentation import invoke_llm, ainvoke_llm, stream_llm, track_node
+
+
+class _Model(FakeListChatModel):
+    model_name: str = "primary"
+    delay: float = 0.0
+    fail: bool = False
+    options: list = Field(default_factory=list)
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        self.options.append(kwargs)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("provider down")
+        return super()._call(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("provider down")
+        return self._generate(messages, stop=stop, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        if self.fail:
+            raise ConnectionError("provider down")
+        yield from super()._stream(*args, **kwargs)
+
+
+class TestHedging(unittest.TestCase):
+    def setUp(self):
+        self.previous_tracker = hedging.get_tracker()
+        hedging.set_tracker(LatencyTracker(window=50, percentile=95, min_samples=5, default_delay=0.05))
+
+    def tearDown(self):
+        hedging.set_tracker(self.previous_tracker)
+
+    def test_slow_primary_is_hedged_and_secondary_wins(self):
+        hedged = HedgedModel(_Model(responses=["slow"], delay=1.0),
+                             [_Model(responses=["fast"], model_name="secondary")])
+        with track_node("blog_writing") as timer:
+            start = time.perf_counter()
+            response = invoke_llm(hedged, ["Write about AI"], "blog_writer")
+            elapsed = time.perf_counter() - start
+        self.assertEqual(response.content, "fast")
+        self.assertLess(elapsed, 0.5)
+        call = timer.calls[0]
+        self.assertTrue(call["hedged"])
+        self.assertTrue(call["provider"].endswith("/secondary"))
+
+    def test_secondary_answers_are_not_cached_and_get_portable_options(self):
+        tmp = tempfile.TemporaryDirectory()
+        cache = LLMCache(os.path.join(tmp.name, "llm.sqlite"), ttl=0, max_entries=10)
+        llm_cache.set_cache(cache)
+        try:
+            secondary = _Model(responses=["fast"], model_name="secondary")
+            hedged = HedgedModel(_Model(responses=["slow"], delay=1.0), [secondary])
+            fmt = {"type": "json_schema"}
+            self.assertEqual(invoke_llm(hedged, ["Write about AI"], "blog_writer", response_format=fmt).content, "fast")
+            self.assertEqual(cache.stats()["entries"], 0)
+            self.assertEqual(secondary.options, [{}])
+            self.assertEqual(hedged.primary.options, [{"response_format": fmt}])
+
+            hedged = HedgedModel(_Model(responses=["primary"]), [_Model(responses=["x"], model_name="secondary")])
+            invoke_llm(hedged, ["Write about AI"], "blog_writer")
+            self.assertEqual(cache.stats()["entries"], 1)
+        finally:
+            tmp.cleanup()
+
+    def test_fast_primary_is_not_hedged(self):
+        hedged = HedgedModel(_Model(responses=["primary"]), [_Model(responses=["secondary"], model_name="secondary")])
+        with track_node("blog_writing") as timer:
+            response = asyncio.run(ainvoke_llm(hedged, ["Write about AI"], "blog_writer"))
+        self.assertEqual(response.content, "primary")
+        self.assertFalse(timer.calls[0]["hedged"])
+
+    def test_time_waiting_for_a_pool_thread_does_not_trigger_a_hedge(self):
+        saved = hedging._executor
+        hedging._executor = pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            # Every thread is busy for longer than the 0.05 s deadline
+            pool.submit(time.sleep, 0.3)
+            hedged = HedgedModel(_Model(responses=["primary"], delay=0.01),
+                                 [_Model(responses=["secondary"], model_name="secondary")])
+            with track_node("blog_writing") as timer:
+                response = invoke_llm(hedged, ["Write about AI"], "blog_writer")
+        finally:
+            hedging._executor = saved
+            pool.shutdown()
+        self.assertEqual(response.content, "primary")
+        self.assertFalse(timer.calls[0]["hedged"])
+
+    def test_async_loser_is_cancelled(self):
+        secondary = _Model(responses=["fast"], model_name="secondary")
+        hedged = HedgedModel(_Model(responses=["slow"], delay=5.0), [secondary])
+        start = time.perf_counter()
+        response = asyncio.run(ainvoke_llm(hedged, ["Write about AI"], "blog_writer"))
+        self.assertEqual(response.content, "fast")
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_errors_fail_over(self):
+        hedged = HedgedModel(_Model(responses=["x"], fail=True), [_Model(responses=["backup"], model_name="secondary")])
+        with track_node("blog_writing") as timer:
+            self.assertEqual(invoke_llm(hedged, ["Write about AI"], "blog_writer").content, "backup")
+            tokens = []
+            self.assertEqual(stream_llm(hedged, ["Write about AI"], "blog_writer", tokens.append).content, "backup")
+        self.assertEqual("".join(tokens), "backup")
+        self.assertEqual(len(timer.calls[0]["failovers"]), 1)
+        self.assertEqual(len(timer.calls[1]["failovers"]), 1)
+
+        with self.assertRaises(RuntimeError):
+            invoke_llm(HedgedModel(_Model(responses=["x"], fail=True),
+                                   [_Model(responses=["y"], fail=True, model_name="secondary")]),
+                       ["Write about AI"], "blog_writer")
+
+    def test_deadline_follows_recent_latencies(self):
+        tracker = LatencyTracker(window=100, percentile=90, min_samples=10, default_delay=30)
+        self.assertEqual(tracker.deadline("blog"), 30)
+        for i in range(1, 101):
+            tracker.record("blog", i / 10)
+        self.assertAlmostEqual(tracker.deadline("blog"), 9.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,41 @@
 import unittest
 import sys
 import os
+import tempfile
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 src_path = os.path.join(project_root, 'src')
 sys.path.insert(0, project_root)
 sys.path.insert(0, src_path)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
 from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
 from src.orchestrator.state import ContentMarketingState
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.tools.fake_openai_server import FakeOpenAIServer
+from src.utils.config import Config
 
 class TestInterAgentCommunication(unittest.TestCase):
+    """Runs the whole workflow against the local fake OpenAI API, so no keys or network are needed"""
+
+    def setUp(self):
+        self.server = FakeOpenAIServer().start()
+        self.images = tempfile.TemporaryDirectory()
+        self.previous = (Config.OPENAI_BASE_URL, Config.IMAGE_OUTPUT_DIR)
+        Config.OPENAI_BASE_URL = self.server.base_url
+        Config.IMAGE_OUTPUT_DIR = self.images.name
+
+    def tearDown(self):
+        Config.OPENAI_BASE_URL, Config.IMAGE_OUTPUT_DIR = self.previous
+        self.server.stop()
+        self.images.cleanup()
+
     def test_context_preservation(self):
-        orchestrator = ContentMarketingOrchestrator()
+        orchestrator = ContentMarketingOrchestrator(api_key="fake-key")
+        # Route as the initial state below describes (blog plus LinkedIn); every other agent talks to the fake server
+        orchestrator.query_handler.classifier = None
+        orchestrator.query_handler.llm = FakeListChatModel(responses=[
+            "CONTENT_TYPE: blog\nREQUIRED_AGENTS: research, blog, linkedin, image\nRESEARCH_NEEDED: yes\n"
+            "TARGET_AUDIENCE: Marketing Professionals\nBRAND_VOICE: Professional\nINTENT: Inform and engage"
+        ])
         initial_state = ContentMarketingState(
             user_query="Write a blog post about AI in marketing.",
             conversation_history=[],
@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.jobs.queue import JobQueue, QUEUED, RUNNING, DONE, FAILED, KEY_LOST_ERROR
+from src.jobs.secrets import JobSecrets
+from src.jobs.worker import process_job
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+from tests.test_parallel_workflow import _stub_agents
+
+
+class _Orchestrator:
+    """Finishes every run at once and records which checkpoint threads were discarded"""
+
+    def __init__(self):
+        self.discarded = []
+
+    def stream_run(self, initial_state, thread_id):
+        yield {"type": "done", "state": {**initial_state, "blog_content": "AI blog"}}
+
+    def resume(self, thread_id):
+        raise ValueError(thread_id)
+
+    def discard_thread(self, thread_id):
+        self.discarded.append(thread_id)
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.tmp.name, "jobs.sqlite"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_claim_order_and_api_key_handling(self):
+        first = self.queue.submit("first", settings={"provider": "OpenAI"}, api_key="sk-1")
+        second = self.queue.submit("second")
+        # A process that does not hold the key skips the job instead of running it with its own
+        other_process = JobQueue(self.queue.db_path, secrets=JobSecrets())
+        self.assertEqual(other_process.claim("w0")["id"], second)
+        self.assertIsNone(other_process.claim("w0"))
+        job = self.queue.claim("w1")
+        self.assertEqual(job["id"], first)
+        self.assertEqual(job["api_key"], "sk-1")
+        self.assertEqual(self.queue.get(first)["status"], RUNNING)
+        self.assertNotIn("api_key", self.queue.get(first))
+        conn = sqlite3.connect(self.queue.db_path)
+        try:
+            self.assertNotIn("sk-1", str(conn.execute("SELECT * FROM jobs").fetchall()))
+        finally:
+            conn.close()
+        self.assertIsNone(self.queue.claim("w3"))
+
+    def test_requeued_job_keeps_its_key_and_late_results_are_dropped(self):
+        stale_queue = JobQueue(self.queue.db_path, stale_after=0)
+        job_id = stale_queue.submit("orphaned", api_key="sk-2")
+        stale_queue.claim("stalled-worker")
+        time.sleep(0.01)
+        job = stale_queue.claim("w2")
+        self.assertEqual((job["id"], job["api_key"]), (job_id, "sk-2"))
+        self.assertFalse(stale_queue.update_progress(job_id, {"current_step": "research"}, "stalled-worker"))
+        self.assertEqual(self.queue.get(job_id)["progress"], {})
+        self.assertTrue(stale_queue.update_progress(job_id, {"current_step": "research"}, "w2"))
+        self.assertFalse(stale_queue.complete(job_id, {"blog_content": "late"}, "stalled-worker"))
+        self.assertFalse(stale_queue.fail(job_id, "late error", "stalled-worker"))
+        self.assertEqual(self.queue.get(job_id)["status"], RUNNING)
+        self.assertTrue(stale_queue.complete(job_id, {"blog_content": "fresh"}, "w2"))
+        self.assertEqual(self.queue.result(job_id), {"blog_content": "fresh"})
+        self.assertIsNone(stale_queue.secrets.get(job_id))
+
+    def test_jobs_whose_key_holder_is_gone_are_failed(self):
+        submitter = JobQueue(self.queue.db_path, secrets=JobSecrets())
+        job_id = submitter.submit("keyed", api_key="sk-3")
+        worker = JobQueue(self.queue.db_path, stale_after=60, secrets=JobSecrets())
+        self.assertIsNone(worker.claim("w0"))
+        self.assertEqual(worker.get(job_id)["status"], QUEUED)
+
+        # The submitting server restarts: its key store stops heartbeating
+        conn = sqlite3.connect(self.queue.db_path)
+        try:
+            with conn:
+                conn.execute("UPDATE key_holders SET seen_at = seen_at - 120")
+        finally:
+            conn.close()
+        self.assertEqual(worker.fail_orphaned(), 1)
+        job = worker.get(job_id)
+        self.assertEqual((job["status"], job["error"]), (FAILED, KEY_LOST_ERROR))
+
+    def test_job_that_keeps_stalling_its_worker_is_failed(self):
+        stale_queue = JobQueue(self.queue.db_path, stale_after=0, max_attempts=2)
+        job_id = stale_queue.submit("crashes every worker", api_key="sk-4")
+        for worker in ("w1", "w2"):
+            self.assertEqual(stale_queue.claim(worker)["id"], job_id)
+            time.sleep(0.01)
+        self.assertIsNone(stale_queue.claim("w3"))
+        job = self.queue.get(job_id)
+        self.assertEqual((job["status"], job["attempts"]), (FAILED, 2))
+        self.assertIn("Gave up after 2 attempts", job["error"])
+        self.assertIsNone(stale_queue.secrets.get(job_id))
+
+    def test_stale_worker_keeps_the_new_owners_checkpoint(self):
+        stale_queue = JobQueue(self.queue.db_path, stale_after=0)
+        job_id = stale_queue.submit("AI")
+        stalled = stale_queue.claim("stalled-worker")
+        time.sleep(0.01)
+        current = stale_queue.claim("w2")
+        orchestrator = _Orchestrator()
+        self.assertIsNone(process_job(stale_queue, stalled, orchestrator=orchestrator))
+        self.assertEqual(orchestrator.discarded, [])
+        self.assertIsNotNone(process_job(stale_queue, current, orchestrator=orchestrator))
+        self.assertEqual(orchestrator.discarded, [job_id])
+
+    def test_worker_runs_job_and_reports_progress(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True)
+        _stub_agents(orchestrator, delay=0)
+        job_id = self.queue.submit("AI in marketing", inputs={"urls": ""})
+        process_job(self.queue, self.queue.claim("w1"), orchestrator=orchestrator)
+        job = self.queue.get(job_id)
+        self.assertEqual(job["status"], DONE)
+        self.assertEqual(job["result"]["blog_content"], "AI blog")
+        self.assertIn("finalize", job["progress"]["completed_nodes"])
+        self.assertEqual(self.queue.result(job_id)["user_query"], "AI in marketing")
+        self.assertEqual(self.queue.counts(), {DONE: 1})
+
+    def test_failed_job_and_stale_requeue(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True)
+        _stub_agents(orchestrator, delay=0)
+        orchestrator.research_agent.conduct_research = lambda *args, **kwargs: 1 / 0
+        job_id = self.queue.submit("AI")
+        self.assertIsNone(process_job(self.queue, self.queue.claim("w1"), orchestrator=orchestrator))
+        self.assertEqual(self.queue.get(job_id)["status"], FAILED)
+        self.assertIn("division by zero", self.queue.get(job_id)["error"])
+
+        stale_queue = JobQueue(self.queue.db_path, stale_after=0)
+        orphan = stale_queue.submit("orphaned")
+        stale_queue.claim("crashed-worker")
+        time.sleep(0.01)
+        job = stale_queue.claim("w2")
+        self.assertEqual(job["id"], orphan)
+        self.assertEqual(job["attempts"], 2)
+        self.assertEqual(self.queue.get(orphan)["worker"], "w2")
+        self.assertNotEqual(self.queue.get(orphan)["status"], QUEUED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+from tests.test_parallel_workflow import _stub_agents, _SlowAgent, _RESULTS
+
+
+class _Recorder(_SlowAgent):
+    """Stand-in agent that remembers the keyword arguments it was called with"""
+    def __init__(self, result):
+        super().__init__(0, result)
+        self.kwargs = []
+
+    def __call__(self, *args, **kwargs):
+        self.kwargs.append(kwargs)
+        return self.result
+
+
+class _FastWriter:
+    def create_blog_post(self, context, on_token=None):
+        return {"content": "Quick blog", "quality_score": 70}
+
+    def create_linkedin_post(self, context, on_token=None):
+        return {"content": "Quick post", "quality_score": 70}
+
+
+class TestLatencyBudget(unittest.TestCase):
+    def _orchestrator(self, budget, parallel=True):
+        orchestrator = ContentMarketingOrchestrator(parallel=parallel, latency_budget=budget)
+        _stub_agents(orchestrator, delay=0)
+        orchestrator.research_agent.conduct_research = _Recorder(_RESULTS["conduct_research"])
+        orchestrator.image_generator.generate_images = _Recorder(_RESULTS["generate_images"])
+        orchestrator._fast_agents = {"blog_writer": _FastWriter(), "linkedin_writer": _FastWriter()}
+        return orchestrator
+
+    def test_tight_budget_drops_optional_stages(self):
+        orchestrator = self._orchestrator(budget=30)
+        result = orchestrator.app.invoke({"user_query": "AI"}, config={"thread_id": "tight"})
+        self.assertFalse(orchestrator.research_agent.conduct_research.kwargs[0]["verify_facts"])
+        self.assertEqual(orchestrator.image_generator.generate_images.kwargs, [])
+        self.assertEqual(sorted(result["skipped_stages"]), ["fact_verification", "images"])
+        self.assertEqual(result["blog_content"], "Quick blog")
+        self.assertTrue(any("image generation" in w for w in result["warnings"]))
+        self.assertTrue(any("Switched blog writing" in w for w in result["warnings"]))
+        self.assertTrue(result["success"])
+
+    def test_per_run_budget_limits_images_to_one(self):
+        orchestrator = self._orchestrator(budget=0)
+        # Enough for the first image but not the second
+        result = orchestrator.app.invoke({"user_query": "AI", "latency_budget": 50}, config={"thread_id": "one-image"})
+        self.assertEqual(orchestrator.image_generator.generate_images.kwargs[0]["max_images"], 1)
+        self.assertIn("second_image", result["skipped_stages"])
+        self.assertEqual(result["blog_content"], "AI blog")
+
+    def test_sequential_router_skips_images(self):
+        orchestrator = self._orchestrator(budget=10, parallel=False)
+        orchestrator.query_handler.analyze_query.result = {"content_type": "blog", "required_agents": []}
+        result = orchestrator.app.invoke({"user_query": "AI"}, config={"thread_id": "sequential"})
+        self.assertIn("images", result["skipped_stages"])
+        self.assertEqual(orchestrator.image_generator.generate_images.kwargs, [])
+
+    def test_no_budget_keeps_everything(self):
+        orchestrator = self._orchestrator(budget=0)
+        result = orchestrator.app.invoke({"user_query": "AI"}, config={"thread_id": "unbounded"})
+        self.assertTrue(orchestrator.research_agent.conduct_research.kwargs[0]["verify_facts"])
+        self.assertIsNone(orchestrator.image_generator.generate_images.kwargs[0]["max_images"])
+        self.assertEqual(result.get("skipped_stages", []), [])
+        self.assertEqual(result.get("warnings", []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import tempfile
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.utils import llm_cache
+from src.utils.llm_cache import LLMCache, bypass_cache
+from src.utils.instrumentation import invoke_llm, ainvoke_llm, stream_llm, track_node
+
+
+class _FailingModel(FakeListChatModel):
+    def _call(self, *args, **kwargs):
+        raise RuntimeError("rate limited")
+
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(os.path.join(self.tmp.name, "cache.sqlite"), ttl=3600, max_entries=100)
+        llm_cache.set_cache(self.cache)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeat_call_is_served_from_cache(self):
+        llm = FakeListChatModel(responses=["first answer", "second answer"])
+        with track_node("blog_writing") as timer:
+            self.assertEqual(invoke_llm(llm, ["Write about AI"], "blog_writer").content, "first answer")
+            self.assertEqual(asyncio.run(ainvoke_llm(llm, ["Write about AI"], "blog_writer")).content, "first answer")
+            tokens = []
+            self.assertEqual(stream_llm(llm, ["Write about AI"], "blog_writer", tokens.append).content, "first answer")
+            self.assertEqual(tokens, ["first answer"])
+            self.assertEqual(invoke_llm(llm, ["Write about ML"], "blog_writer").content, "second answer")
+        self.assertEqual([c["cache"] for c in timer.calls], ["miss", "hit", "hit", "miss"])
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 2, 2))
+
+    def test_bypass_regenerates_and_refreshes_the_entry(self):
+        llm = FakeListChatModel(responses=["first draft", "second draft"])
+        self.assertEqual(invoke_llm(llm, ["Write about AI"], "blog_writer").content, "first draft")
+        with track_node("blog_writing") as timer, bypass_cache():
+            self.assertEqual(invoke_llm(llm, ["Write about AI"], "blog_writer").content, "second draft")
+        self.assertEqual([c["cache"] for c in timer.calls], ["bypass"])
+        self.assertEqual(invoke_llm(llm, ["Write about AI"], "blog_writer").content, "second draft")
+
+    def test_failures_are_not_cached(self):
+        with self.assertRaises(RuntimeError):
+            invoke_llm(_FailingModel(responses=["x"]), ["Write about AI"], "blog_writer")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_ttl_and_lru_eviction(self):
+        cache = LLMCache(self.cache.db_path, ttl=0.05, max_entries=2)
+        cache.put("a", "m", "A")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expired"], 1)
+
+        cache.ttl = 3600
+        cache.put("a", "m", "A")
+        cache.put("b", "m", "B")
+        time.sleep(0.01)
+        self.assertEqual(cache.get("a"), "A")  # a is now more recently used than b
+        cache.put("c", "m", "C")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_key_depends_on_model_and_messages(self):
+        llm = FakeListChatModel(responses=["x"])
+        self.assertEqual(llm_cache.cache_key(llm, ["p"]), llm_cache.cache_key(FakeListChatModel(responses=["y"]), ["p"]))
+        self.assertNotEqual(llm_cache.cache_key(llm, ["p"]), llm_cache.cache_key(llm, ["q"]))
+
+if __name__ == "__main__":
+    unittest.main()
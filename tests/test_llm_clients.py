@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.utils import llm_clients
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+
+
+class TestLLMClientRegistry(unittest.TestCase):
+    def setUp(self):
+        llm_clients.clear()
+
+    def test_clients_shared_by_settings(self):
+        first = llm_clients.get_chat_model("openai", "gpt-4o", 0.7, "sk-a")
+        self.assertIs(first, llm_clients.get_chat_model("openai", "gpt-4o", 0.7, "sk-a"))
+        self.assertIsNot(first, llm_clients.get_chat_model("openai", "gpt-4o", 0.3, "sk-a"))
+        self.assertIsNot(first, llm_clients.get_chat_model("openai", "gpt-4o", 0.7, "sk-b"))
+        self.assertEqual(llm_clients.cached_count(), 3)
+        with self.assertRaises(ValueError):
+            llm_clients.get_chat_model("unknown")
+
+    def test_orchestrators_reuse_agent_clients_and_pool(self):
+        first = ContentMarketingOrchestrator(api_key="sk-shared")
+        second = ContentMarketingOrchestrator(api_key="sk-shared")
+        self.assertIs(first.blog_writer.llm, second.blog_writer.llm)
+        # Same model and temperature across agents means the same client
+        self.assertIs(first.blog_writer.llm, first.content_strategist.llm)
+        self.assertIsNot(first.query_handler.llm, first.blog_writer.llm)
+        pool = llm_clients.http_client()
+        self.assertIs(first.research_agent.llm.root_client._client, pool)
+        self.assertIs(llm_clients.get_openai_client("sk-shared")._client, pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+import httpx
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from pydantic import Field
+from src.utils.config import Config
+from src.utils.instrumentation import track_node
+from src.utils.page_fetcher import PageTextParser, fetch_pages, afetch_pages
+from src.agents.deep_research_agent import DeepResearchAgent
+from src.tools.fake_openai_server import FakeOpenAIServer, FakeServerConfig
+
+ARTICLE = "Marketing teams that adopted AI report a 30% lift in qualified leads within six months."
+PAGE = f"""<html><head><title>AI &amp; Marketing</title><script>var x = "{ARTICLE}";</script></head>
+<body><div id="top-nav"><a href="/">Home</a><a href="/blog">Blog</a></div>
+<div class="cookie-consent"><p>We use cookies to give you the best possible experience on this site.</p></div>
+<div class="content"><h2>Results</h2><p>{ARTICLE}</p><p>Read more</p><p>{ARTICLE}</p>
+<p>Budgets for automation tools grew in every region surveyed, led by North America.<br>
+Smaller teams caught up fastest once tooling became cheaper to run.</p><img src="a.png"></div>
+<footer><p>Copyright 2024 Example Media. All rights reserved worldwide.</p></footer></body></html>"""
+
+
+class _Recorder(FakeListChatModel):
+    prompts: list = Field(default_factory=list)
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append("\n".join(m.content for m in messages))
+        return super()._call(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class TestPageFetcher(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeOpenAIServer(FakeServerConfig(seed=2, page_links=True, page_latency="fixed:0.3")).start()
+        self.saved = (Config.PAGE_MAX_BYTES, Config.PAGE_FETCH_TIMEOUT)
+
+    def tearDown(self):
+        self.server.stop()
+        Config.PAGE_MAX_BYTES, Config.PAGE_FETCH_TIMEOUT = self.saved
+
+    def _links(self, count=5):
+        response = httpx.get(self.server.search_url, params={"q": "AI in marketing", "num": count})
+        return [r["link"] for r in response.json()["organic_results"]]
+
+    def test_boilerplate_is_stripped_while_streaming(self):
+        parser = PageTextParser()
+        for start in range(0, len(PAGE), 7):  # arbitrary chunk boundaries, as over the network
+            parser.feed(PAGE[start:start + 7])
+        text = parser.text()
+        self.assertEqual(parser.title, "AI & Marketing")
+        self.assertEqual(text.split("\n\n"), [
+            ARTICLE,
+            "Budgets for automation tools grew in every region surveyed, led by North America.",
+            "Smaller teams caught up fastest once tooling became cheaper to run.",
+        ])
+        for boilerplate in ("cookies", "Home", "Copyright", "Read more", "var x"):
+            self.assertNotIn(boilerplate, text)
+
+    def test_pages_are_fetched_concurrently(self):
+        links = self._links()
+        with track_node("research") as timer:
+            started = time.perf_counter()
+            pages = fetch_pages(links)
+            elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, 0.3 * 3)  # 1.5 s one after another
+        self.assertEqual([p["url"] for p in pages], links)
+        page = pages[0]
+        self.assertIn("ai in marketing is driving", page["text"])
+        self.assertNotIn("cookies", page["text"])
+        self.assertNotIn("Related posts", page["text"])
+        self.assertEqual([c["name"] for c in timer.calls], ["page_fetch"] * len(links))
+        self.assertEqual(timer.as_record()["bytes_downloaded"], sum(p["bytes"] for p in pages))
+
+        started = time.perf_counter()
+        async_pages = asyncio.run(afetch_pages(links))
+        self.assertLess(time.perf_counter() - started, 0.3 * 3)
+        self.assertEqual([p["text"] for p in async_pages], [p["text"] for p in pages])
+
+    def test_byte_and_time_limits(self):
+        link = self._links(1)[0]
+        Config.PAGE_MAX_BYTES = 1200
+        page = fetch_pages([link])[0]
+        self.assertTrue(page["truncated"])
+        self.assertLessEqual(page["bytes"], 1200)
+
+        Config.PAGE_MAX_BYTES = self.saved[0]
+        Config.PAGE_FETCH_TIMEOUT = 0.1
+        started = time.perf_counter()
+        self.assertEqual(fetch_pages([link]), [None])
+        self.assertEqual(asyncio.run(afetch_pages([link, "http://127.0.0.1:9/unreachable"])), [None, None])
+        self.assertLess(time.perf_counter() - started, 0.3 * 2)
+
+    def test_research_prompts_use_page_text(self):
+        saved_serp = (Config.SERP_API_URL, Config.PAGE_FETCH_COUNT)
+        Config.SERP_API_URL, Config.PAGE_FETCH_COUNT = self.server.search_url, 2
+        try:
+            agent = DeepResearchAgent(mode="two_call")
+            agent.serp_api_key = "fake"
+            agent.llm = _Recorder(responses=["- AI lifts leads by 30%", "Summary"], prompts=[])
+            with track_node("research") as timer:
+                result = agent.conduct_research("AI in marketing")
+        finally:
+            Config.SERP_API_URL, Config.PAGE_FETCH_COUNT = saved_serp
+        names = [c["name"] for c in timer.calls]
+        self.assertEqual(names.count("page_fetch"), 2)
+        insight_prompt = agent.llm.prompts[0]
+        self.assertEqual(insight_prompt.count("Page: "), 2)
+        self.assertEqual(insight_prompt.count("Snippet: "), len(result["search_results"]) - 2)
+        self.assertNotIn("cookies", insight_prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
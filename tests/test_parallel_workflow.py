@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.orchestrator.workflow_orchestrator import ContentMarketingOrchestrator
+
+
+class _SlowAgent:
+    """Stand-in agent that sleeps instead of calling the LLM"""
+    def __init__(self, delay, result):
+        self.delay = delay
+        self.result = result
+
+    def __call__(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return self.result
+
+
+class _AsyncSlowAgent(_SlowAgent):
+    """Async stand-in agent that yields to the event loop while 'waiting on the LLM'"""
+    async def __call__(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+def _stub_agents(orchestrator, delay=0.3):
+    _stub(orchestrator.query_handler, "analyze_query", 0)
+    _stub(orchestrator.research_agent, "conduct_research", 0)
+    _stub(orchestrator.blog_writer, "create_blog_post", delay)
+    _stub(orchestrator.linkedin_writer, "create_linkedin_post", delay)
+    _stub(orchestrator.image_generator, "generate_images", delay)
+    _stub(orchestrator.content_strategist, "create_strategy", delay)
+
+
+def _stub(agent, method, delay):
+    setattr(agent, method, _SlowAgent(delay, _RESULTS[method]))
+    setattr(agent, "a" + method, _AsyncSlowAgent(delay, _RESULTS[method]))
+
+
+_RESULTS = {
+    "analyze_query": {
+        "content_type": "mixed",
+        "required_agents": ["research_agent", "blog_writer", "LinkedInWriterAgent",
+                            "image_generator", "content_strategist"],
+        "research_needed": True,
+    },
+    "conduct_research": {"summary": "AI research summary", "key_insights": ["AI insight"]},
+    "create_blog_post": {"content": "AI blog", "quality_score": 85},
+    "create_linkedin_post": {"content": "AI post", "quality_score": 88},
+    "generate_images": {"images": ["a.png"], "prompts": ["p"]},
+    "create_strategy": {"strategy": "AI strategy"},
+}
+
+
+class TestParallelWorkflow(unittest.TestCase):
+    def test_writers_fan_out_and_join(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True)
+        _stub_agents(orchestrator, delay=0.3)
+        started = time.perf_counter()
+        result = orchestrator.app.invoke(
+            {"user_query": "AI in marketing"}, config={"thread_id": "parallel-thread"}
+        )
+        elapsed = time.perf_counter() - started
+        self.assertEqual(result["blog_content"], "AI blog")
+        self.assertEqual(result["linkedin_content"], "AI post")
+        self.assertEqual(result["generated_images"], ["a.png"])
+        self.assertEqual(result["strategy_content"], "AI strategy")
+        self.assertEqual(result["content_quality_scores"], {"blog": 85, "linkedin": 88})
+        self.assertEqual(result["processing_steps"][-1], "Workflow Complete")
+        self.assertEqual(result["processing_steps"].count("Workflow Complete"), 1)
+        self.assertEqual(
+            sorted(t["node"] for t in result["timings"]),
+            sorted(["query_analysis", "research", "blog_writing", "linkedin_writing",
+                    "image_generation", "strategy", "finalize"])
+        )
+        # Four 0.3s writers should cost about one writer, not the sum
+        self.assertLess(elapsed, 0.9)
+
+    def test_async_path_runs_on_event_loop(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True)
+        _stub_agents(orchestrator, delay=0.3)
+
+        async def run_many():
+            return await asyncio.gather(*[
+                orchestrator.app.ainvoke({"user_query": f"topic {i}"}, config={"thread_id": f"async-{i}"})
+                for i in range(5)
+            ])
+
+        started = time.perf_counter()
+        results = asyncio.run(run_many())
+        elapsed = time.perf_counter() - started
+        self.assertTrue(all(r["blog_content"] == "AI blog" for r in results))
+        # Five concurrent runs share one loop instead of queueing
+        self.assertLess(elapsed, 1.5)
+
+    def test_fan_out_selects_only_required_writers(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True)
+        branches = orchestrator._route_fan_out({"content_type": "linkedin", "required_agents": ["LinkedInWriterAgent"]})
+        self.assertEqual(branches, ["linkedin"])
+        self.assertEqual(orchestrator._route_fan_out({"content_type": "research", "required_agents": []}), ["finalize"])
+
+    def test_sequential_graph_writes_mixed_requests(self):
+        orchestrator = ContentMarketingOrchestrator()
+        _stub_agents(orchestrator, delay=0)
+        result = orchestrator.app.invoke({"user_query": "AI in marketing"}, config={"thread_id": "sequential-mixed"})
+        self.assertEqual(result["blog_content"], "AI blog")
+        self.assertEqual(result["linkedin_content"], "AI post")
+
+    def test_speculative_research_overlaps_query_analysis(self):
+        orchestrator = ContentMarketingOrchestrator(parallel=True, speculative_research=True)
+        _stub_agents(orchestrator, delay=0)
+        _stub(orchestrator.query_handler, "analyze_query", 0.3)
+        _stub(orchestrator.research_agent, "conduct_research", 0.3)
+        started = time.perf_counter()
+        result = orchestrator.app.invoke({"user_query": "AI"}, config={"thread_id": "speculative-kept"})
+        self.assertLess(time.perf_counter() - started, 0.55)
+        self.assertEqual(result["research_summary"], "AI research summary")
+        self.assertTrue(result["speculative_research"]["kept"])
+
+    def test_speculative_research_dropped_when_not_needed(self):
+        orchestrator = ContentMarketingOrchestrator(speculative_research=True)
+        _stub_agents(orchestrator, delay=0)
+        orchestrator.query_handler.analyze_query.result = {"content_type": "blog", "research_needed": False}
+        result = orchestrator.app.invoke({"user_query": "AI"}, config={"thread_id": "speculative-dropped"})
+        self.assertEqual(result["research_summary"], "")
+        self.assertEqual(result["key_insights"], [])
+        self.assertFalse(result["speculative_research"]["kept"])
+        self.assertIn("wall_ms", result["speculative_research"])
+        self.assertTrue(any("Speculative research discarded" in w for w in result["warnings"]))
+        self.assertEqual(result["blog_content"], "AI blog")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.utils.instrumentation import track_node
+from src.utils.prompt_builder import compress, count_tokens, fit_context
+from src.agents.linkedin_writer_agent import LinkedInWriterAgent
+
+FACT = "AI marketing adoption grew 40% in 2024 among mid-size companies."
+FILLER = "There are many general considerations that people discuss in various contexts."
+
+
+def _summary(sentences: int) -> str:
+    return " ".join(FACT if i % 5 == 0 else FILLER for i in range(sentences))
+
+
+class TestPromptBuilder(unittest.TestCase):
+    def test_small_context_is_unchanged(self):
+        fields = {"research_summary": "Short summary.", "key_insights": ["one", "two"]}
+        with track_node("blog_writing") as timer:
+            self.assertEqual(fit_context("blog_writer", fields, budget=100), fields)
+        self.assertEqual(timer.as_record()["prompt_tokens_saved"], 0)
+
+    def test_compression_keeps_relevant_sentences_within_budget(self):
+        summary = _summary(100)
+        compressed = compress(summary, 100, topic="AI marketing")
+        self.assertLessEqual(count_tokens(compressed), 100)
+        self.assertGreater(compressed.count(FACT), compressed.count(FILLER))
+
+        insights = [FILLER] * 20 + [FACT]
+        kept = compress(insights, 40, topic="AI marketing")
+        self.assertIn(FACT, kept)
+        self.assertLess(len(kept), len(insights))
+
+    def test_compression_keeps_line_structure(self):
+        document = (f"## Findings\n\n{FACT} {FILLER}\n\n- {FACT}\n- {FILLER}\n  - {FACT}\n\n"
+                    f"{FILLER} {FILLER}\n\n{FACT}")
+        compressed = compress(document, count_tokens(document) // 2, topic="AI marketing")
+        self.assertLessEqual(count_tokens(compressed), count_tokens(document) // 2)
+        self.assertNotIn(FILLER, compressed)
+        # Bullets, their indentation and the paragraph breaks around dropped sentences survive
+        self.assertTrue(compressed.endswith(f"{FACT}\n\n- {FACT}\n  - {FACT}\n\n{FACT}"), compressed)
+
+    def test_budget_is_shared_and_savings_are_recorded(self):
+        fields = {"research_summary": _summary(100), "key_insights": ["AI helps targeting"], "blog_content": _summary(300)}
+        with track_node("linkedin_writing") as timer:
+            fitted = fit_context("linkedin_writer", fields, topic="AI marketing", budget=600)
+        self.assertEqual(fitted["key_insights"], ["AI helps targeting"])
+        total = sum(count_tokens(v if isinstance(v, str) else "\n".join(v)) for v in fitted.values())
+        self.assertLessEqual(total, 600)
+        record = timer.as_record()
+        self.assertEqual(record["prompt_tokens_saved"], timer.calls[0]["tokens_before"] - total)
+        self.assertGreater(record["prompt_tokens_saved"], 0)
+
+    def test_linkedin_prompt_does_not_paste_whole_blog(self):
+        agent = LinkedInWriterAgent()
+        blog = _summary(2000)
+        messages = agent._build_messages({"topic": "AI marketing", "blog_content": blog})
+        self.assertLess(count_tokens(messages[1].content), count_tokens(blog) // 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.utils.instrumentation import track_node
+from src.agents.query_classifier import QueryClassifier
+from src.agents.query_handler_agent import QueryHandlerAgent
+
+LLM_ANALYSIS = """CONTENT_TYPE: strategy
+REQUIRED_AGENTS: research, strategy
+RESEARCH_NEEDED: yes
+TARGET_AUDIENCE: none
+BRAND_VOICE: none
+INTENT: newsletter ideas"""
+
+
+class TestQueryClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = QueryClassifier()
+
+    def test_explicit_requests_are_matched_by_rules(self):
+        cases = {
+            "Write a blog post about AI in marketing": "blog",
+            "LinkedIn post on remote work": "linkedin",
+            "Write a blog post and a LinkedIn post about AI ethics": "mixed",
+            "Blog post about climate tech with images": "blog",
+            "Create a content strategy for a fintech startup": "strategy",
+            "Generate an image of a futuristic city": "image",
+        }
+        for query, content_type in cases.items():
+            result = self.classifier.classify(query)
+            self.assertEqual(result["content_type"], content_type, query)
+            self.assertEqual(result["routing"]["method"], "rules")
+        image = self.classifier.classify("Generate an image of a futuristic city")
+        self.assertEqual(image["required_agents"], ["image_generator"])
+        self.assertFalse(image["research_needed"])
+
+    def test_audience_and_voice_are_extracted(self):
+        result = self.classifier.classify("Write a blog on AI for marketing teams in a friendly tone")
+        self.assertEqual(result["target_audience"], "marketing teams")
+        self.assertEqual(result["brand_voice"], "friendly")
+
+    def test_vague_and_referential_requests_are_not_confident(self):
+        self.assertLess(self.classifier.classify("Help me with marketing")["routing"]["confidence"], 0.8)
+        follow_up = self.classifier.classify("make it shorter", ["Write a blog post about AI"])
+        self.assertEqual(follow_up["routing"]["method"], "none")
+
+
+class TestQueryHandlerFastPath(unittest.TestCase):
+    def _agent(self, fast_path=True):
+        agent = QueryHandlerAgent(fast_path=fast_path)
+        agent.llm = FakeListChatModel(responses=[LLM_ANALYSIS])
+        return agent
+
+    def test_clear_request_skips_llm(self):
+        with track_node("query_analysis") as timer:
+            result = self._agent().analyze_query("Write a blog post about AI in marketing")
+        self.assertEqual(result["content_type"], "blog")
+        self.assertEqual([c["kind"] for c in timer.calls], ["classifier"])
+
+    def test_ambiguous_request_uses_llm(self):
+        with track_node("query_analysis") as timer:
+            result = self._agent().analyze_query("Ideas for our newsletter")
+        self.assertEqual(result["content_type"], "strategy")
+        self.assertEqual([c["kind"] for c in timer.calls], ["classifier", "llm"])
+
+    def test_fast_path_can_be_disabled(self):
+        with track_node("query_analysis") as timer:
+            self._agent(fast_path=False).analyze_query("Write a blog post about AI in marketing")
+        self.assertEqual([c["kind"] for c in timer.calls], ["llm"])
+
+
+if __name__ == "__main__":
+    unittest.main()
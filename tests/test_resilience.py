@@ -0,0 +1,189 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+import socket
+import httpx
+import requests
+from langchain_openai import ChatOpenAI
+from src.utils.instrumentation import invoke_llm, track_call, track_node
+from src.utils.resilience import (Resilience, CircuitOpenError, get_resilience, set_resilience,
+                                  retry_call, aretry_call, retry_after)
+from src.tools.fake_openai_server import FakeOpenAIServer, FakeServerConfig
+
+
+def _http_error(status: int, headers: dict = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class _Flaky:
+    """Raises the given errors in turn, then returns "ok"; counts calls"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class TestResilience(unittest.TestCase):
+    def setUp(self):
+        set_resilience(Resilience(max_attempts=3, base_delay=0.01, max_delay=0.05, retry_after_max=1,
+                                  failure_threshold=5, reset_seconds=0.2))
+
+    def tearDown(self):
+        set_resilience(None)
+
+    def test_transient_errors_are_retried_and_counted(self):
+        fn = _Flaky(_http_error(502), httpx.ConnectTimeout("slow connect"))
+        with track_node("research") as timer:
+            with track_call("http", "serpapi") as call:
+                self.assertEqual(retry_call("serpapi", fn, call), "ok")
+        self.assertEqual(fn.calls, 3)
+        self.assertEqual(timer.as_record()["retries"], 2)
+        self.assertEqual(get_resilience().stats()["serpapi"],
+                         {"calls": 3, "failures": 2, "retries": 2, "short_circuits": 0, "state": "closed"})
+
+        # Permanent errors are raised at once and do not count against the breaker
+        bad_request = _Flaky(_http_error(400), ValueError("bad"))
+        with self.assertRaises(httpx.HTTPStatusError):
+            retry_call("serpapi", bad_request)
+        self.assertEqual(bad_request.calls, 1)
+        with self.assertRaises(httpx.HTTPStatusError):
+            retry_call("serpapi", _Flaky(*[_http_error(503)] * 3))
+        self.assertEqual(get_resilience().stats()["serpapi"]["failures"], 5)
+
+    def test_retry_after_is_honoured_up_to_the_limit(self):
+        self.assertEqual(retry_after(_http_error(429, {"Retry-After": "2"})), 2.0)
+        self.assertEqual(retry_after(_http_error(429, {"retry-after-ms": "250"})), 0.25)
+        self.assertIsNone(retry_after(ValueError("no response")))
+
+        fn = _Flaky(_http_error(429, {"Retry-After": "0.3"}))
+        started = time.perf_counter()
+
+        async def attempt():
+            return fn()
+        self.assertEqual(asyncio.run(aretry_call("llm:openai/gpt-4o", attempt)), "ok")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.3)
+
+        too_long = _Flaky(_http_error(429, {"Retry-After": "60"}))
+        with self.assertRaises(httpx.HTTPStatusError):
+            retry_call("llm:openai/gpt-4o", too_long)
+        self.assertEqual(too_long.calls, 1)
+
+    def test_breaker_opens_short_circuits_and_recovers(self):
+        set_resilience(Resilience(max_attempts=2, base_delay=0.01, failure_threshold=3, reset_seconds=0.2))
+        failing = _Flaky(*[httpx.ConnectError("refused")] * 4)
+        with self.assertRaises(httpx.ConnectError):
+            retry_call("dall-e", failing)
+        with self.assertRaises(httpx.ConnectError):
+            retry_call("dall-e", failing)  # third consecutive failure opens the breaker
+        self.assertEqual(get_resilience().stats()["dall-e"]["state"], "open")
+        with self.assertRaises(CircuitOpenError):
+            retry_call("dall-e", failing)
+        self.assertEqual(failing.calls, 3)
+
+        time.sleep(0.25)
+        with self.assertRaises(httpx.ConnectError):
+            retry_call("dall-e", failing)  # the half-open trial fails: open again, no retries
+        self.assertEqual(failing.calls, 4)
+        with self.assertRaises(CircuitOpenError):
+            retry_call("dall-e", failing)
+
+        time.sleep(0.25)
+        self.assertEqual(retry_call("dall-e", failing), "ok")
+        stats = get_resilience().stats()["dall-e"]
+        self.assertEqual((stats["state"], stats["short_circuits"]), ("closed", 2))
+
+    def test_half_open_trial_is_released_on_any_outcome(self):
+        set_resilience(Resilience(max_attempts=1, failure_threshold=1, reset_seconds=0.1))
+        with self.assertRaises(httpx.ConnectError):
+            retry_call("serpapi", _Flaky(httpx.ConnectError("refused")))
+        time.sleep(0.15)
+        # The trial gets an answer, just not a usable one: the dependency is up again
+        with self.assertRaises(httpx.HTTPStatusError):
+            retry_call("serpapi", _Flaky(_http_error(400)))
+        self.assertEqual(get_resilience().stats()["serpapi"]["state"], "closed")
+        self.assertEqual(retry_call("serpapi", _Flaky()), "ok")
+
+        with self.assertRaises(httpx.ConnectError):
+            retry_call("serpapi", _Flaky(httpx.ConnectError("refused")))
+        time.sleep(0.15)
+
+        async def cancelled_trial():
+            async def slow():
+                await asyncio.sleep(10)
+            task = asyncio.ensure_future(aretry_call("serpapi", slow))
+            await asyncio.sleep(0.05)
+            task.cancel()  # as when a hedged request loses the race
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(cancelled_trial())
+        self.assertEqual(get_resilience().stats()["serpapi"]["state"], "half_open")
+        self.assertEqual(retry_call("serpapi", _Flaky()), "ok")
+        self.assertEqual(get_resilience().stats()["serpapi"]["state"], "closed")
+
+    def test_non_idempotent_calls_retry_only_unprocessed_requests(self):
+        post = _Flaky(_http_error(500))
+        with self.assertRaises(httpx.HTTPStatusError):
+            retry_call("linkedin", post, idempotent=False)
+        self.assertEqual(post.calls, 1)
+
+        post = _Flaky(_http_error(503), httpx.ConnectError("refused"))
+        self.assertEqual(retry_call("linkedin", post, idempotent=False), "ok")
+        self.assertEqual(post.calls, 3)
+
+    def test_requests_errors_are_classified(self):
+        # SerpAPI, image downloads and LinkedIn posts go through requests, not httpx
+        download = _Flaky(requests.exceptions.ConnectionError("connection reset"),
+                          requests.exceptions.ReadTimeout("slow read"))
+        self.assertEqual(retry_call("image_download", download), "ok")
+        self.assertEqual(download.calls, 3)
+        download = _Flaky(requests.exceptions.ChunkedEncodingError("truncated"))
+        self.assertEqual(retry_call("image_download", download), "ok")
+
+        # A refused connection never reached the server, so even a post is repeated
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=2)
+        except requests.exceptions.ConnectionError as e:
+            refused = e
+        post = _Flaky(refused, requests.exceptions.ConnectTimeout("slow connect"))
+        self.assertEqual(retry_call("linkedin", post, idempotent=False), "ok")
+        self.assertEqual(post.calls, 3)
+        # A reset after sending may have been acted on
+        post = _Flaky(requests.exceptions.ConnectionError("connection reset"))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            retry_call("linkedin", post, idempotent=False)
+        self.assertEqual(post.calls, 1)
+
+    def test_pipeline_calls_survive_injected_server_errors(self):
+        set_resilience(Resilience(max_attempts=6, base_delay=0.01, max_delay=0.05, failure_threshold=20))
+        server = FakeOpenAIServer(FakeServerConfig(seed=3, rate_500=0.3)).start()
+        try:
+            llm = ChatOpenAI(model="gpt-4o", api_key="fake", base_url=server.base_url, max_retries=0, timeout=5)
+            with track_node("blog_writing") as timer:
+                for i in range(8):
+                    response = invoke_llm(llm, [("human", f'Write a blog post about "topic {i}".')], "blog_writer")
+                    self.assertIn(f"topic {i}", response.content)
+        finally:
+            server.stop()
+        self.assertGreater(server.stats().get("500", 0), 0)
+        self.assertEqual(timer.as_record()["retries"], server.stats()["500"])
+        self.assertEqual(get_resilience().stats()["llm:openai/gpt-4o"]["state"], "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
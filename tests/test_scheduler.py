@@ -0,0 +1,122 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import threading
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.utils.scheduler import Scheduler, scheduling_context, get_scheduler, set_scheduler, llm_key, INTERACTIVE, BATCH
+from src.utils.instrumentation import invoke_llm, ainvoke_llm, stream_llm, astream_llm, track_node
+
+KEY = ("fake", "model")
+
+
+class _Rejecting(FakeListChatModel):
+    """Fails every call, as a provider answering HTTP 400 would"""
+
+    def _call(self, *args, **kwargs):
+        raise ValueError("bad request")
+
+    def _stream(self, *args, **kwargs):
+        raise ValueError("bad request")
+
+    async def _astream(self, *args, **kwargs):
+        raise ValueError("bad request")
+        yield
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.previous = get_scheduler()
+
+    def tearDown(self):
+        set_scheduler(self.previous)
+
+    def test_request_bucket_throttles(self):
+        scheduler = Scheduler(limits={"fake:model": {"rpm": 60}})
+        for _ in range(60):
+            self.assertLess(scheduler.acquire(KEY).wait_ms, 50)
+        started = time.perf_counter()
+        ticket = scheduler.acquire(KEY)
+        self.assertGreater(time.perf_counter() - started, 0.8)
+        self.assertGreater(ticket.wait_ms, 800)
+
+    def test_interactive_first_then_fair_across_sessions(self):
+        scheduler = Scheduler(limits={})
+        with scheduling_context("batch-a", BATCH):
+            tickets = [scheduler._new_ticket(KEY, 0) for _ in range(3)]
+        with scheduling_context("batch-b", BATCH):
+            tickets += [scheduler._new_ticket(KEY, 0) for _ in range(2)]
+        with scheduling_context("editor", INTERACTIVE):
+            tickets.append(scheduler._new_ticket(KEY, 0))
+
+        order = []
+        limiter = scheduler._limiter(KEY)
+        while limiter.head() is not None:
+            ticket = limiter.head()
+            self.assertTrue(scheduler._try_grant(ticket)[0])
+            order.append(ticket.session)
+        self.assertEqual(order, ["editor", "batch-a", "batch-b", "batch-a", "batch-b", "batch-a"])
+
+    def test_idle_sessions_are_forgotten(self):
+        scheduler = Scheduler(limits={})
+        for job in range(50):
+            with scheduling_context(f"job-{job}", BATCH):
+                scheduler.acquire(KEY)
+        self.assertEqual(scheduler._limiter(KEY).served, {})
+
+    def test_async_waiter_wakes_on_refund_without_polling(self):
+        scheduler = Scheduler(limits={"fake:model": {"rpm": 600, "tpm": 60000}})
+        held = scheduler.acquire(KEY, 59000)
+        checks = []
+        try_grant = scheduler._try_grant
+        scheduler._try_grant = lambda ticket: checks.append(ticket) or try_grant(ticket)
+
+        async def wait_then_refund():
+            waiter = asyncio.ensure_future(scheduler.aacquire(KEY, 59000))
+            await asyncio.sleep(0.3)
+            self.assertFalse(waiter.done())
+            threading.Thread(target=scheduler.refund, args=(held,)).start()
+            refunded = time.perf_counter()
+            await waiter
+            return time.perf_counter() - refunded
+
+        # Woken by the refund instead of waiting a minute for the refill, and not re-checking meanwhile
+        self.assertLess(asyncio.run(wait_then_refund()), 0.5)
+        self.assertLessEqual(len(checks), 3)
+
+    def test_queue_wait_reported_in_timings(self):
+        llm = FakeListChatModel(responses=["one", "two"])
+        provider, model = llm_key(llm)
+        # 1000 tokens/s: the first call's estimate drains the bucket, the second waits for a refill
+        set_scheduler(Scheduler(limits={f"{provider}:{model}": {"rpm": 600, "tpm": 60000}}))
+        with track_node("research") as timer:
+            invoke_llm(llm, ["x" * 238000], "first")
+            asyncio.run(ainvoke_llm(llm, ["short"], "second"))
+        record = timer.as_record()
+        self.assertGreater(record["calls"][1]["queue_ms"], 0)
+        self.assertEqual(record["queue_ms"], round(sum(c["queue_ms"] for c in record["calls"]), 2))
+
+    def test_failed_calls_give_back_their_tokens(self):
+        llm = _Rejecting(responses=["unused"])
+        provider, model = llm_key(llm)
+        scheduler = Scheduler(limits={f"{provider}:{model}": {"rpm": 600, "tpm": 60000}})
+        set_scheduler(scheduler)
+        bucket = scheduler._limiter(llm_key(llm)).tokens
+        # Each call's estimate would drain most of the bucket if it were kept
+        messages = ["x" * 200000]
+        calls = [lambda: invoke_llm(llm, messages, "sync"),
+                 lambda: asyncio.run(ainvoke_llm(llm, messages, "async")),
+                 lambda: stream_llm(llm, messages, "stream", lambda text: None),
+                 lambda: asyncio.run(astream_llm(llm, messages, "astream", lambda text: None))]
+        for call in calls:
+            with self.assertRaises(ValueError):
+                call()
+            self.assertGreater(bucket.level, 59000)
+
+
+if __name__ == "__main__":
+    unittest.main()
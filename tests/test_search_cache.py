@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from src.utils import search_cache
+from src.utils.config import Config
+from src.utils.search_cache import SearchCache, normalize_query, search_key
+from src.utils.instrumentation import track_node
+from src.agents.deep_research_agent import DeepResearchAgent
+from src.tools.fake_openai_server import FakeOpenAIServer, FakeServerConfig
+
+RESULTS = [{"title": "AI in marketing", "link": "https://example.com/a", "snippet": "AI lifts leads"}]
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "search.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _age(self, cache, key, seconds):
+        conn = cache._connect()
+        try:
+            conn.execute("UPDATE searches SET created_at = created_at - ? WHERE key = ?", (seconds, key))
+        finally:
+            conn.close()
+
+    def test_queries_are_normalised(self):
+        self.assertEqual(normalize_query("  AI in   Marketing?! "), "ai in marketing")
+        self.assertEqual(normalize_query("Café trends, 2024"), "cafe trends 2024")
+        self.assertEqual(search_key("AI in Marketing", 10), search_key("ai in marketing?", 10))
+        self.assertNotEqual(search_key("ai in marketing", 10), search_key("ai in marketing", 5))
+        self.assertNotEqual(search_key("ai in marketing", 10), search_key("ai marketing", 10))
+
+    def test_fresh_stale_and_expired_entries(self):
+        cache = SearchCache(self.path, ttl=100, stale_ttl=100, max_entries=10)
+        key = search_key("AI in marketing", 10)
+        self.assertEqual(cache.get(key), (None, "miss"))
+        cache.put(key, "AI in marketing", RESULTS)
+        self.assertEqual(cache.get(key), (RESULTS, "hit"))
+        self._age(cache, key, 150)
+        self.assertEqual(cache.get(key), (RESULTS, "stale"))
+        self._age(cache, key, 100)
+        self.assertEqual(cache.get(key), (None, "miss"))
+        cache.put(key, "AI in marketing", [])  # empty results are never stored
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["stale_hits"], stats["misses"], stats["expired"]), (1, 1, 2, 1))
+        self.assertEqual(stats["entries"], 0)
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = SearchCache(self.path, ttl=100, stale_ttl=100, max_entries=2)
+        keys = [search_key(q, 10) for q in ("one", "two", "three")]
+        cache.put(keys[0], "one", RESULTS)
+        time.sleep(0.01)
+        cache.put(keys[1], "two", RESULTS)
+        time.sleep(0.01)
+        cache.get(keys[0])
+        time.sleep(0.01)
+        cache.put(keys[2], "three", RESULTS)
+        self.assertEqual(cache.get(keys[1]), (None, "miss"))
+        self.assertEqual(cache.get(keys[0])[1], "hit")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_revalidation_runs_once_per_key(self):
+        cache = SearchCache(self.path, ttl=100, stale_ttl=100, max_entries=10)
+        key = search_key("AI in marketing", 10)
+        cache.put(key, "AI in marketing", RESULTS)
+        self._age(cache, key, 150)
+        release, calls = threading.Event(), []
+        fresh = [dict(RESULTS[0], snippet="refreshed")]
+
+        def search():
+            calls.append(1)
+            release.wait(5)
+            return fresh
+
+        self.assertTrue(cache.revalidate(key, "AI in marketing", search))
+        self.assertFalse(cache.revalidate(key, "AI in marketing", search))
+        release.set()
+        deadline = time.time() + 5
+        while cache.stats()["revalidations"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get(key), (fresh, "hit"))
+
+    def test_research_reuses_cached_search(self):
+        server = FakeOpenAIServer(FakeServerConfig(seed=3)).start()
+        saved = (Config.SERP_API_URL, Config.PAGE_FETCH_COUNT)
+        search_cache.set_search_cache(SearchCache(self.path, ttl=100, stale_ttl=100, max_entries=10))
+        Config.SERP_API_URL, Config.PAGE_FETCH_COUNT = server.search_url, 0
+        try:
+            agent = DeepResearchAgent()
+            agent.serp_api_key = "fake"
+            with track_node("research") as first:
+                results = agent._web_search("AI in Marketing")
+            with track_node("research") as second:
+                again = asyncio.run(agent._aweb_search("ai in marketing?"))
+        finally:
+            server.stop()
+            Config.SERP_API_URL, Config.PAGE_FETCH_COUNT = saved
+        self.assertTrue(results)
+        self.assertEqual(again, results)
+        self.assertEqual([(c["name"], c.get("cache")) for c in first.calls],
+                         [("serp_search", "miss"), ("serpapi", None)])
+        self.assertEqual([(c["name"], c.get("cache")) for c in second.calls], [("serp_search", "hit")])
+
+
+if __name__ == "__main__":
+    unittest.main()
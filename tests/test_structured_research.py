@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.utils.instrumentation import track_node
+from src.agents.deep_research_agent import DeepResearchAgent
+
+STRUCTURED_RESPONSE = json.dumps({
+    "insights": [
+        {"insight": "73% of marketers use AI for personalization", "evidence": "survey of 1,200 teams", "source_index": 0},
+        {"insight": "AI budgets are growing", "evidence": "", "source_index": 42},
+    ],
+    "summary": "Executive Summary: AI is mainstream in marketing.",
+})
+
+
+class TestStructuredResearch(unittest.TestCase):
+    def _agent(self, responses):
+        agent = DeepResearchAgent(mode="structured")
+        agent.serp_api_key = None
+        agent.llm = FakeListChatModel(responses=responses)
+        return agent
+
+    def test_single_call_returns_insights_evidence_and_summary(self):
+        agent = self._agent([STRUCTURED_RESPONSE])
+        with track_node("research") as timer:
+            result = agent.conduct_research("AI in marketing")
+        self.assertEqual([c["name"] for c in timer.calls], ["research_structured"])
+        self.assertEqual(len(result["key_insights"]), 2)
+        self.assertEqual(result["summary"], "Executive Summary: AI is mainstream in marketing.")
+        first, second = result["verified_facts"]
+        self.assertEqual(first["evidence"], "survey of 1,200 teams")
+        self.assertEqual(first["source"], result["search_results"][0]["link"])
+        self.assertIsNotNone(first["credibility_score"])
+        self.assertIsNone(second["source"])  # out-of-range source index is dropped
+
+        async_result = asyncio.run(self._agent([STRUCTURED_RESPONSE]).aconduct_research("AI in marketing", verify_facts=False))
+        self.assertEqual(async_result["verified_facts"][0]["verification_status"], "unverified")
+
+    def test_invalid_response_falls_back_to_two_calls(self):
+        agent = self._agent(["Sorry, here are some thoughts", "- AI helps targeting", "Summary text"])
+        with track_node("research") as timer:
+            result = agent.conduct_research("AI in marketing")
+        self.assertEqual([c["name"] for c in timer.calls],
+                         ["research_structured", "research_insights", "research_summary"])
+        self.assertEqual(result["summary"], "Summary text")
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DeepResearchAgent(mode="three_call")
+
+
+if __name__ == "__main__":
+    unittest.main()
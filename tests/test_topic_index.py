@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import time
+import random
+import tempfile
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.utils import topic_index
+from src.utils.topic_index import TopicIndex, signature, similarity
+from src.agents.deep_research_agent import DeepResearchAgent
+
+RESEARCH = {"topic": "AI in marketing", "key_insights": ["insight"], "summary": "summary", "sources": []}
+
+
+class TestTopicIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "topics.sqlite")
+        self.index = TopicIndex(self.db_path, threshold=0.8, max_age=3600, max_entries=100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_near_duplicate_request_matches(self):
+        self.index.add("AI in marketing", RESEARCH)
+        match = self.index.find("Write a blog post and a LinkedIn post about AI in marketing")
+        self.assertIsNotNone(match)
+        self.assertEqual(match["topic"], "AI in marketing")
+        self.assertEqual(match["research"]["summary"], "summary")
+        self.assertIsNotNone(self.index.find("Please write a blog on AI for Marketing"))
+        self.assertIsNone(self.index.find("AI in healthcare"))
+        self.assertGreater(similarity(signature("AI marketing"), signature("ai for Marketing")), 0.99)
+
+    def test_distinct_topics_do_not_match(self):
+        pairs = [
+            ("Content marketing", "LinkedIn marketing"),
+            ("Write a blog post about LinkedIn marketing", "Write a blog post about blog marketing"),
+            ("AI in marketing", "Ethics of AI in marketing"),
+            ("AI in marketing", "Write a blog on AI for marketing teams"),
+        ]
+        for stored, requested in pairs:
+            with self.subTest(stored=stored, requested=requested):
+                self.index.clear()
+                self.index.add(stored, RESEARCH)
+                self.assertIsNone(self.index.find(requested))
+
+    def test_stale_unverified_and_capped_entries_are_not_reused(self):
+        self.index.add("AI in marketing", RESEARCH, verified=False)
+        self.assertIsNone(self.index.find("AI in marketing", verified=True))
+        self.assertIsNotNone(self.index.find("AI in marketing", verified=False))
+
+        self.index.max_age = 0.05
+        time.sleep(0.1)
+        self.assertIsNone(self.index.find("AI in marketing", verified=False))
+
+        small = TopicIndex(self.db_path, threshold=0.8, max_age=3600, max_entries=2)
+        for topic in ["remote work culture", "electric vehicle batteries", "quantum computing"]:
+            small.add(topic, RESEARCH)
+        self.assertIsNone(small.find("remote work culture"))
+        self.assertIsNotNone(small.find("quantum computing"))
+        self.assertEqual(small.stats()["entries"], 2)
+
+    def test_other_process_writes_are_visible(self):
+        other = TopicIndex(self.db_path, threshold=0.8, max_age=3600, max_entries=100)
+        other.add("sustainable supply chains", RESEARCH)
+        self.assertIsNotNone(self.index.find("sustainable supply chain"))
+
+    def test_lookup_stays_fast_with_many_topics(self):
+        self.index.max_entries = 50000
+        rng = random.Random(7)
+        now = time.time()
+        # Random signatures over a small value range so some band buckets collide
+        rows = [(f"topic {i}", topic_index._pack(tuple(rng.choices(range(64), k=topic_index.NUM_PERM))),
+                 1, "{}", now) for i in range(20000)]
+        conn = self.index._connect()
+        try:
+            conn.executemany("INSERT INTO topics (topic, signature, verified, research, created_at) "
+                             "VALUES (?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+        self.index.add("AI in marketing", RESEARCH)
+        self.assertEqual(self.index.stats()["entries"], 20001)
+        start = time.perf_counter()
+        for i in range(200):
+            self.index.find(f"question {i} about field {i * 3}")
+            self.index.find("AI in marketing")
+        per_lookup_ms = (time.perf_counter() - start) * 1000 / 400
+        self.assertLess(per_lookup_ms, 1)
+        self.assertEqual(self.index.stats()["hits"], 200)
+
+
+class TestResearchReuse(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        topic_index.set_topic_index(TopicIndex(os.path.join(self.tmp.name, "topics.sqlite"), threshold=0.8))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_similar_topic_skips_research_calls(self):
+        agent = DeepResearchAgent()
+        agent.serp_api_key = None
+        agent.llm = FakeListChatModel(responses=["- Brands use AI for targeting", "Research summary"])
+        first = agent.conduct_research("AI in marketing")
+        second = agent.conduct_research("Write a blog post about AI in marketing")
+        self.assertNotIn("reused_from", first)
+        self.assertEqual(second["reused_from"]["topic"], "AI in marketing")
+        self.assertEqual(second["topic"], "Write a blog post about AI in marketing")
+        self.assertEqual(second["summary"], "Research summary")
+
+
+if __name__ == "__main__":
+    unittest.main()